@@ -6,8 +6,12 @@ from sqlmodel import SQLModel
 # Import all models to register them with SQLModel
 from app.models.user import User
 from app.models.watchlist import Watchlist
-from app.models.price_cache import PriceCache
-from app.models.alert import Alert
+from app.models.price_cache import PriceCache, PriceCacheOffer
+from app.models.alert import Alert, AlertOffer
+from app.models.notification import NotificationOutbox
+from app.models.route_schedule import RouteSchedule
+from app.models.price_history import PriceHistorySegment
+from app.models.price_rule import RoutePriceStats, WatchlistRuleState
 
 # Import settings for database URL
 from app.core.config import settings
@@ -1,16 +1,32 @@
 """Watchlist endpoints."""
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+import hashlib
+from datetime import datetime, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.core.database import get_async_session
+from app.models.price_history import PriceResolution
 from app.models.user import User
 from app.models.watchlist import Watchlist, WatchlistCreate, WatchlistRead, WatchlistUpdate
+from app.services.offers import dumps
+from app.services.price_history import epoch_seconds, price_history, series_keys_for, window_start
 from app.services.watchlist_service import WatchlistService
 from app.api.v1.endpoints.auth import get_current_user
 
 router = APIRouter()
 
+HISTORY_COLUMNS = ["t", "min", "median", "offers"]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches the ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
 
 @router.post("/", response_model=WatchlistRead)
 async def create_watchlist(
@@ -69,6 +85,69 @@ async def get_watchlist(
     return watchlist
 
 
+@router.get("/{watchlist_id}/history")
+async def get_watchlist_history(
+    watchlist_id: int,
+    days: int = Query(default=90, ge=1, le=settings.PRICE_HISTORY_RETENTION_DAYS),
+    resolution: Optional[PriceResolution] = None,
+    if_none_match: Optional[str] = Header(default=None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Get a watchlist's price history per departure date.
+    
+    Points are ``[epoch seconds, min, median, offers]`` arrays with prices per
+    passenger, read from the finest rollup that covers ``days`` unless
+    ``resolution`` is given. The ETag changes only when new points land in the
+    window, so polling clients get a 304 until then.
+    """
+    watchlist_service = WatchlistService(db)
+    watchlist = await watchlist_service.get_by_id(watchlist_id)
+    
+    if not watchlist:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Watchlist not found"
+        )
+    
+    if watchlist.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this watchlist"
+        )
+    
+    now = datetime.utcnow()
+    resolution = resolution or price_history.resolution_for(now - timedelta(days=days), now)
+    since = window_start(resolution, now - timedelta(days=days))
+    keys = series_keys_for(watchlist)
+    
+    fingerprint = await price_history.fingerprint(db, keys, resolution, since, now)
+    version = f"{keys}|{resolution.value}|{since.isoformat()}|{fingerprint}"
+    etag = f'"{hashlib.blake2b(version.encode(), digest_size=12).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    history = await price_history.history(db, keys, since, now, resolution)
+    body = {
+        "watchlist_id": watchlist.id,
+        "resolution": resolution.value,
+        "since": since.isoformat(),
+        "columns": HISTORY_COLUMNS,
+        "series": [
+            {
+                "departure_date": key.departure_date.isoformat(),
+                "points": [
+                    [epoch_seconds(point.at), point.min_price, point.median_price, point.offers]
+                    for point in points
+                ]
+            }
+            for key, points in history.items()
+        ]
+    }
+    return Response(content=dumps(body), media_type="application/json", headers=headers)
+
+
 @router.put("/{watchlist_id}", response_model=WatchlistRead)
 async def update_watchlist(
     watchlist_id: int,
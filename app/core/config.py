@@ -1,7 +1,7 @@
 """Application configuration."""
 
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import validator
 from pydantic_settings import BaseSettings
 
@@ -33,6 +33,96 @@ class Settings(BaseSettings):
     AMADEUS_CLIENT_SECRET: str = ""
     AMADEUS_BASE_URL: str = "https://test.api.amadeus.com"
     
+    # OAuth token cache: "memory", "redis" or "sqlite"
+    TOKEN_CACHE_BACKEND: str = "memory"
+    TOKEN_CACHE_SQLITE_PATH: str = "./token_cache.db"
+    TOKEN_EARLY_REFRESH_SECONDS: int = 300
+    
+    # Flight search result cache: "memory" or "redis" (LRU in front of Redis)
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_BACKEND: str = "memory"
+    SEARCH_CACHE_MAX_ENTRIES: int = 2048
+    SEARCH_CACHE_TTL_NEAR_SECONDS: int = 900  # departure within 7 days
+    SEARCH_CACHE_TTL_MID_SECONDS: int = 3600  # within 30 days
+    SEARCH_CACHE_TTL_FAR_SECONDS: int = 10800
+    SEARCH_CACHE_ROUTE_TTLS: Dict[str, int] = {}  # e.g. {"GRU-JFK": 1800}
+    
+    # Amadeus rate limits (test environment: 10 TPS, 0 = unlimited quota)
+    AMADEUS_RATE_LIMIT_TPS: float = 10.0
+    AMADEUS_RATE_LIMIT_BURST: int = 1
+    AMADEUS_MONTHLY_QUOTA: int = 2000
+    # "memory" limits each process on its own; "redis" shares the limits across processes (Celery workers)
+    RATE_LIMIT_BACKEND: str = "memory"
+    
+    # Monitoring engine
+    MONITORING_CONCURRENCY: int = 10
+    MONITORING_MAX_LOOP_LAG: float = 0.1  # seconds before a run logs a blocked loop
+    
+    # Adaptive scheduler: spreads a daily search budget over routes by urgency
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_DAILY_BUDGET: int = 60  # Amadeus requests per day, flight-dates included (~AMADEUS_MONTHLY_QUOTA / 30)
+    SCHEDULER_TICK_SECONDS: int = 60
+    SCHEDULER_MIN_INTERVAL_SECONDS: int = 1800
+    SCHEDULER_MAX_INTERVAL_SECONDS: int = 86400
+    SCHEDULER_TARGET_GAP_SCALE: float = 0.15  # price this far above target halves the urgency
+    SCHEDULER_DEPARTURE_SCALE_DAYS: float = 30.0  # and so does departure this far out
+    SCHEDULER_VOLATILITY_SCALE: float = 0.05  # average move between checks that doubles it
+    SCHEDULER_VOLATILITY_ALPHA: float = 0.3  # EWMA weight of the latest move
+    
+    # Background jobs (scheduler, notification dispatcher, history compaction) run
+    # in the one web worker holding this Postgres advisory lock
+    BACKGROUND_LEADER_LOCK_ID: int = 0x666C6874
+    BACKGROUND_LEADER_RETRY_SECONDS: float = 15.0
+    
+    # Offer parsing and matching process pool (0 workers parses on the event loop)
+    OFFER_POOL_WORKERS: int = 0
+    OFFER_POOL_BATCH_SIZE: int = 8  # responses shipped to a worker at once
+    OFFER_POOL_MAX_WAIT_SECONDS: float = 0.005  # a partial batch is shipped after this
+    
+    # Price history: every fetch is kept raw, then downsampled as it ages
+    PRICE_HISTORY_RAW_DAYS: int = 7  # then one point per hour
+    PRICE_HISTORY_HOURLY_DAYS: int = 30  # then one point per day
+    PRICE_HISTORY_RETENTION_DAYS: int = 400
+    PRICE_HISTORY_COMPACT_INTERVAL_SECONDS: int = 3600
+    
+    # Price rules: drop-percentage and new-low alerts from rolling route statistics
+    PRICE_RULES_EWMA_ALPHA: float = 0.2  # weight of the latest fetch in the average
+    PRICE_RULES_WINDOW_DAYS: int = 30  # rolling minimum window
+    PRICE_RULES_MIN_SAMPLES: int = 5  # fetches before a route's rules can fire
+    PRICE_RULES_REALERT_PCT: float = 2.0  # a repeat alert needs a price this much under the last one
+    
+    # Fake Amadeus API for offline load tests (python -m app.fake_amadeus)
+    FAKE_AMADEUS_SEED: int = 0
+    FAKE_AMADEUS_OFFERS: int = 50  # offers per search, before the request's "max"
+    FAKE_AMADEUS_LATENCY_MS: float = 0.0  # median
+    FAKE_AMADEUS_LATENCY_SIGMA: float = 0.0  # log-normal spread, 0 for fixed latency
+    FAKE_AMADEUS_ERROR_RATE_429: float = 0.0
+    FAKE_AMADEUS_ERROR_RATE_5XX: float = 0.0
+    FAKE_AMADEUS_QUOTA: int = 0  # searches before quota exhaustion, 0 for unlimited
+    FAKE_AMADEUS_MAX_TPS: float = 0.0  # 0 for unlimited
+    FAKE_AMADEUS_TOKEN_TTL: int = 1799
+    FAKE_AMADEUS_PRICE_PERIOD_SECONDS: int = 0  # prices change every period, 0 for static
+    
+    # Celery monitoring pipeline (plan -> fetch -> match -> persist -> notify)
+    CELERY_BROKER_URL: str = ""  # defaults to REDIS_URL; "memory://" runs in-process
+    CELERY_RESULT_BACKEND: str = ""  # results are ignored when empty
+    CELERY_ROUTE_SHARDS: int = 8  # route queues monitoring.route.0 .. N-1
+    CELERY_TASK_MAX_RETRIES: int = 3
+    CELERY_RETRY_BACKOFF_MAX: int = 300
+    CELERY_VISIBILITY_TIMEOUT: int = 3600  # unacked tasks are redelivered after this (Redis)
+    
+    # Flexible-date grid: indicative price cache TTL and size, and margin over target
+    DATE_GRID_TTL_SECONDS: int = 21600
+    DATE_GRID_CACHE_MAX_ENTRIES: int = 20000  # (route, departure) prices
+    DATE_GRID_PRICE_SLACK: float = 0.1
+    
+    # Alerts: one digest per watchlist and run with the cheapest offers
+    ALERT_DIGEST_TOP_N: int = 5
+    
+    # Expired price cache sweeper
+    PRICE_CACHE_SWEEP_CHUNK_SIZE: int = 1000
+    PRICE_CACHE_SWEEP_INTERVAL_SECONDS: int = 900
+    
     DUFFEL_TOKEN: str = ""
     DUFFEL_BASE_URL: str = "https://api.duffel.com"
     
@@ -41,6 +131,34 @@ class Settings(BaseSettings):
     SENDGRID_FROM_EMAIL: str = "alerts@flighthunter.app"
     
     TELEGRAM_BOT_TOKEN: str = ""
+    TELEGRAM_BASE_URL: str = "https://api.telegram.org"
+    TELEGRAM_GLOBAL_RATE: float = 25.0  # Bot API allows ~30 msgs/sec overall
+    TELEGRAM_PER_CHAT_RATE: float = 1.0  # and ~1 msg/sec per chat
+    TELEGRAM_SENDER_WORKERS: int = 4
+    TELEGRAM_MAX_ATTEMPTS: int = 3
+    TELEGRAM_MAX_RETRY_AFTER: float = 60.0  # longer 429 waits go back to the outbox
+    TELEGRAM_MAX_WAIT: float = 50.0  # so do messages queued longer; capped at half NOTIFICATION_LEASE_SECONDS
+    TELEGRAM_HIGH_PRIORITY_DROP: float = 0.2  # alerts this far under target jump the queue
+    
+    # Notification outbox dispatcher
+    NOTIFICATION_DISPATCHER_ENABLED: bool = True
+    NOTIFICATION_WORKERS: int = 4
+    NOTIFICATION_BATCH_SIZE: int = 50
+    NOTIFICATION_LEASE_SECONDS: int = 120  # claimed rows are retried after this if a worker dies
+    NOTIFICATION_MAX_ATTEMPTS: int = 5
+    NOTIFICATION_RETRY_BASE_SECONDS: float = 30.0
+    NOTIFICATION_RETRY_MAX_SECONDS: float = 3600.0
+    NOTIFICATION_POLL_INTERVAL_SECONDS: float = 2.0
+    
+    # Outbound HTTP (shared pooled clients, one per upstream host)
+    HTTP2_ENABLED: bool = True
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 30.0
+    HTTP_WRITE_TIMEOUT: float = 10.0
+    HTTP_POOL_TIMEOUT: float = 5.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
     
     # Stripe
     STRIPE_SECRET_KEY: str = ""
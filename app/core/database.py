@@ -12,6 +12,11 @@ async_engine = create_async_engine(
     future=True
 )
 
+# Shared session factory for request handlers and background workers
+async_session_factory = sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
 async def init_db():
     """Initialize database and create tables."""
     async with async_engine.begin() as conn:
@@ -19,8 +24,5 @@ async def init_db():
 
 async def get_async_session() -> AsyncSession:
     """Get an async database session."""
-    async_session = sessionmaker(
-        async_engine, class_=AsyncSession, expire_on_commit=False
-    )
-    async with async_session() as session:
+    async with async_session_factory() as session:
         yield session 
\ No newline at end of file
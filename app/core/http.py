@@ -0,0 +1,84 @@
+"""Shared pooled HTTP clients for outbound API calls."""
+
+import importlib.util
+from typing import Dict
+import httpx
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+AMADEUS = "amadeus"
+TELEGRAM = "telegram"
+DUFFEL = "duffel"
+
+
+class HTTPClientRegistry:
+    """Long-lived ``httpx.AsyncClient`` instances, one per upstream host.
+    
+    Each upstream gets its own client so connection limits apply per host and
+    keep-alive connections are reused across requests. The registry is opened
+    and closed by the ``app.main`` lifespan; ``get`` also creates clients on
+    demand so background workers can use it outside the web app.
+    """
+    
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+    
+    def _base_urls(self) -> Dict[str, str]:
+        return {
+            AMADEUS: settings.AMADEUS_BASE_URL,
+            TELEGRAM: settings.TELEGRAM_BASE_URL,
+            DUFFEL: settings.DUFFEL_BASE_URL,
+        }
+    
+    def _http2_enabled(self) -> bool:
+        if not settings.HTTP2_ENABLED:
+            return False
+        if importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 enabled but 'h2' is not installed, falling back to HTTP/1.1")
+            return False
+        return True
+    
+    def _create_client(self, name: str) -> httpx.AsyncClient:
+        base_urls = self._base_urls()
+        if name not in base_urls:
+            raise KeyError(f"Unknown HTTP client: {name}")
+        
+        return httpx.AsyncClient(
+            base_url=base_urls[name],
+            http2=self._http2_enabled(),
+            timeout=httpx.Timeout(
+                connect=settings.HTTP_CONNECT_TIMEOUT,
+                read=settings.HTTP_READ_TIMEOUT,
+                write=settings.HTTP_WRITE_TIMEOUT,
+                pool=settings.HTTP_POOL_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+    
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Return the shared client for an upstream, creating it if needed."""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._clients[name] = self._create_client(name)
+        return client
+    
+    async def startup(self) -> None:
+        """Open a client for every known upstream."""
+        for name in self._base_urls():
+            self.get(name)
+        logger.info(f"HTTP clients ready: {', '.join(sorted(self._clients))}")
+    
+    async def aclose(self) -> None:
+        """Close all clients and drop their pooled connections."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+http_clients = HTTPClientRegistry()
\ No newline at end of file
@@ -0,0 +1,116 @@
+"""Leader election so background jobs run in one process of the deployment."""
+
+import asyncio
+from typing import Callable, Coroutine, List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from app.core.config import settings
+from app.core.database import async_engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+BackgroundJobs = Callable[[], List[Coroutine[None, None, None]]]
+
+
+class LeaderLock:
+    """Runs background jobs only in the process holding a Postgres advisory lock.
+    
+    Every web worker runs one. The worker that gets ``pg_try_advisory_lock``
+    starts the jobs; the others try again every ``retry_seconds``. The lock
+    belongs to a dedicated connection, so Postgres releases it when the
+    leader exits or its connection drops. The leader checks the connection
+    on the same interval and stops its jobs once it is gone, leaving the
+    lock to another worker. Other databases (SQLite in development and
+    tests) are used by a single process, which is always the leader.
+    """
+    
+    def __init__(
+        self,
+        engine: AsyncEngine = async_engine,
+        lock_id: Optional[int] = None,
+        retry_seconds: Optional[float] = None
+    ):
+        self.engine = engine
+        self.lock_id = lock_id or settings.BACKGROUND_LEADER_LOCK_ID
+        self.retry_seconds = retry_seconds or settings.BACKGROUND_LEADER_RETRY_SECONDS
+        self.is_leader = False
+    
+    @property
+    def supported(self) -> bool:
+        return self.engine.dialect.name == "postgresql"
+    
+    async def acquire(self) -> Optional[AsyncConnection]:
+        """Try to take the lock once; returns the connection holding it, or None."""
+        conn = await self.engine.connect()
+        try:
+            result = await conn.execute(text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": self.lock_id})
+            acquired = bool(result.scalar())
+            # The lock is session-level; don't keep a transaction open with it
+            await conn.commit()
+        except Exception:
+            await conn.close()
+            raise
+        
+        if not acquired:
+            await conn.close()
+            return None
+        return conn
+    
+    async def alive(self, conn: AsyncConnection) -> bool:
+        """Check that the connection holding the lock still works."""
+        try:
+            await conn.execute(text("SELECT 1"))
+            await conn.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Leader lock connection lost: {str(e)}")
+            return False
+    
+    async def release(self, conn: AsyncConnection) -> None:
+        """Drop the connection holding the lock, which releases it.
+        
+        The connection is invalidated rather than returned to the pool, where
+        it would keep holding the lock.
+        """
+        try:
+            await conn.invalidate()
+            await conn.close()
+        except Exception as e:
+            logger.error(f"Error releasing leader lock: {str(e)}")
+    
+    async def run_forever(self, jobs: BackgroundJobs) -> None:
+        """Run the coroutines built by ``jobs`` whenever this process is the leader, until cancelled."""
+        if not self.supported:
+            self.is_leader = True
+            await asyncio.gather(*jobs())
+            return
+        
+        while True:
+            try:
+                conn = await self.acquire()
+            except Exception as e:
+                logger.error(f"Leader lock check failed: {str(e)}")
+                conn = None
+            if conn is None:
+                await asyncio.sleep(self.retry_seconds)
+                continue
+            
+            logger.info("Acquired the leader lock, starting background jobs")
+            self.is_leader = True
+            tasks = [asyncio.create_task(job) for job in jobs()]
+            try:
+                while True:
+                    await asyncio.sleep(self.retry_seconds)
+                    if not await self.alive(conn):
+                        break
+                logger.warning("Lost the leader lock, stopping background jobs")
+            finally:
+                self.is_leader = False
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await self.release(conn)
+
+
+leader_lock = LeaderLock()
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""Event loop lag probe for spotting blocking calls in async code."""
+
+import asyncio
+import time
+from typing import Optional
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic timer fires on the running event loop.
+    
+    A sync call (blocking DB driver, sync SDK, CPU-heavy parsing) inside a
+    coroutine shows up as lag roughly equal to how long it held the loop.
+    Use as ``async with LoopLagMonitor() as monitor:`` and read ``max_lag``.
+    """
+    
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.max_lag = 0.0
+        self.samples = 0
+        self._task: Optional[asyncio.Task] = None
+    
+    async def _probe(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - expected
+            self.samples += 1
+            if lag > self.max_lag:
+                self.max_lag = lag
+    
+    async def __aenter__(self) -> "LoopLagMonitor":
+        self._task = asyncio.create_task(self._probe())
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
\ No newline at end of file
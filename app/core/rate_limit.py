@@ -0,0 +1,189 @@
+"""Token-bucket rate limiting for outbound provider calls."""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Optional, Union
+from app.core.config import settings
+
+
+class QuotaExceededError(Exception):
+    """Raised when a provider's monthly request quota is used up."""
+
+
+class TokenBucket:
+    """Async token bucket refilled at ``rate`` tokens per second."""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+    
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens without waiting; return False if not enough are available."""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+    
+    def delay_for(self, tokens: float = 1.0) -> float:
+        """Seconds until ``tokens`` would be available."""
+        self._refill()
+        return max(0.0, (tokens - self._tokens) / self.rate)
+    
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until tokens are available and take them.
+        
+        Waiters are served in arrival order because the lock is held while
+        sleeping.
+        """
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                await asyncio.sleep(self.delay_for(tokens))
+
+
+class ProviderRateLimiter:
+    """Per-provider limiter combining a TPS bucket and a monthly quota.
+    
+    Both are kept per process, so every process gets the full limits and the
+    quota counter restarts with it; use ``RedisRateLimiter`` when several
+    processes share the provider. The counter resets when the calendar
+    month changes.
+    """
+    
+    def __init__(self, name: str, tps: float, burst: int = 1, monthly_quota: int = 0):
+        self.name = name
+        self.bucket = TokenBucket(rate=tps, capacity=max(burst, 1))
+        self.monthly_quota = monthly_quota
+        self._month = self._current_month()
+        self.used_this_month = 0
+    
+    def _current_month(self) -> str:
+        return datetime.utcnow().strftime("%Y-%m")
+    
+    def _roll_month(self) -> None:
+        month = self._current_month()
+        if month != self._month:
+            self._month = month
+            self.used_this_month = 0
+    
+    @property
+    def remaining_quota(self) -> Optional[int]:
+        """Requests left this month, or None if the quota is unlimited."""
+        if not self.monthly_quota:
+            return None
+        self._roll_month()
+        return max(self.monthly_quota - self.used_this_month, 0)
+    
+    async def acquire(self) -> None:
+        """Wait for a request slot, raising if the monthly quota is spent."""
+        if self.remaining_quota == 0:
+            raise QuotaExceededError(f"{self.name} monthly quota of {self.monthly_quota} requests exhausted")
+        
+        await self.bucket.acquire()
+        # Re-check: other callers may have used the last slots while we waited
+        if self.remaining_quota == 0:
+            raise QuotaExceededError(f"{self.name} monthly quota of {self.monthly_quota} requests exhausted")
+        self.used_this_month += 1
+
+
+class RedisRateLimiter:
+    """Per-provider limiter shared by every process using the same Redis.
+    
+    Request slots are spaced ``1 / tps`` apart on a shared schedule: each
+    caller reserves the next slot with an optimistic (WATCH) update of the
+    schedule's theoretical arrival time, then sleeps until it, so up to
+    ``burst`` requests can go at once and callers are served in reservation
+    order. The monthly quota is a counter per calendar month, so it survives
+    restarts.
+    """
+    
+    def __init__(self, redis_client, name: str, tps: float, burst: int = 1, monthly_quota: int = 0):
+        self.redis = redis_client
+        self.name = name
+        self.interval = 1.0 / tps
+        self.burst = max(burst, 1)
+        self.monthly_quota = monthly_quota
+    
+    def _quota_key(self) -> str:
+        return f"rate-limit:{self.name}:quota:{datetime.utcnow().strftime('%Y-%m')}"
+    
+    async def remaining_quota(self) -> Optional[int]:
+        """Requests left this month, or None if the quota is unlimited."""
+        if not self.monthly_quota:
+            return None
+        used = int(await self.redis.get(self._quota_key()) or 0)
+        return max(self.monthly_quota - used, 0)
+    
+    async def _take_quota(self) -> None:
+        if not self.monthly_quota:
+            return
+        key = self._quota_key()
+        pipe = self.redis.pipeline()
+        pipe.incr(key)
+        # Kept a little past the month so late readers still see it
+        pipe.expire(key, 35 * 24 * 3600)
+        used, _ = await pipe.execute()
+        if used > self.monthly_quota:
+            await self.redis.decr(key)
+            raise QuotaExceededError(f"{self.name} monthly quota of {self.monthly_quota} requests exhausted")
+    
+    async def _reserve(self) -> float:
+        """Reserve the next request slot and return the seconds to wait for it."""
+        from redis.exceptions import WatchError
+        
+        key = f"rate-limit:{self.name}:tat"
+        async with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    now = time.time()
+                    tat = max(float(await pipe.get(key) or 0.0), now) + self.interval
+                    pipe.multi()
+                    pipe.set(key, repr(tat), px=int((tat - now + 1) * 1000))
+                    await pipe.execute()
+                    return max(tat - self.burst * self.interval - now, 0.0)
+                except WatchError:
+                    # Another process reserved a slot first
+                    continue
+    
+    async def acquire(self) -> None:
+        """Wait for a request slot, raising if the monthly quota is spent."""
+        await self._take_quota()
+        delay = await self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+RateLimiter = Union[ProviderRateLimiter, RedisRateLimiter]
+
+_limiters: Dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """Return the limiter for a provider, shared per process or through Redis per ``RATE_LIMIT_BACKEND``."""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        if provider != "amadeus":
+            raise KeyError(f"No rate limit configured for provider: {provider}")
+        limits = {
+            "name": provider,
+            "tps": settings.AMADEUS_RATE_LIMIT_TPS,
+            "burst": settings.AMADEUS_RATE_LIMIT_BURST,
+            "monthly_quota": settings.AMADEUS_MONTHLY_QUOTA
+        }
+        if settings.RATE_LIMIT_BACKEND == "redis":
+            import redis.asyncio as redis
+            limiter = RedisRateLimiter(redis.from_url(settings.REDIS_URL), **limits)
+        else:
+            limiter = ProviderRateLimiter(**limits)
+        _limiters[provider] = limiter
+    return limiter
\ No newline at end of file
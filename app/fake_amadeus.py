@@ -0,0 +1,235 @@
+"""Deterministic local stand-in for the Amadeus OAuth, flight-offers and flight-dates APIs.
+
+Offers are generated from a seed and the search parameters, so the same
+search always returns the same offers (per price period, when prices are set
+to drift). Latency, rate limiting, injected 429/5xx errors and quota
+exhaustion are configured with the ``FAKE_AMADEUS_*`` settings or flags.
+Point ``AMADEUS_BASE_URL`` at it with any non-empty client id and secret.
+
+Usage: python -m app.fake_amadeus [--port 8001] [--seed 0] [--latency-ms 300] [--error-rate-429 0.02] [--quota 2000]
+   or: uvicorn app.fake_amadeus:app --port 8001
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from dataclasses import dataclass, fields
+from datetime import date
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from app.core.config import settings
+from app.services.fake_offers import flight_dates, flight_offers
+from app.services.offers import dumps
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FakeAmadeusConfig:
+    """Behaviour of the fake API; zero disables a limit or fault."""
+    seed: int = 0
+    offers: int = 50  # offers generated per search, cheapest first; "max" trims them
+    latency_ms: float = 0.0  # median response time
+    latency_sigma: float = 0.0  # log-normal spread around the median
+    error_rate_429: float = 0.0
+    error_rate_5xx: float = 0.0
+    quota: int = 0  # searches answered before every search gets a 429
+    max_tps: float = 0.0  # searches per second before a 429
+    token_ttl: int = 1799
+    price_period_seconds: int = 0  # prices are reseeded every period
+    
+    @classmethod
+    def from_settings(cls) -> "FakeAmadeusConfig":
+        return cls(**{field.name: getattr(settings, f"FAKE_AMADEUS_{field.name.upper()}") for field in fields(cls)})
+
+
+def error_response(status_code: int, code: int, title: str, detail: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    body = {"errors": [{"status": status_code, "code": code, "title": title, "detail": detail}]}
+    return Response(content=dumps(body), status_code=status_code, media_type="application/json", headers=headers)
+
+
+def unauthorized() -> Response:
+    return error_response(401, 38190, "Invalid access token", "The access token provided in the Authorization header is invalid")
+
+
+def missing_parameter(name: str) -> Response:
+    return error_response(400, 32171, "MANDATORY DATA MISSING", f"Missing query parameter: {name}")
+
+
+class FakeAmadeus:
+    """Request handling state: issued tokens, quota, rate window and counters.
+    
+    Faults and latency come from a generator seeded with ``seed``, so a run
+    with the same request order sees the same failures.
+    """
+    
+    def __init__(self, config: FakeAmadeusConfig):
+        self.config = config
+        self.stats = {"tokens": 0, "searches": 0, "served": 0, "throttled": 0, "quota_exceeded": 0, "server_errors": 0}
+        self._faults = random.Random(config.seed)
+        self._token_ids = itertools.count(1)
+        self._tokens: Dict[str, float] = {}
+        self._window = (0, 0)  # (second, searches in it)
+    
+    @property
+    def period(self) -> int:
+        if not self.config.price_period_seconds:
+            return 0
+        return int(time.time() // self.config.price_period_seconds)
+    
+    def issue_token(self) -> Dict[str, Any]:
+        token = f"fake-{self.config.seed}-{next(self._token_ids)}"
+        self._tokens[token] = time.monotonic() + self.config.token_ttl
+        self.stats["tokens"] += 1
+        return {
+            "type": "amadeusOAuth2Token",
+            "username": "fake@flighthunter.app",
+            "application_name": "flighthunter-fake",
+            "token_type": "Bearer",
+            "access_token": token,
+            "expires_in": self.config.token_ttl,
+            "state": "approved",
+            "scope": ""
+        }
+    
+    def authorized(self, request: Request) -> bool:
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        expires_at = self._tokens.get(token)
+        return expires_at is not None and expires_at > time.monotonic()
+    
+    async def delay(self) -> None:
+        """Sleep for a log-normal latency around the configured median."""
+        if self.config.latency_ms <= 0:
+            return
+        seconds = self.config.latency_ms / 1000
+        if self.config.latency_sigma > 0:
+            seconds *= self._faults.lognormvariate(0, self.config.latency_sigma)
+        await asyncio.sleep(seconds)
+    
+    def fault(self) -> Optional[Response]:
+        """The error a search gets instead of offers, if any."""
+        self.stats["searches"] += 1
+        config = self.config
+        if config.quota and self.stats["served"] >= config.quota:
+            self.stats["quota_exceeded"] += 1
+            return error_response(429, 38194, "Too many requests", "Quota limit exceeded for this application")
+        
+        second = int(time.monotonic())
+        window_second, window_count = self._window
+        window_count = window_count + 1 if window_second == second else 1
+        self._window = (second, window_count)
+        if config.max_tps and window_count > config.max_tps:
+            self.stats["throttled"] += 1
+            return error_response(429, 38194, "Too many requests", "The network rate limit is exceeded, please try again later", {"Retry-After": "1"})
+        
+        draw = self._faults.random()
+        if draw < config.error_rate_429:
+            self.stats["throttled"] += 1
+            return error_response(429, 38194, "Too many requests", "The network rate limit is exceeded, please try again later", {"Retry-After": "1"})
+        if draw < config.error_rate_429 + config.error_rate_5xx:
+            self.stats["server_errors"] += 1
+            status_code = self._faults.choice([500, 502, 503])
+            return error_response(status_code, 141, "SYSTEM ERROR HAS OCCURRED", "Injected upstream failure")
+        
+        self.stats["served"] += 1
+        return None
+
+
+def create_app(config: Optional[FakeAmadeusConfig] = None) -> FastAPI:
+    """Build the fake Amadeus ASGI app."""
+    fake = FakeAmadeus(config or FakeAmadeusConfig.from_settings())
+    api = FastAPI(title="Fake Amadeus", docs_url=None, redoc_url=None)
+    api.state.fake = fake
+    
+    @api.post("/v1/security/oauth2/token")
+    async def token(request: Request):
+        form = parse_qs((await request.body()).decode())
+        if form.get("grant_type") != ["client_credentials"] or not form.get("client_id") or not form.get("client_secret"):
+            body = {"error": "invalid_client", "error_description": "Client credentials are invalid", "code": 38187, "title": "Invalid parameters"}
+            return Response(content=dumps(body), status_code=401, media_type="application/json")
+        return Response(content=dumps(fake.issue_token()), media_type="application/json")
+    
+    @api.get("/v2/shopping/flight-offers")
+    async def search_offers(request: Request):
+        if not fake.authorized(request):
+            return unauthorized()
+        await fake.delay()
+        error = fake.fault()
+        if error is not None:
+            return error
+        
+        params = request.query_params
+        for name in ("originLocationCode", "destinationLocationCode", "departureDate"):
+            if not params.get(name):
+                return missing_parameter(name)
+        body = flight_offers(
+            fake.config.seed,
+            params["originLocationCode"].upper(),
+            params["destinationLocationCode"].upper(),
+            date.fromisoformat(params["departureDate"]),
+            adults=int(params.get("adults", 1)),
+            cabin_class=params.get("travelClass", "ECONOMY"),
+            count=fake.config.offers,
+            limit=int(params.get("max", 250)),
+            period=fake.period
+        )
+        return Response(content=dumps(body), media_type="application/json")
+    
+    @api.get("/v1/shopping/flight-dates")
+    async def search_dates(request: Request):
+        if not fake.authorized(request):
+            return unauthorized()
+        await fake.delay()
+        error = fake.fault()
+        if error is not None:
+            return error
+        
+        params = request.query_params
+        for name in ("origin", "destination", "departureDate"):
+            if not params.get(name):
+                return missing_parameter(name)
+        date_from, _, date_to = params["departureDate"].partition(",")
+        date_from = date.fromisoformat(date_from)
+        body = flight_dates(
+            fake.config.seed,
+            params["origin"].upper(),
+            params["destination"].upper(),
+            date_from,
+            date.fromisoformat(date_to) if date_to else date_from,
+            count=fake.config.offers,
+            period=fake.period,
+            trip_days=int(params["duration"]) if params.get("oneWay") == "false" and params.get("duration") else None
+        )
+        return Response(content=dumps(body), media_type="application/json")
+    
+    @api.get("/fake/stats")
+    async def stats():
+        """Request counters, for load test reports."""
+        return fake.stats
+    
+    return api
+
+
+app = create_app()
+
+
+def main() -> None:
+    defaults = FakeAmadeusConfig.from_settings()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    for field in fields(FakeAmadeusConfig):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=type(getattr(defaults, field.name)), default=getattr(defaults, field.name))
+    args = parser.parse_args()
+    
+    config = FakeAmadeusConfig(**{field.name: getattr(args, field.name) for field in fields(FakeAmadeusConfig)})
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,5 +1,6 @@
 """Flight Hunter FastAPI application."""
 
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
@@ -8,21 +9,50 @@ from contextlib import asynccontextmanager
 from app.api.v1.api import api_router
 from app.core.config import settings
 from app.core.database import init_db
+from app.core.http import http_clients
+from app.core.leader import leader_lock
 # Import all models to register them with SQLModel
-from app.models import User, Watchlist, PriceCache, Alert
+from app.models import User, Watchlist, PriceCache, PriceCacheOffer, Alert, AlertOffer, NotificationOutbox, RouteSchedule, PriceHistorySegment, RoutePriceStats, WatchlistRuleState
+from app.services.offer_pool import offer_pool
+from app.services.price_history import price_history
+from app.services.telegram_sender import telegram_sender
+from app.templates import load_templates
+from app.workers.adaptive_scheduler import adaptive_scheduler
+from app.workers.notification_dispatcher import notification_dispatcher
+from app.workers.price_cache_sweeper import price_cache_sweeper
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def background_jobs():
+    """Jobs that must run in a single process, started by the leader lock."""
+    jobs = []
+    if settings.NOTIFICATION_DISPATCHER_ENABLED:
+        jobs.append(notification_dispatcher.run_forever())
+    if settings.SCHEDULER_ENABLED:
+        jobs.append(adaptive_scheduler.run_forever())
+    jobs.append(price_history.run_forever())
+    jobs.append(price_cache_sweeper.run_forever())
+    return jobs
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up...")
     await init_db()
     logger.info("Database initialized")
+    await http_clients.startup()
+    load_templates()
+    # Every web worker waits for the lock; only the holder runs the jobs
+    background_task = asyncio.create_task(leader_lock.run_forever(background_jobs))
     yield
     # Shutdown
     logger.info("Shutting down...")
+    background_task.cancel()
+    await asyncio.gather(background_task, return_exceptions=True)
+    await telegram_sender.aclose()
+    offer_pool.shutdown()
+    await http_clients.aclose()
 
 app = FastAPI(
     title="Flight Hunter API",
@@ -61,4 +91,15 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "ok", "version": "0.1.0"} 
\ No newline at end of file
+    return {"status": "ok", "version": "0.1.0"}
+
+@app.get("/metrics")
+async def metrics():
+    """Scheduler and notification delivery queue metrics."""
+    return {
+        # Scheduler and dispatcher figures are only updated in the leader
+        "leader": leader_lock.is_leader,
+        "scheduler": adaptive_scheduler.stats,
+        "telegram": telegram_sender.metrics(),
+        "notifications": notification_dispatcher.stats
+    } 
\ No newline at end of file
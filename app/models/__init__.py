@@ -2,7 +2,11 @@
 
 from .user import User
 from .watchlist import Watchlist
-from .price_cache import PriceCache
-from .alert import Alert
+from .price_cache import PriceCache, PriceCacheOffer
+from .alert import Alert, AlertOffer
+from .notification import NotificationOutbox
+from .route_schedule import RouteSchedule
+from .price_history import PriceHistorySegment
+from .price_rule import RoutePriceStats, WatchlistRuleState
 
-__all__ = ["User", "Watchlist", "PriceCache", "Alert"] 
\ No newline at end of file
+__all__ = ["User", "Watchlist", "PriceCache", "PriceCacheOffer", "Alert", "AlertOffer", "NotificationOutbox", "RouteSchedule", "PriceHistorySegment", "RoutePriceStats", "WatchlistRuleState"] 
\ No newline at end of file
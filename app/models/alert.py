@@ -2,6 +2,7 @@
 
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
 from enum import Enum
 
@@ -16,10 +17,15 @@ class AlertStatus(str, Enum):
 class Alert(SQLModel, table=True):
     """Alert model."""
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Recent-alert dedup lookups filter on all three columns
+        Index("ix_alerts_watchlist_status_created", "watchlist_id", "status", "created_at"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     watchlist_id: int = Field(foreign_key="watchlist.id")
-    price_cache_id: int = Field(foreign_key="price_cache.id")
+    # Best offer of the digest; cleared when the cached offer expires and is swept
+    price_cache_id: Optional[int] = Field(default=None, foreign_key="price_cache.id")
     price: float = Field(gt=0)
     currency: str = Field(default="BRL")
     channel: str  # EMAIL or TELEGRAM
@@ -32,6 +38,15 @@ class Alert(SQLModel, table=True):
     watchlist: "Watchlist" = Relationship(back_populates="alerts")
 
 
+class AlertOffer(SQLModel, table=True):
+    """Offer included in an alert digest, ranked by price (0 is the best)."""
+    __tablename__ = "alert_offers"
+    
+    alert_id: int = Field(foreign_key="alerts.id", primary_key=True)
+    price_cache_id: int = Field(foreign_key="price_cache.id", primary_key=True, index=True)
+    rank: int = Field(default=0)
+
+
 class AlertCreate(SQLModel):
     """Alert creation schema."""
     watchlist_id: int
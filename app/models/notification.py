@@ -0,0 +1,40 @@
+"""Notification outbox model."""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field, Column, JSON
+from enum import Enum
+
+
+class OutboxStatus(str, Enum):
+    """Outbox message status types."""
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    FAILED = "FAILED"
+
+
+class NotificationOutbox(SQLModel, table=True):
+    """Rendered alert notification waiting for delivery.
+    
+    Rows are written in the same transaction as their alert and deleted once
+    delivered; the alert keeps the final status. ``SENDING`` rows whose
+    ``locked_until`` has passed belong to a dead worker and are claimed again.
+    """
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        # Dispatcher claims scan due rows by status
+        Index("ix_notification_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    alert_id: int = Field(foreign_key="alerts.id", index=True)
+    channel: str  # EMAIL or TELEGRAM
+    recipient: str  # Email address or Telegram chat id
+    payload: Dict[str, Any] = Field(sa_column=Column(JSON, nullable=False))
+    status: OutboxStatus = Field(default=OutboxStatus.PENDING)
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    locked_until: Optional[datetime] = Field(default=None)
+    last_error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
@@ -1,8 +1,8 @@
 """Price cache model."""
 
 from datetime import datetime
-from typing import Optional, Dict, Any
-from sqlmodel import SQLModel, Field, Relationship, JSON, Column
+from typing import Optional
+from sqlmodel import SQLModel, Field, Relationship, LargeBinary, Column
 
 
 class PriceCache(SQLModel, table=True):
@@ -17,14 +17,25 @@ class PriceCache(SQLModel, table=True):
     airlines: str  # Comma-separated airline codes
     stops: int = Field(default=0, ge=0)
     duration: str  # Total duration string (e.g., "10h30m")
-    offer_data: Dict[str, Any] = Field(sa_column=Column(JSON))  # Full offer JSON
     fetched_at: datetime = Field(default_factory=datetime.utcnow)
-    expires_at: Optional[datetime] = Field(default=None)
+    expires_at: Optional[datetime] = Field(default=None, index=True)
     
     # Relationships
     watchlist: "Watchlist" = Relationship(back_populates="price_caches")
 
 
+class PriceCacheOffer(SQLModel, table=True):
+    """Trimmed, zlib-compressed offer JSON for a price cache row.
+    
+    Kept out of ``price_cache`` so normal price queries never load it; see
+    ``app.services.offers.unpack_offer``.
+    """
+    __tablename__ = "price_cache_offer"
+    
+    price_cache_id: int = Field(foreign_key="price_cache.id", primary_key=True)
+    payload: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+
+
 class PriceCacheCreate(SQLModel):
     """Price cache creation schema."""
     watchlist_id: int
@@ -34,7 +45,6 @@ class PriceCacheCreate(SQLModel):
     airlines: str
     stops: int = 0
     duration: str
-    offer_data: Dict[str, Any]
     expires_at: Optional[datetime] = None
 
 
@@ -0,0 +1,50 @@
+"""Price history model."""
+
+from datetime import datetime, date
+from typing import Optional
+from sqlalchemy import Index
+from sqlmodel import SQLModel, Field, LargeBinary, Column
+from enum import Enum
+
+
+class PriceResolution(str, Enum):
+    """Price history resolutions, from every fetch to one point a day."""
+    RAW = "RAW"
+    HOURLY = "HOURLY"
+    DAILY = "DAILY"
+
+
+class PriceHistorySegment(SQLModel, table=True):
+    """A run of price points for one (route, departure date, passengers, cabin) series.
+    
+    Points are stored column-wise as packed little-endian arrays: epoch
+    seconds and prices in cents as uint32, offer counts as uint16. Raw and
+    hourly segments cover one UTC day, daily segments one month, starting at
+    ``chunk_start``. Hourly and daily segments are rollups of the raw ones,
+    kept current on every write. See ``app.services.price_history``.
+    """
+    __tablename__ = "price_history"
+    __table_args__ = (
+        Index(
+            "ix_price_history_series",
+            "origin", "destination", "departure_date", "pax", "cabin_class", "resolution", "chunk_start",
+            unique=True
+        ),
+        # Compaction deletes old segments by resolution
+        Index("ix_price_history_resolution_chunk_start", "resolution", "chunk_start"),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    origin: str  # IATA code
+    destination: str  # IATA code
+    departure_date: date
+    pax: int = Field(default=1)
+    cabin_class: str
+    resolution: PriceResolution
+    chunk_start: datetime
+    points: int = Field(default=0)
+    timestamps: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    min_prices: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    median_prices: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    offer_counts: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""Price rule state models."""
+
+from datetime import datetime, date
+from typing import Optional
+from sqlalchemy import ForeignKey, Integer, UniqueConstraint
+from sqlmodel import SQLModel, Field, LargeBinary, Column
+
+
+class RoutePriceStats(SQLModel, table=True):
+    """Rolling price statistics of one (route, departure date, passengers, cabin) series.
+    
+    Prices are per passenger, but each party size keeps its own series so a
+    run searching several sizes adds one sample to each. ``day_mins`` is a
+    ring of daily minimums in cents (packed little-endian uint32, 0 for no
+    data) indexed by the day's ordinal modulo its length, with
+    ``window_day`` the newest day written.
+    """
+    __tablename__ = "route_price_stats"
+    __table_args__ = (
+        UniqueConstraint(
+            "origin", "destination", "departure_date", "pax", "cabin_class", name="uq_route_price_stats_series"
+        ),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    origin: str  # IATA code
+    destination: str  # IATA code
+    departure_date: date
+    pax: int = Field(default=1)
+    cabin_class: str
+    samples: int = Field(default=0)
+    ewma: Optional[float] = Field(default=None)
+    last_price: Optional[float] = Field(default=None)
+    window_day: Optional[date] = Field(default=None)
+    day_mins: bytes = Field(default=b"", sa_column=Column(LargeBinary, nullable=False))
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class WatchlistRuleState(SQLModel, table=True):
+    """Last price a watchlist was alerted at by a drop or new-low rule on one series.
+    
+    Kept per series, since a flexible watchlist's departure dates each have
+    their own statistics and re-arm against their own EWMA.
+    """
+    __tablename__ = "watchlist_rule_state"
+    
+    watchlist_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("watchlist.id", ondelete="CASCADE"), primary_key=True)
+    )
+    stats_id: int = Field(
+        sa_column=Column(Integer, ForeignKey("route_price_stats.id", ondelete="CASCADE"), primary_key=True)
+    )
+    last_alerted_price: Optional[float] = Field(default=None)  # per passenger; cleared when the price recovers
+    last_alerted_at: Optional[datetime] = Field(default=None)
+    last_rule: Optional[str] = Field(default=None)
\ No newline at end of file
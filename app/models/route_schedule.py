@@ -0,0 +1,33 @@
+"""Route schedule model."""
+
+from datetime import datetime, date
+from typing import Optional
+from sqlalchemy import UniqueConstraint
+from sqlmodel import SQLModel, Field
+
+
+class RouteSchedule(SQLModel, table=True):
+    """Polling state for one route search (a route group of the run planner).
+    
+    ``next_check_at`` is recomputed by the adaptive scheduler after every
+    tick. ``checks_today`` counts upstream requests made on ``checked_on`` so the
+    daily API budget survives restarts.
+    """
+    __tablename__ = "route_schedule"
+    __table_args__ = (
+        UniqueConstraint("origin", "destination", "departure_date", "pax", "cabin_class", name="uq_route_schedule_route"),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    origin: str  # IATA code
+    destination: str  # IATA code
+    departure_date: date = Field(index=True)
+    pax: int = Field(default=1)
+    cabin_class: str = Field(default="ECONOMY")
+    next_check_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+    last_checked_at: Optional[datetime] = Field(default=None)
+    last_min_price: Optional[float] = Field(default=None)
+    volatility: float = Field(default=0.0)  # EWMA of relative price moves between checks
+    interval_seconds: int = Field(default=0)
+    checked_on: Optional[date] = Field(default=None)
+    checks_today: int = Field(default=0)
\ No newline at end of file
@@ -31,6 +31,8 @@ class Watchlist(SQLModel, table=True):
     date_to: date
     flex_days: int = Field(default=0, ge=0, le=7)
     price_target: float = Field(gt=0)
+    drop_pct: Optional[float] = Field(default=None, gt=0, lt=100)  # alert when the price falls this far under its average
+    alert_on_new_low: bool = Field(default=False)
     pax: int = Field(default=1, ge=1, le=9)
     cabin_class: CabinClass = Field(default=CabinClass.ECONOMY)
     channel: AlertChannel
@@ -52,6 +54,8 @@ class WatchlistCreate(SQLModel):
     date_to: date
     flex_days: int = Field(default=0, ge=0, le=7)
     price_target: float = Field(gt=0)
+    drop_pct: Optional[float] = Field(default=None, gt=0, lt=100)
+    alert_on_new_low: bool = Field(default=False)
     pax: int = Field(default=1, ge=1, le=9)
     cabin_class: CabinClass = Field(default=CabinClass.ECONOMY)
     channel: AlertChannel
@@ -61,6 +65,8 @@ class WatchlistCreate(SQLModel):
 class WatchlistUpdate(SQLModel):
     """Watchlist update schema."""
     price_target: Optional[float] = Field(default=None, gt=0)
+    drop_pct: Optional[float] = Field(default=None, gt=0, lt=100)
+    alert_on_new_low: Optional[bool] = None
     is_active: Optional[bool] = None
 
 
@@ -73,6 +79,8 @@ class WatchlistRead(SQLModel):
     date_to: date
     flex_days: int
     price_target: float
+    drop_pct: Optional[float]
+    alert_on_new_low: bool
     pax: int
     cabin_class: CabinClass
     channel: AlertChannel
@@ -0,0 +1,166 @@
+"""Alert digest rendering with Jinja2 templates and memoized offer fragments."""
+
+from datetime import date
+from functools import lru_cache
+from typing import Any, Dict, NamedTuple, Sequence, Tuple
+from app.models.watchlist import Watchlist
+from app.services.offers import OfferRecord
+from app.services.search_cache import get_search_cache
+from app.templates import get_template
+
+# Per-recipient values substituted by SendGrid, so one alert email body can be
+# sent to every watcher of the same offer in a single request
+PRICE_TARGET_TAG = "-price_target-"
+DELTA_TAG = "-delta-"
+
+MONTHS_PT = ("Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez")
+
+RENDER_CACHE_SIZE = 4096
+
+
+class OfferFragment(NamedTuple):
+    """Formatted offer fields shared by every recipient of the same offer."""
+    route: str
+    departure: str
+    price_now: str
+    airlines: str
+    stops: str
+    duration: str
+    pax: int
+    book_link: str
+    expires_in: str
+
+
+def format_money(value: float, currency: str) -> str:
+    """Format a price the pt-BR way used in alerts, e.g. ``R$ 2.345``."""
+    amount = f"{value:,.0f}".replace(",", ".")
+    return f"R$ {amount}" if currency == "BRL" else f"{currency} {amount}"
+
+
+def format_delta(price: float, target: float, currency: str) -> str:
+    """Difference to the target, e.g. ``↓ R$ 155 (-6,2 %)``."""
+    difference = price - target
+    arrow = "↓" if difference <= 0 else "↑"
+    percent = f"{difference / target * 100:+.1f}".replace(".", ",")
+    return f"{arrow} {format_money(abs(difference), currency)} ({percent} %)"
+
+
+def format_date(value: date) -> str:
+    return f"{value.day:02d} {MONTHS_PT[value.month - 1]} {value.year}"
+
+
+def format_stops(stops: int) -> str:
+    if stops == 0:
+        return "voo direto"
+    return f"{stops} escala" if stops == 1 else f"{stops} escalas"
+
+
+def format_duration(duration: str) -> str:
+    """Turn an ISO 8601 duration like ``PT10H30M`` into ``10h30``."""
+    if not duration or not duration.startswith("PT"):
+        return duration or ""
+    hours, _, rest = duration[2:].partition("H") if "H" in duration else ("0", "", duration[2:])
+    minutes = rest.rstrip("M") or "0"
+    return f"{int(hours)}h{int(minutes):02d}"
+
+
+def format_expires_in(seconds: int) -> str:
+    minutes = max(seconds // 60, 1)
+    return f"{minutes} min" if minutes < 60 else f"{minutes // 60} h"
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def offer_fragment(
+    origin: str,
+    destination: str,
+    departure_date: date,
+    pax: int,
+    price: float,
+    currency: str,
+    airlines: str,
+    stops: int,
+    duration: str
+) -> OfferFragment:
+    """Format an offer once for all the recipients who watch it."""
+    return OfferFragment(
+        route=f"{origin} → {destination}",
+        departure=format_date(departure_date),
+        price_now=format_money(price, currency),
+        airlines=airlines.replace(",", " + ") or "-",
+        stops=format_stops(stops),
+        duration=format_duration(duration),
+        pax=pax,
+        book_link=f"https://www.google.com/flights?q={origin}%20to%20{destination}%20{departure_date}",
+        expires_in=format_expires_in(get_search_cache().ttl_for(origin, destination, departure_date))
+    )
+
+
+def fragment_for(watchlist: Watchlist, flight_info: OfferRecord) -> OfferFragment:
+    # Offers are one-way; those found on another day of a flexible window show their own date
+    return offer_fragment(
+        watchlist.origin,
+        watchlist.destination,
+        flight_info.departure_date or watchlist.date_from,
+        watchlist.pax,
+        flight_info.price,
+        flight_info.currency,
+        flight_info.airlines,
+        flight_info.stops,
+        flight_info.duration
+    )
+
+
+def fragments_for(watchlist: Watchlist, offers: Sequence[OfferRecord]) -> Tuple[OfferFragment, ...]:
+    return tuple(fragment_for(watchlist, flight_info) for flight_info in offers)
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def email_bodies(fragments: Tuple[OfferFragment, ...]) -> Tuple[str, str, str]:
+    """Subject, plain text and HTML for a digest, with per-recipient tags."""
+    context = {"best": fragments[0], "offers": fragments, "price_target": PRICE_TARGET_TAG, "delta": DELTA_TAG}
+    return (
+        get_template("alert_email_subject.txt.j2").render(context).strip(),
+        get_template("alert_email.txt.j2").render(context),
+        get_template("alert_email.html.j2").render(context)
+    )
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def telegram_text(fragments: Tuple[OfferFragment, ...], price_target: str, delta: str) -> str:
+    """Telegram Markdown for a digest and one target."""
+    return get_template("alert_telegram.md.j2").render(
+        best=fragments[0], offers=fragments, price_target=price_target, delta=delta
+    )
+
+
+def render_email_alert(watchlist: Watchlist, offers: Sequence[OfferRecord]) -> Dict[str, Any]:
+    """Email payload for one recipient; the body is shared by all recipients of the same offers.
+    
+    ``offers`` is the digest, cheapest first.
+    """
+    best = offers[0]
+    subject, plain, html = email_bodies(fragments_for(watchlist, offers))
+    return {
+        "subject": subject,
+        "html": html,
+        "plain": plain,
+        "substitutions": {
+            PRICE_TARGET_TAG: format_money(watchlist.price_target, best.currency),
+            DELTA_TAG: format_delta(best.price, watchlist.price_target, best.currency)
+        }
+    }
+
+
+def render_telegram_alert(watchlist: Watchlist, offers: Sequence[OfferRecord]) -> str:
+    """Telegram message text for one recipient; ``offers`` is the digest, cheapest first."""
+    best = offers[0]
+    return telegram_text(
+        fragments_for(watchlist, offers),
+        format_money(watchlist.price_target, best.currency),
+        format_delta(best.price, watchlist.price_target, best.currency)
+    )
+
+
+def render_welcome_email() -> Tuple[str, str]:
+    """Subject and HTML for the welcome email."""
+    return "Welcome to Flight Hunter! 🚀", get_template("welcome_email.html.j2").render()
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""Batched persistence for price cache rows, alerts and their offer links."""
+
+import time
+from datetime import datetime, timedelta
+from typing import List, Sequence, Tuple
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.alert import Alert, AlertOffer, AlertStatus
+from app.models.price_cache import PriceCache, PriceCacheOffer
+from app.models.watchlist import Watchlist
+from app.services.offers import OfferRecord
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BulkWriter:
+    """Writes a whole batch of offers or alerts with one multi-row INSERT.
+    
+    Statements use ``INSERT ... RETURNING`` so callers get ids (or alert
+    objects) back without a refresh per row. Committing is left to the caller
+    so a route group is persisted in a single transaction.
+    """
+    
+    def __init__(self, db: AsyncSession, price_ttl_hours: int = 24):
+        self.db = db
+        self.price_ttl_hours = price_ttl_hours
+        self.stats = {"rows": 0, "batches": 0, "seconds": 0.0}
+    
+    @property
+    def rows_per_second(self) -> float:
+        return self.stats["rows"] / self.stats["seconds"] if self.stats["seconds"] else 0.0
+    
+    def _record(self, rows: int, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        self.stats["rows"] += rows
+        self.stats["batches"] += 1
+        self.stats["seconds"] += elapsed
+        logger.debug(f"Bulk insert of {rows} rows took {elapsed * 1000:.1f} ms")
+    
+    async def save_price_caches(self, hits: Sequence[Tuple[Watchlist, OfferRecord]]) -> List[int]:
+        """Insert one price cache row per (watchlist, flight_info) and return their ids.
+        
+        Compressed offer payloads go to ``price_cache_offer`` in a second
+        multi-row insert, so price cache queries never read them.
+        """
+        if not hits:
+            return []
+        
+        started = time.perf_counter()
+        # Set expiration time (24 hours from now by default)
+        expires_at = datetime.utcnow() + timedelta(hours=self.price_ttl_hours)
+        rows = [
+            {
+                "watchlist_id": watchlist.id,
+                "offer_id": flight_info.offer_id,
+                "price": flight_info.price,
+                "currency": flight_info.currency,
+                "airlines": flight_info.airlines,
+                "stops": flight_info.stops,
+                "duration": flight_info.duration,
+                "expires_at": expires_at
+            }
+            for watchlist, flight_info in hits
+        ]
+        
+        statement = insert(PriceCache).returning(PriceCache.id, sort_by_parameter_order=True)
+        ids = list(await self.db.scalars(statement, rows))
+        
+        payload_rows = [
+            {"price_cache_id": price_cache_id, "payload": flight_info.payload}
+            for price_cache_id, (_, flight_info) in zip(ids, hits)
+            if flight_info.payload is not None
+        ]
+        if payload_rows:
+            await self.db.execute(insert(PriceCacheOffer), payload_rows)
+        
+        self._record(len(rows) + len(payload_rows), started)
+        return ids
+    
+    async def create_alerts(self, pending: Sequence[Tuple[Watchlist, int, OfferRecord]]) -> List[Alert]:
+        """Insert PENDING alerts for (watchlist, best price_cache_id, best flight_info) entries."""
+        if not pending:
+            return []
+        
+        started = time.perf_counter()
+        rows = [
+            {
+                "watchlist_id": watchlist.id,
+                "price_cache_id": price_cache_id,
+                "price": flight_info.price,
+                "currency": flight_info.currency,
+                "channel": watchlist.channel.value,
+                "status": AlertStatus.PENDING,
+                "created_at": datetime.utcnow()
+            }
+            for watchlist, price_cache_id, flight_info in pending
+        ]
+        
+        statement = insert(Alert).returning(Alert, sort_by_parameter_order=True)
+        alerts = list(await self.db.scalars(statement, rows))
+        self._record(len(rows), started)
+        return alerts
+    
+    async def link_alert_offers(self, links: Sequence[Tuple[int, Sequence[int]]]) -> None:
+        """Insert the ranked (alert_id, price_cache_ids) digest links."""
+        rows = [
+            {"alert_id": alert_id, "price_cache_id": price_cache_id, "rank": rank}
+            for alert_id, price_cache_ids in links
+            for rank, price_cache_id in enumerate(price_cache_ids)
+        ]
+        if not rows:
+            return
+        
+        started = time.perf_counter()
+        await self.db.execute(insert(AlertOffer), rows)
+        self._record(len(rows), started)
\ No newline at end of file
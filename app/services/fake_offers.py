@@ -0,0 +1,197 @@
+"""Seeded flight-offers and flight-dates payloads shaped like Amadeus responses.
+
+The same search parameters, seed and price period always produce the same
+offers, cheapest first, with one traveler pricing per adult so payload sizes
+track real responses. Used by the fake Amadeus API (``app.fake_amadeus``) and
+by ``FlightService`` when no Amadeus credentials are configured.
+"""
+
+import random
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+AIRLINES = ["LA", "G3", "AD", "TP", "AA", "UA", "CM", "AV", "AF", "KL", "IB", "DL"]
+HUBS = ["GRU", "GIG", "BSB", "PTY", "BOG", "LIM", "SCL", "MIA", "ATL", "LIS", "MAD", "CDG"]
+AIRCRAFT = {"320": "AIRBUS A320", "321": "AIRBUS A321", "789": "BOEING 787-9", "77W": "BOEING 777-300ER", "E95": "EMBRAER 195"}
+CABIN_FACTORS = {"ECONOMY": 1.0, "PREMIUM_ECONOMY": 1.7, "BUSINESS": 3.4, "FIRST": 6.0}
+FARE_BASES = {"ECONOMY": "SLBR0LS", "PREMIUM_ECONOMY": "WLBR0PE", "BUSINESS": "JLBR0BZ", "FIRST": "FLBR0FR"}
+
+
+def seeded_rng(*parts: Any) -> random.Random:
+    """Random generator seeded from the given values (stable across processes)."""
+    return random.Random(":".join(str(part) for part in parts))
+
+
+def offer_prices(
+    seed: int,
+    origin: str,
+    destination: str,
+    departure_date: date,
+    adults: int,
+    cabin_class: str,
+    count: int,
+    period: int = 0
+) -> List[float]:
+    """Total prices of a search's offers, cheapest first."""
+    route_fare = seeded_rng(seed, origin, destination).uniform(300, 2500)
+    day_factor = seeded_rng(seed, origin, destination, departure_date, period).uniform(0.75, 1.35)
+    base = route_fare * day_factor * CABIN_FACTORS.get(cabin_class, 1.0)
+    rng = seeded_rng(seed, origin, destination, departure_date, cabin_class, period, "prices")
+    return sorted(round(base * rng.uniform(1.0, 2.2) * adults, 2) for _ in range(count))
+
+
+def make_segments(
+    rng: random.Random,
+    origin: str,
+    destination: str,
+    departure_date: date,
+    carrier: str
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Segments of one itinerary and its total minutes."""
+    stops = rng.choices([0, 1, 2], weights=[5, 4, 1])[0]
+    hubs = rng.sample([hub for hub in HUBS if hub not in (origin, destination)], stops)
+    airports = [origin, *hubs, destination]
+    
+    departure = datetime.combine(departure_date, datetime.min.time()) + timedelta(minutes=rng.randrange(5 * 60, 23 * 60, 5))
+    started = departure
+    segments = []
+    for index, (leg_from, leg_to) in enumerate(zip(airports, airports[1:])):
+        minutes = rng.randrange(60, 11 * 60, 5)
+        arrival = departure + timedelta(minutes=minutes)
+        segments.append({
+            "departure": {"iataCode": leg_from, "terminal": str(rng.randint(1, 3)), "at": departure.isoformat()},
+            "arrival": {"iataCode": leg_to, "terminal": str(rng.randint(1, 3)), "at": arrival.isoformat()},
+            "carrierCode": carrier,
+            "number": str(rng.randint(100, 9999)),
+            "aircraft": {"code": rng.choice(list(AIRCRAFT))},
+            "operating": {"carrierCode": carrier},
+            "duration": f"PT{minutes // 60}H{minutes % 60}M",
+            "id": str(index + 1),
+            "numberOfStops": 0,
+            "blacklistedInEU": False
+        })
+        departure = arrival + timedelta(minutes=rng.randrange(50, 4 * 60, 5))
+    total = int((arrival - started).total_seconds() // 60)
+    return segments, total
+
+
+def make_offer(
+    index: int,
+    price: float,
+    rng: random.Random,
+    origin: str,
+    destination: str,
+    departure_date: date,
+    adults: int,
+    cabin_class: str
+) -> Dict[str, Any]:
+    """A flight offer shaped like an Amadeus flight-offers entry, with one traveler pricing per adult."""
+    carrier = rng.choice(AIRLINES)
+    segments, minutes = make_segments(rng, origin, destination, departure_date, carrier)
+    per_adult = round(price / adults, 2)
+    return {
+        "type": "flight-offer",
+        "id": str(index + 1),
+        "source": "GDS",
+        "instantTicketingRequired": False,
+        "nonHomogeneous": False,
+        "oneWay": False,
+        "lastTicketingDate": (departure_date - timedelta(days=rng.randint(1, 14))).isoformat(),
+        "numberOfBookableSeats": rng.randint(1, 9),
+        "itineraries": [{"duration": f"PT{minutes // 60}H{minutes % 60}M", "segments": segments}],
+        "price": {
+            "currency": "BRL",
+            "total": f"{price:.2f}",
+            "base": f"{price * 0.82:.2f}",
+            "fees": [{"amount": "0.00", "type": "SUPPLIER"}, {"amount": "0.00", "type": "TICKETING"}],
+            "grandTotal": f"{price:.2f}"
+        },
+        "pricingOptions": {"fareType": ["PUBLISHED"], "includedCheckedBagsOnly": False},
+        "validatingAirlineCodes": [carrier],
+        "travelerPricings": [
+            {
+                "travelerId": str(traveler + 1),
+                "fareOption": "STANDARD",
+                "travelerType": "ADULT",
+                "price": {"currency": "BRL", "total": f"{per_adult:.2f}", "base": f"{per_adult * 0.82:.2f}"},
+                "fareDetailsBySegment": [
+                    {
+                        "segmentId": segment["id"],
+                        "cabin": cabin_class,
+                        "fareBasis": FARE_BASES.get(cabin_class, "SLBR0LS"),
+                        "brandedFare": "LIGHT" if cabin_class == "ECONOMY" else "FLEX",
+                        "class": FARE_BASES.get(cabin_class, "S")[0],
+                        "includedCheckedBags": {"quantity": 0 if cabin_class == "ECONOMY" else 2}
+                    }
+                    for segment in segments
+                ]
+            }
+            for traveler in range(adults)
+        ]
+    }
+
+
+def flight_offers(
+    seed: int,
+    origin: str,
+    destination: str,
+    departure_date: date,
+    adults: int = 1,
+    cabin_class: str = "ECONOMY",
+    count: int = 50,
+    limit: Optional[int] = None,
+    period: int = 0
+) -> Dict[str, Any]:
+    """Flight-offers response body for one search; the same arguments give the same body."""
+    prices = offer_prices(seed, origin, destination, departure_date, adults, cabin_class, count, period)
+    prices = prices[:limit] if limit else prices
+    rng = seeded_rng(seed, origin, destination, departure_date, adults, cabin_class, period, "offers")
+    data = [
+        make_offer(index, price, rng, origin, destination, departure_date, adults, cabin_class)
+        for index, price in enumerate(prices)
+    ]
+    carriers = sorted({offer["validatingAirlineCodes"][0] for offer in data})
+    return {
+        "meta": {"count": len(data)},
+        "data": data,
+        "dictionaries": {
+            "aircraft": AIRCRAFT,
+            "currencies": {"BRL": "BRAZILIAN REAL"},
+            "carriers": {carrier: carrier for carrier in carriers}
+        }
+    }
+
+
+def flight_dates(
+    seed: int,
+    origin: str,
+    destination: str,
+    date_from: date,
+    date_to: date,
+    count: int = 50,
+    period: int = 0,
+    trip_days: Optional[int] = None
+) -> Dict[str, Any]:
+    """Flight-dates response body: each date's cheapest one-adult economy price.
+    
+    With ``trip_days`` prices are for round trips returning that many days
+    after departure: the cheapest outbound plus the cheapest return offer.
+    """
+    data = []
+    departure = date_from
+    while departure <= date_to:
+        price = offer_prices(seed, origin, destination, departure, 1, "ECONOMY", count, period)[0]
+        item = {
+            "type": "flight-date",
+            "origin": origin,
+            "destination": destination,
+            "departureDate": departure.isoformat()
+        }
+        if trip_days is not None:
+            return_date = departure + timedelta(days=trip_days)
+            price += offer_prices(seed, destination, origin, return_date, 1, "ECONOMY", count, period)[0]
+            item["returnDate"] = return_date.isoformat()
+        item["price"] = {"total": f"{price:.2f}"}
+        data.append(item)
+        departure += timedelta(days=1)
+    return {"data": data, "meta": {"currency": "BRL"}}
\ No newline at end of file
@@ -1,9 +1,15 @@
 """Flight service for Amadeus API integration."""
 
+from datetime import date
+from typing import List, Dict, Any, Optional, Tuple
 import httpx
-from datetime import datetime, date, timedelta
-from typing import List, Dict, Any, Optional
 from app.core.config import settings
+from app.core.http import http_clients, AMADEUS
+from app.core.rate_limit import get_rate_limiter
+from app.services.fake_offers import flight_offers
+from app.services.offers import OfferBatch, OfferRecord, dumps, loads, offer_record, parse_offers
+from app.services.search_cache import get_search_cache
+from app.services.token_manager import get_token_manager
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,37 +22,38 @@ class FlightService:
         self.client_id = settings.AMADEUS_CLIENT_ID
         self.client_secret = settings.AMADEUS_CLIENT_SECRET
         self.base_url = settings.AMADEUS_BASE_URL
-        self.access_token = None
-        self.token_expires_at = None
+        # Shared per process, so new FlightService instances reuse the cached token
+        self.token_manager = get_token_manager("amadeus", self.client_id, self._request_access_token)
+        self.rate_limiter = get_rate_limiter("amadeus")
+        self.search_cache = get_search_cache() if settings.SEARCH_CACHE_ENABLED else None
+        # Upstream requests actually sent by this instance, for quota accounting
+        self.stats = {"requests": 0, "cache_hits": 0}
     
     async def get_access_token(self) -> str:
         """Get or refresh Amadeus access token."""
-        if self.access_token and self.token_expires_at:
-            if datetime.utcnow() < self.token_expires_at:
-                return self.access_token
-        
-        # Request new token
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/v1/security/oauth2/token",
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                data={
-                    "grant_type": "client_credentials",
-                    "client_id": self.client_id,
-                    "client_secret": self.client_secret
-                }
-            )
-            
-            if response.status_code == 200:
-                token_data = response.json()
-                self.access_token = token_data["access_token"]
-                # Token expires in seconds, add buffer of 60 seconds
-                expires_in = token_data.get("expires_in", 1799)
-                self.token_expires_at = datetime.utcnow() + timedelta(seconds=expires_in - 60)
-                return self.access_token
-            else:
-                logger.error(f"Failed to get Amadeus token: {response.status_code}")
-                raise Exception("Failed to authenticate with Amadeus API")
+        return await self.token_manager.get_token()
+    
+    async def _request_access_token(self) -> Tuple[str, int]:
+        """Request a new Amadeus access token and return it with its lifetime."""
+        client = http_clients.get(AMADEUS)
+        response = await client.post(
+            "/v1/security/oauth2/token",
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            data={
+                "grant_type": "client_credentials",
+                "client_id": self.client_id,
+                "client_secret": self.client_secret
+            }
+        )
+        
+        if response.status_code == 200:
+            token_data = response.json()
+            # Token expires in seconds
+            expires_in = token_data.get("expires_in", 1799)
+            return token_data["access_token"], expires_in
+        else:
+            logger.error(f"Failed to get Amadeus token: {response.status_code}")
+            raise Exception("Failed to authenticate with Amadeus API")
     
     async def search_flights(
         self,
@@ -58,9 +65,59 @@ class FlightService:
         cabin_class: str = "ECONOMY"
     ) -> List[Dict[str, Any]]:
         """Search for flights using Amadeus API."""
+        raw = await self.fetch_offers_raw(origin, destination, departure_date, return_date, adults, cabin_class)
+        return loads(raw).get("data", [])
+    
+    async def search_offers(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: date,
+        return_date: Optional[date] = None,
+        adults: int = 1,
+        cabin_class: str = "ECONOMY",
+        max_price: Optional[float] = None
+    ) -> OfferBatch:
+        """Search for flights and parse only offers at or under ``max_price``."""
+        raw, cached = await self.fetch_offers(origin, destination, departure_date, return_date, adults, cabin_class)
+        batch = parse_offers(raw, max_price)
+        batch.cached = cached
+        return batch
+    
+    async def fetch_offers_raw(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: date,
+        return_date: Optional[date] = None,
+        adults: int = 1,
+        cabin_class: str = "ECONOMY"
+    ) -> bytes:
+        """Fetch the raw flight-offers response body, through the search cache."""
+        raw, _ = await self.fetch_offers(origin, destination, departure_date, return_date, adults, cabin_class)
+        return raw
+    
+    async def fetch_offers(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: date,
+        return_date: Optional[date] = None,
+        adults: int = 1,
+        cabin_class: str = "ECONOMY"
+    ) -> Tuple[bytes, bool]:
+        """Fetch the raw flight-offers response body and whether it came from the search cache."""
         if not self.client_id or not self.client_secret:
-            logger.warning("Amadeus credentials not configured, returning mock data")
-            return self._get_mock_flight_data(origin, destination, departure_date)
+            logger.warning("Amadeus credentials not configured, returning fake offers")
+            return dumps(flight_offers(0, origin, destination, departure_date, adults, cabin_class, count=10)), False
+        
+        cache_key = None
+        if self.search_cache:
+            cache_key = self.search_cache.make_key(origin, destination, departure_date, return_date, adults, cabin_class)
+            cached = await self.search_cache.get(cache_key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                return cached, True
         
         token = await self.get_access_token()
         
@@ -77,101 +134,85 @@ class FlightService:
         if return_date:
             params["returnDate"] = return_date.isoformat()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/v2/shopping/flight-offers",
-                headers={"Authorization": f"Bearer {token}"},
-                params=params
+        await self.rate_limiter.acquire()
+        self.stats["requests"] += 1
+        client = http_clients.get(AMADEUS)
+        response = await client.get(
+            "/v2/shopping/flight-offers",
+            headers={"Authorization": f"Bearer {token}"},
+            params=params
+        )
+        
+        if response.status_code != 200:
+            logger.error(f"Amadeus API error: {response.status_code} - {response.text}")
+            # Failed searches are reported and retried by the caller, never replaced with fake offers
+            response.raise_for_status()
+            raise httpx.HTTPStatusError(
+                f"Unexpected Amadeus status {response.status_code}", request=response.request, response=response
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("data", [])
-            else:
-                logger.error(f"Amadeus API error: {response.status_code} - {response.text}")
-                # Return mock data as fallback
-                return self._get_mock_flight_data(origin, destination, departure_date)
+        
+        raw = response.content
+        if cache_key:
+            await self.search_cache.set(
+                cache_key, raw, self.search_cache.ttl_for(origin, destination, departure_date)
+            )
+        return raw, False
     
-    def _get_mock_flight_data(self, origin: str, destination: str, departure_date: date) -> List[Dict[str, Any]]:
-        """Generate mock flight data for testing."""
-        import random
-        import uuid
-        
-        mock_flights = []
-        airlines = ["LA", "G3", "AD", "JJ"]
-        
-        for i in range(10):
-            price = random.randint(200, 1500)
-            stops = random.randint(0, 2)
-            duration_hours = random.randint(2, 15)
-            airline = random.choice(airlines)
-            
-            flight = {
-                "id": str(uuid.uuid4()),
-                "type": "flight-offer",
-                "source": "GDS",
-                "instantTicketingRequired": False,
-                "nonHomogeneous": False,
-                "oneWay": True,
-                "lastTicketingDate": "2024-02-15",
-                "numberOfBookableSeats": random.randint(1, 9),
-                "price": {
-                    "currency": "BRL",
-                    "total": f"{price}.00",
-                    "base": f"{price - 50}.00",
-                    "fees": [{
-                        "amount": "50.00",
-                        "type": "SUPPLIER"
-                    }],
-                    "grandTotal": f"{price}.00"
-                },
-                "validatingAirlineCodes": [airline],
-                "itineraries": [{
-                    "duration": f"PT{duration_hours}H{random.randint(0, 59)}M",
-                    "segments": [{
-                        "departure": {
-                            "iataCode": origin,
-                            "at": f"{departure_date.isoformat()}T{random.randint(6, 22):02d}:{random.randint(0, 59):02d}:00"
-                        },
-                        "arrival": {
-                            "iataCode": destination,
-                            "at": f"{departure_date.isoformat()}T{random.randint(8, 23):02d}:{random.randint(0, 59):02d}:00"
-                        },
-                        "carrierCode": airline,
-                        "number": f"{random.randint(1000, 9999)}",
-                        "aircraft": {"code": "320"},
-                        "operating": {"carrierCode": airline},
-                        "duration": f"PT{duration_hours}H{random.randint(0, 59)}M",
-                        "id": f"{i+1}",
-                        "numberOfStops": stops,
-                        "blacklistedInEU": False
-                    }]
-                }]
-            }
-            mock_flights.append(flight)
+    async def search_flight_dates(
+        self,
+        origin: str,
+        destination: str,
+        date_from: date,
+        date_to: date,
+        currency: str = "BRL"
+    ) -> Dict[date, float]:
+        """Get indicative cheapest one-way prices per departure date.
+        
+        Uses the Amadeus flight-dates API, which answers a whole date range
+        from cached data in one call. Dates without data, routes the API does
+        not cover and prices quoted in another currency are left out, so
+        callers should treat missing dates as unknown.
+        """
+        if not self.client_id or not self.client_secret:
+            return {}
+        
+        token = await self.get_access_token()
+        
+        params = {
+            "origin": origin,
+            "destination": destination,
+            "departureDate": f"{date_from.isoformat()},{date_to.isoformat()}",
+            "oneWay": "true",
+            "viewBy": "DATE"
+        }
+        
+        await self.rate_limiter.acquire()
+        self.stats["requests"] += 1
+        client = http_clients.get(AMADEUS)
+        response = await client.get(
+            "/v1/shopping/flight-dates",
+            headers={"Authorization": f"Bearer {token}"},
+            params=params
+        )
+        
+        if response.status_code != 200:
+            logger.warning(f"Amadeus flight-dates error for {origin}-{destination}: {response.status_code}")
+            return {}
+        
+        data = response.json()
+        if data.get("meta", {}).get("currency", currency) != currency:
+            return {}
+        
+        prices = {}
+        for item in data.get("data", []):
+            try:
+                departure = date.fromisoformat(item["departureDate"])
+                prices[departure] = float(item["price"]["total"])
+            except (KeyError, TypeError, ValueError):
+                continue
         
-        return mock_flights
+        return prices
     
-    def extract_flight_info(self, offer: Dict[str, Any]) -> Dict[str, Any]:
+    def extract_flight_info(self, offer: Dict[str, Any], keep_payload: bool = True) -> OfferRecord:
         """Extract relevant flight information from Amadeus offer."""
-        price = float(offer["price"]["total"])
-        currency = offer["price"]["currency"]
-        
-        # Extract airline codes
-        airlines = offer.get("validatingAirlineCodes", [])
-        airlines_str = ",".join(airlines)
-        
-        # Calculate total stops and duration
-        itinerary = offer["itineraries"][0]
-        total_stops = sum(segment.get("numberOfStops", 0) for segment in itinerary["segments"])
-        duration = itinerary["duration"]
-        
-        return {
-            "offer_id": offer["id"],
-            "price": price,
-            "currency": currency,
-            "airlines": airlines_str,
-            "stops": total_stops,
-            "duration": duration,
-            "offer_data": offer
-        } 
\ No newline at end of file
+        return offer_record(offer, keep_payload=keep_payload)
\ No newline at end of file
@@ -1,15 +1,26 @@
 """Notification service for sending alerts via email and Telegram."""
 
-import httpx
-from typing import Dict, Any
+import asyncio
+from typing import Any, Dict, List, Sequence, Tuple
 from app.core.config import settings
+from app.services.alert_renderer import render_email_alert, render_telegram_alert, render_welcome_email
+from app.services.offers import OfferRecord
+from app.services.telegram_sender import PRIORITY_HIGH, PRIORITY_NORMAL, TelegramSendError, telegram_sender
 from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+from sendgrid.helpers.mail import Mail, Personalization, Substitution, To
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class DeliveryError(Exception):
+    """A notification could not be delivered."""
+    
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
 class NotificationService:
     """Service for sending notifications via email and Telegram."""
     
@@ -20,168 +31,95 @@ class NotificationService:
         
         self.telegram_token = settings.TELEGRAM_BOT_TOKEN
     
-    async def send_email_alert(self, user_email: str, watchlist, flight_info: Dict[str, Any]) -> bool:
+    def render_email_alert(self, watchlist, offers: Sequence[OfferRecord]) -> Dict[str, Any]:
+        """Render the alert digest email; target and delta are per-recipient substitutions."""
+        return render_email_alert(watchlist, offers)
+    
+    async def deliver_email(self, content: Dict[str, Any], recipients: List[Tuple[str, Dict[str, str]]]) -> None:
+        """Send one rendered email to many recipients as SendGrid personalizations."""
+        if not self.sendgrid_client:
+            raise DeliveryError("SendGrid not configured", retryable=False)
+        
+        message = Mail(
+            from_email=settings.SENDGRID_FROM_EMAIL,
+            subject=content["subject"],
+            plain_text_content=content["plain"],
+            html_content=content["html"]
+        )
+        for user_email, substitutions in recipients:
+            personalization = Personalization()
+            personalization.add_to(To(user_email))
+            for key, value in substitutions.items():
+                personalization.add_substitution(Substitution(key, value))
+            message.add_personalization(personalization)
+        
+        # The SendGrid SDK is synchronous, so keep it off the event loop
+        try:
+            response = await asyncio.to_thread(self.sendgrid_client.send, message)
+        except Exception as e:
+            status_code = getattr(e, "status_code", None)
+            raise DeliveryError(
+                f"SendGrid error: {status_code or str(e)}",
+                retryable=status_code is None or status_code == 429 or status_code >= 500
+            )
+        
+        if response.status_code not in [200, 201, 202]:
+            raise DeliveryError(f"SendGrid returned {response.status_code}")
+    
+    async def send_email_alert(self, user_email: str, watchlist, flight_info: OfferRecord) -> bool:
         """Send price alert via email."""
         if not self.sendgrid_client:
             logger.warning("SendGrid not configured, skipping email alert")
             return False
         
         try:
-            # Format flight details
-            price = flight_info["price"]
-            currency = flight_info["currency"]
-            airlines = flight_info["airlines"]
-            duration = flight_info["duration"]
-            stops = flight_info["stops"]
-            
-            # Create email content
-            subject = f"🎯 Flight Alert: {watchlist.origin} → {watchlist.destination} for {currency} {price:.2f}"
-            
-            html_content = f"""
-            <html>
-            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 20px; color: white; border-radius: 10px 10px 0 0;">
-                    <h1 style="margin: 0; font-size: 24px;">✈️ Flight Hunter Alert</h1>
-                    <p style="margin: 5px 0 0 0; opacity: 0.9;">We found a flight matching your criteria!</p>
-                </div>
-                
-                <div style="background: #f8f9fa; padding: 20px; border-radius: 0 0 10px 10px; border: 1px solid #e9ecef;">
-                    <div style="background: white; padding: 20px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                        <h2 style="color: #28a745; margin-top: 0;">🎯 Price Target Hit!</h2>
-                        
-                        <div style="display: flex; justify-content: space-between; margin: 15px 0;">
-                            <div style="text-align: center;">
-                                <div style="font-size: 18px; font-weight: bold; color: #333;">{watchlist.origin}</div>
-                                <div style="color: #666; font-size: 14px;">Origin</div>
-                            </div>
-                            <div style="text-align: center; color: #007bff;">
-                                <div style="font-size: 24px;">✈️</div>
-                            </div>
-                            <div style="text-align: center;">
-                                <div style="font-size: 18px; font-weight: bold; color: #333;">{watchlist.destination}</div>
-                                <div style="color: #666; font-size: 14px;">Destination</div>
-                            </div>
-                        </div>
-                        
-                        <div style="background: #e7f3ff; padding: 15px; border-radius: 6px; margin: 15px 0;">
-                            <div style="font-size: 32px; font-weight: bold; color: #007bff; text-align: center;">
-                                {currency} {price:.2f}
-                            </div>
-                            <div style="text-align: center; color: #666; font-size: 14px;">
-                                Target: {currency} {watchlist.price_target:.2f}
-                            </div>
-                        </div>
-                        
-                        <div style="margin: 15px 0;">
-                            <strong>Flight Details:</strong><br>
-                            🏢 Airlines: {airlines}<br>
-                            ⏱️ Duration: {duration}<br>
-                            🔄 Stops: {stops}<br>
-                            👥 Passengers: {watchlist.pax}<br>
-                            📅 Date: {watchlist.date_from}
-                        </div>
-                        
-                        <div style="text-align: center; margin: 20px 0;">
-                            <a href="https://www.google.com/flights?q={watchlist.origin}%20to%20{watchlist.destination}%20{watchlist.date_from}" 
-                               style="background: #007bff; color: white; padding: 12px 24px; text-decoration: none; border-radius: 6px; display: inline-block;">
-                                Book Now on Google Flights
-                            </a>
-                        </div>
-                    </div>
-                    
-                    <div style="text-align: center; margin-top: 20px; color: #666; font-size: 12px;">
-                        <p>This alert was sent by Flight Hunter. To manage your watchlists, visit our dashboard.</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            
-            plain_content = f"""
-Flight Hunter Alert - Price Target Hit!
-
-Route: {watchlist.origin} → {watchlist.destination}
-Price: {currency} {price:.2f} (Target: {currency} {watchlist.price_target:.2f})
-Airlines: {airlines}
-Duration: {duration}
-Stops: {stops}
-Passengers: {watchlist.pax}
-Date: {watchlist.date_from}
-
-Book now: https://www.google.com/flights?q={watchlist.origin}%20to%20{watchlist.destination}%20{watchlist.date_from}
-            """
+            content = self.render_email_alert(watchlist, [flight_info])
+            await self.deliver_email(content, [(user_email, content["substitutions"])])
+            logger.info(f"Email alert sent successfully to {user_email}")
+            return True
             
-            message = Mail(
-                from_email=settings.SENDGRID_FROM_EMAIL,
-                to_emails=user_email,
-                subject=subject,
-                plain_text_content=plain_content,
-                html_content=html_content
-            )
-            
-            response = self.sendgrid_client.send(message)
-            
-            if response.status_code in [200, 201, 202]:
-                logger.info(f"Email alert sent successfully to {user_email}")
-                return True
-            else:
-                logger.error(f"Failed to send email: {response.status_code}")
-                return False
-                
         except Exception as e:
             logger.error(f"Error sending email alert: {str(e)}")
             return False
     
-    async def send_telegram_alert(self, chat_id: str, watchlist, flight_info: Dict[str, Any]) -> bool:
+    def render_telegram_alert(self, watchlist, offers: Sequence[OfferRecord]) -> Dict[str, Any]:
+        """Render the alert digest as a Telegram Markdown message."""
+        message = render_telegram_alert(watchlist, offers)
+        
+        # Big drops below target are delivered first when the queue backs up
+        drop = (watchlist.price_target - offers[0].price) / watchlist.price_target
+        priority = PRIORITY_HIGH if drop >= settings.TELEGRAM_HIGH_PRIORITY_DROP else PRIORITY_NORMAL
+        
+        return {"text": message, "priority": priority}
+    
+    async def deliver_telegram(self, chat_id: str, text: str, priority: int = PRIORITY_NORMAL) -> None:
+        """Send one Telegram message through the rate-limited sender."""
+        if not self.telegram_token:
+            raise DeliveryError("Telegram bot token not configured", retryable=False)
+        
+        try:
+            await telegram_sender.send(
+                chat_id,
+                text,
+                priority=priority,
+                parse_mode="Markdown",
+                disable_web_page_preview=False
+            )
+        except TelegramSendError as e:
+            raise DeliveryError(str(e), retryable=e.retryable)
+    
+    async def send_telegram_alert(self, chat_id: str, watchlist, flight_info: OfferRecord) -> bool:
         """Send price alert via Telegram."""
         if not self.telegram_token:
             logger.warning("Telegram bot token not configured, skipping Telegram alert")
             return False
         
         try:
-            price = flight_info["price"]
-            currency = flight_info["currency"]
-            airlines = flight_info["airlines"]
-            duration = flight_info["duration"]
-            stops = flight_info["stops"]
+            content = self.render_telegram_alert(watchlist, [flight_info])
+            await self.deliver_telegram(chat_id, content["text"], content["priority"])
+            logger.info(f"Telegram alert sent successfully to chat {chat_id}")
+            return True
             
-            # Create Telegram message
-            message = f"""
-🎯 *Flight Alert - Price Target Hit!*
-
-✈️ *{watchlist.origin} → {watchlist.destination}*
-
-💰 *Price:* {currency} {price:.2f}
-🎯 *Your Target:* {currency} {watchlist.price_target:.2f}
-🏢 *Airlines:* {airlines}
-⏱️ *Duration:* {duration}
-🔄 *Stops:* {stops}
-👥 *Passengers:* {watchlist.pax}
-📅 *Date:* {watchlist.date_from}
-
-[Book on Google Flights](https://www.google.com/flights?q={watchlist.origin}%20to%20{watchlist.destination}%20{watchlist.date_from})
-            """
-            
-            url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json={
-                        "chat_id": chat_id,
-                        "text": message,
-                        "parse_mode": "Markdown",
-                        "disable_web_page_preview": False
-                    }
-                )
-                
-                if response.status_code == 200:
-                    logger.info(f"Telegram alert sent successfully to chat {chat_id}")
-                    return True
-                else:
-                    logger.error(f"Failed to send Telegram message: {response.status_code} - {response.text}")
-                    return False
-                    
         except Exception as e:
             logger.error(f"Error sending Telegram alert: {str(e)}")
             return False
@@ -192,51 +130,7 @@ Book now: https://www.google.com/flights?q={watchlist.origin}%20to%20{watchlist.
             return False
         
         try:
-            subject = "Welcome to Flight Hunter! 🚀"
-            
-            html_content = """
-            <html>
-            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; color: white; text-align: center; border-radius: 10px 10px 0 0;">
-                    <h1 style="margin: 0; font-size: 28px;">✈️ Welcome to Flight Hunter!</h1>
-                    <p style="margin: 10px 0 0 0; opacity: 0.9;">Your intelligent flight price monitoring assistant</p>
-                </div>
-                
-                <div style="background: #f8f9fa; padding: 30px; border-radius: 0 0 10px 10px; border: 1px solid #e9ecef;">
-                    <h2 style="color: #333; margin-top: 0;">🎯 Start Saving on Flights!</h2>
-                    
-                    <p>Thank you for joining Flight Hunter! You're now ready to:</p>
-                    
-                    <ul style="color: #666; line-height: 1.6;">
-                        <li>📊 Create watchlists for your desired routes</li>
-                        <li>🎯 Set price targets and get notified when they're hit</li>
-                        <li>📧 Receive instant alerts via email or Telegram</li>
-                        <li>💰 Save money on your next trip</li>
-                    </ul>
-                    
-                    <div style="background: white; padding: 20px; border-radius: 8px; margin: 20px 0; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                        <h3 style="color: #007bff; margin-top: 0;">🆓 Free Plan Features:</h3>
-                        <ul style="color: #666; margin: 0;">
-                            <li>Up to 3 active watchlists</li>
-                            <li>Email and Telegram alerts</li>
-                            <li>24/7 price monitoring</li>
-                        </ul>
-                    </div>
-                    
-                    <div style="text-align: center; margin: 30px 0;">
-                        <a href="#" style="background: #007bff; color: white; padding: 15px 30px; text-decoration: none; border-radius: 6px; display: inline-block; font-weight: bold;">
-                            Create Your First Watchlist
-                        </a>
-                    </div>
-                    
-                    <div style="text-align: center; color: #666; font-size: 14px; margin-top: 30px;">
-                        <p>Questions? Reply to this email or contact our support team.</p>
-                        <p style="margin: 0;">Happy hunting! 🎯</p>
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
+            subject, html_content = render_welcome_email()
             
             message = Mail(
                 from_email=settings.SENDGRID_FROM_EMAIL,
@@ -245,7 +139,7 @@ Book now: https://www.google.com/flights?q={watchlist.origin}%20to%20{watchlist.
                 html_content=html_content
             )
             
-            response = self.sendgrid_client.send(message)
+            response = await asyncio.to_thread(self.sendgrid_client.send, message)
             return response.status_code in [200, 201, 202]
             
         except Exception as e:
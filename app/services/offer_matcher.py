@@ -0,0 +1,59 @@
+"""Batched matching of a route's offers against its watchlists' price targets."""
+
+from typing import List, Sequence, Tuple
+from app.models.watchlist import Watchlist
+from app.services.offers import OfferRecord
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional speedup
+    np = None
+
+# Below this many (watchlist, offer) pairs the array setup costs more than the loop
+VECTORIZE_MIN_PAIRS = 256
+
+
+def match_offers_loop(watchlists: Sequence[Watchlist], offers: Sequence[OfferRecord]) -> List[Tuple[Watchlist, OfferRecord]]:
+    """Pure-Python matcher: one pass over the offers per watchlist."""
+    hits = []
+    for watchlist in watchlists:
+        seen_offer_ids = set()
+        for offer in offers:
+            if offer.price <= watchlist.price_target and offer.offer_id not in seen_offer_ids:
+                seen_offer_ids.add(offer.offer_id)
+                hits.append((watchlist, offer))
+    return hits
+
+
+def match_offers_numpy(watchlists: Sequence[Watchlist], offers: Sequence[OfferRecord]) -> List[Tuple[Watchlist, OfferRecord]]:
+    """NumPy matcher: compares all prices with all targets in one broadcast."""
+    prices = np.fromiter((offer.price for offer in offers), dtype=np.float64, count=len(offers))
+    targets = np.fromiter((watchlist.price_target for watchlist in watchlists), dtype=np.float64, count=len(watchlists))
+    
+    # Row-major nonzero keeps the loop's order: by watchlist, then by offer
+    rows, cols = np.nonzero(prices[None, :] <= targets[:, None])
+    
+    offer_ids = [offer.offer_id for offer in offers]
+    unique_ids = {offer_id: index for index, offer_id in enumerate(dict.fromkeys(offer_ids))}
+    if len(unique_ids) < len(offers):
+        # Keep only the first hit of each offer id per watchlist
+        id_codes = np.fromiter((unique_ids[offer_id] for offer_id in offer_ids), dtype=np.int64, count=len(offers))
+        _, first = np.unique(rows * len(unique_ids) + id_codes[cols], return_index=True)
+        first.sort()
+        rows, cols = rows[first], cols[first]
+    
+    return [(watchlists[row], offers[col]) for row, col in zip(rows.tolist(), cols.tolist())]
+
+
+def match_offers(watchlists: Sequence[Watchlist], offers: Sequence[OfferRecord]) -> List[Tuple[Watchlist, OfferRecord]]:
+    """Return the (watchlist, offer) pairs where the offer meets the watchlist's target.
+    
+    Repeated offer ids only hit once per watchlist. Large groups use the
+    NumPy path when it is installed; both paths return the same pairs in the
+    same order.
+    """
+    if not watchlists or not offers:
+        return []
+    if np is not None and len(watchlists) * len(offers) >= VECTORIZE_MIN_PAIRS:
+        return match_offers_numpy(watchlists, offers)
+    return match_offers_loop(watchlists, offers)
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""Process pool stage that parses and matches flight-offer responses off the event loop."""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.services.offer_matcher import match_offers
+from app.services.offers import OfferBatch, parse_offers
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PriceTarget(NamedTuple):
+    """Picklable stand-in for a watchlist in the matcher."""
+    id: int
+    price_target: float
+
+
+@dataclass(slots=True)
+class ProcessedOffers:
+    """Parsed offers of one response and its hits as (target index, offer index) pairs."""
+    batch: OfferBatch
+    hits: List[Tuple[int, int]] = field(default_factory=list)
+
+
+def process_response(raw: bytes, max_price: Optional[float], targets: Sequence[PriceTarget]) -> ProcessedOffers:
+    """Parse a flight-offers body and match it against price targets."""
+    batch = parse_offers(raw, max_price)
+    target_index = {id(target): index for index, target in enumerate(targets)}
+    offer_index = {id(offer): index for index, offer in enumerate(batch.offers)}
+    return ProcessedOffers(
+        batch=batch,
+        hits=[(target_index[id(target)], offer_index[id(offer)]) for target, offer in match_offers(targets, batch.offers)]
+    )
+
+
+def process_responses(jobs: List[Tuple[bytes, Optional[float], List[PriceTarget]]]) -> List[ProcessedOffers]:
+    """Worker entry point: process a batch of responses in one round trip."""
+    return [process_response(*job) for job in jobs]
+
+
+class OfferProcessPool:
+    """Ships raw flight-offers responses to worker processes in batches.
+    
+    Parsing, extracting and matching offers is CPU work that would otherwise
+    run on the event loop between searches. ``process`` queues a response
+    and awaits its result; queued responses go to the pool together once
+    ``batch_size`` are waiting or ``max_wait_seconds`` has passed, so one
+    pickling round trip covers several routes. Results come back as compact
+    ``OfferRecord`` batches and index pairs. Workers are spawned, not forked,
+    so they never inherit the loop, sockets or database connections. With
+    ``workers`` at 0 everything runs inline on the loop.
+    """
+    
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_wait_seconds: Optional[float] = None
+    ):
+        self.workers = settings.OFFER_POOL_WORKERS if workers is None else workers
+        self.batch_size = batch_size or settings.OFFER_POOL_BATCH_SIZE
+        self.max_wait_seconds = settings.OFFER_POOL_MAX_WAIT_SECONDS if max_wait_seconds is None else max_wait_seconds
+        self.stats = {"responses": 0, "batches": 0}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: List[Tuple[Tuple[bytes, Optional[float], List[PriceTarget]], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+    
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+    
+    async def process(
+        self,
+        raw: bytes,
+        max_price: Optional[float],
+        targets: Sequence[PriceTarget]
+    ) -> ProcessedOffers:
+        """Parse and match one response, in the pool when it is enabled."""
+        self.stats["responses"] += 1
+        if not self.enabled:
+            return process_response(raw, max_price, targets)
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((raw, max_price, list(targets)), future))
+        
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_seconds, self._flush)
+        
+        return await future
+    
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        
+        pending, self._pending = self._pending, []
+        self.stats["batches"] += 1
+        task = asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), process_responses, [job for job, _ in pending]
+        )
+        
+        def deliver(task: asyncio.Future) -> None:
+            # Cancelled when the pool shuts down with the batch still queued; exception() would raise
+            cancelled = task.cancelled()
+            error = None if cancelled else task.exception()
+            results = task.result() if not cancelled and error is None else None
+            for index, (_, future) in enumerate(pending):
+                if future.done():
+                    continue
+                if cancelled:
+                    future.cancel()
+                elif error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(results[index])
+        
+        task.add_done_callback(deliver)
+    
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+offer_pool = OfferProcessPool()
\ No newline at end of file
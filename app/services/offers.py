@@ -0,0 +1,155 @@
+"""Compact offer records, response parsing and the stored offer payload format."""
+
+import json
+import zlib
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
+
+def loads(raw: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed."""
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when it is installed."""
+    return orjson.dumps(value) if orjson else json.dumps(value, separators=(",", ":")).encode()
+
+
+# Offer fields kept in the stored payload; everything else (traveler
+# pricings, fare details, ...) is dropped before compression.
+PAYLOAD_OFFER_FIELDS = (
+    "id",
+    "source",
+    "oneWay",
+    "lastTicketingDate",
+    "numberOfBookableSeats",
+    "validatingAirlineCodes",
+)
+PAYLOAD_PRICE_FIELDS = ("currency", "total", "base", "grandTotal")
+PAYLOAD_SEGMENT_FIELDS = ("departure", "arrival", "carrierCode", "number", "duration", "numberOfStops")
+
+
+@dataclass(slots=True)
+class OfferRecord:
+    """Flight offer fields used by the monitoring hot path.
+    
+    ``departure_date`` is the outbound flight's local departure day, which
+    differs from a flexible watchlist's ``date_from`` for offers found on
+    another date of its window. ``payload`` holds the trimmed, compressed
+    offer JSON and is only filled for offers that will be persisted.
+    """
+    offer_id: str
+    price: float
+    currency: str
+    airlines: str
+    stops: int
+    duration: str
+    departure_date: Optional[date] = None
+    payload: Optional[bytes] = None
+
+
+def trim_offer(offer: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the offer fields needed to show and book a flight."""
+    trimmed = {field: offer[field] for field in PAYLOAD_OFFER_FIELDS if field in offer}
+    
+    price = offer.get("price", {})
+    trimmed["price"] = {field: price[field] for field in PAYLOAD_PRICE_FIELDS if field in price}
+    
+    trimmed["itineraries"] = [
+        {
+            "duration": itinerary.get("duration"),
+            "segments": [
+                {field: segment[field] for field in PAYLOAD_SEGMENT_FIELDS if field in segment}
+                for segment in itinerary.get("segments", [])
+            ]
+        }
+        for itinerary in offer.get("itineraries", [])
+    ]
+    return trimmed
+
+
+def pack_offer(offer: Dict[str, Any]) -> bytes:
+    """Trim an offer and compress it for storage."""
+    return zlib.compress(dumps(trim_offer(offer)), 6)
+
+
+def unpack_offer(payload: bytes) -> Dict[str, Any]:
+    """Decompress a stored offer payload."""
+    return loads(zlib.decompress(payload))
+
+
+def departure_date_of(itinerary: Dict[str, Any]) -> Optional[date]:
+    """Local departure day of an itinerary's first segment, if it is given."""
+    try:
+        return date.fromisoformat(itinerary["segments"][0]["departure"]["at"][:10])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+def offer_record(offer: Dict[str, Any], price: Optional[float] = None, keep_payload: bool = True) -> OfferRecord:
+    """Build an OfferRecord from an Amadeus flight offer."""
+    if price is None:
+        price = float(offer["price"]["total"])
+    
+    # Calculate total stops and duration from the outbound itinerary
+    itinerary = offer["itineraries"][0]
+    total_stops = sum(segment.get("numberOfStops", 0) for segment in itinerary["segments"])
+    
+    return OfferRecord(
+        offer_id=offer["id"],
+        price=price,
+        currency=offer["price"]["currency"],
+        airlines=",".join(offer.get("validatingAirlineCodes", [])),
+        stops=total_stops,
+        duration=itinerary["duration"],
+        departure_date=departure_date_of(itinerary),
+        payload=pack_offer(offer) if keep_payload else None
+    )
+
+
+@dataclass(slots=True)
+class OfferBatch:
+    """Offers parsed from one flight-offers response.
+    
+    ``offers`` only holds offers at or under the price ceiling used for
+    parsing, while ``prices`` has every offer's price for route statistics.
+    ``cached`` is set when the response came from the search cache rather
+    than a new upstream request.
+    """
+    offers: List[OfferRecord] = field(default_factory=list)
+    prices: List[float] = field(default_factory=list)
+    cached: bool = False
+
+
+def parse_offers(raw: bytes, max_price: Optional[float] = None) -> OfferBatch:
+    """Parse a flight-offers response body, keeping only offers that can match.
+    
+    The body is decoded in one orjson pass, then only each offer's price is
+    read. Offers above ``max_price`` (the highest relevant target) are
+    dropped before anything else is extracted. Compressed payloads are built
+    only for the offers that are kept.
+    """
+    batch = OfferBatch()
+    for offer in loads(raw).get("data") or []:
+        try:
+            price = float(offer["price"]["total"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        
+        batch.prices.append(price)
+        if max_price is not None and price > max_price:
+            continue
+        
+        try:
+            batch.offers.append(offer_record(offer, price))
+        except (KeyError, IndexError, TypeError):
+            continue
+    
+    return batch
\ No newline at end of file
@@ -0,0 +1,397 @@
+"""Compact per-route price history stored as packed array segments with rollups."""
+
+import asyncio
+import statistics
+import sys
+from array import array
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from sqlalchemy import delete, func, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.models.price_history import PriceHistorySegment, PriceResolution
+from app.models.watchlist import Watchlist
+import logging
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+UINT32_MAX = 2 ** 32 - 1
+UINT16_MAX = 2 ** 16 - 1
+
+
+class SeriesKey(NamedTuple):
+    """One price series: a route, a departure date, a party size and a cabin.
+    
+    Prices are per passenger, but each party size is searched separately
+    and gets its own series, so two searches of a route in the same run
+    never collide.
+    """
+    origin: str
+    destination: str
+    departure_date: date
+    pax: int
+    cabin_class: str
+
+
+class PricePoint(NamedTuple):
+    """Per-passenger price summary of one fetch (or of a downsampled bucket)."""
+    at: datetime
+    min_price: float
+    median_price: float
+    offers: int
+
+
+def summarize(prices: Sequence[float], pax: int = 1, at: Optional[datetime] = None) -> Optional[PricePoint]:
+    """Summarize one response's offer prices, per passenger."""
+    if not prices:
+        return None
+    pax = max(pax, 1)
+    return PricePoint(
+        at=at or datetime.utcnow(),
+        min_price=min(prices) / pax,
+        median_price=statistics.median(prices) / pax,
+        offers=len(prices)
+    )
+
+
+def pack_array(typecode: str, values: Iterable[int]) -> bytes:
+    packed = array(typecode, values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def unpack_array(typecode: str, data: bytes) -> array:
+    unpacked = array(typecode)
+    unpacked.frombytes(data)
+    if sys.byteorder == "big":
+        unpacked.byteswap()
+    return unpacked
+
+
+def _cents(price: float) -> int:
+    return min(max(int(round(price * 100)), 0), UINT32_MAX)
+
+
+def chunk_start(resolution: PriceResolution, at: datetime) -> datetime:
+    """Start of the segment holding a point: its UTC day, or its month for daily points."""
+    if resolution == PriceResolution.DAILY:
+        return datetime(at.year, at.month, 1)
+    return datetime(at.year, at.month, at.day)
+
+
+def bucket_start(resolution: PriceResolution, at: datetime) -> datetime:
+    """Start of the downsampling bucket a point falls in."""
+    if resolution == PriceResolution.HOURLY:
+        return at.replace(minute=0, second=0, microsecond=0)
+    if resolution == PriceResolution.DAILY:
+        return datetime(at.year, at.month, at.day)
+    return at
+
+
+def downsample(points: Sequence[PricePoint], resolution: PriceResolution) -> List[PricePoint]:
+    """Merge points into hourly or daily buckets.
+    
+    Each bucket keeps the lowest minimum, the median of the medians and the
+    mean offer count.
+    """
+    buckets: Dict[datetime, List[PricePoint]] = defaultdict(list)
+    for point in points:
+        buckets[bucket_start(resolution, point.at)].append(point)
+    return [
+        PricePoint(
+            at=start,
+            min_price=min(point.min_price for point in bucket),
+            median_price=statistics.median(point.median_price for point in bucket),
+            offers=round(sum(point.offers for point in bucket) / len(bucket))
+        )
+        for start, bucket in sorted(buckets.items())
+    ]
+
+
+def segment_points(segment: PriceHistorySegment) -> List[PricePoint]:
+    """Unpack a segment's arrays into points, oldest first."""
+    return [
+        PricePoint(EPOCH + timedelta(seconds=seconds), min_cents / 100, median_cents / 100, offers)
+        for seconds, min_cents, median_cents, offers in zip(
+            unpack_array("I", segment.timestamps),
+            unpack_array("I", segment.min_prices),
+            unpack_array("I", segment.median_prices),
+            unpack_array("H", segment.offer_counts)
+        )
+    ]
+
+
+def pack_points(segment: PriceHistorySegment, points: Sequence[PricePoint]) -> None:
+    """Replace a segment's arrays with the given points."""
+    points = sorted(points, key=lambda point: point.at)
+    segment.points = len(points)
+    segment.timestamps = pack_array("I", (epoch_seconds(point.at) for point in points))
+    segment.min_prices = pack_array("I", (_cents(point.min_price) for point in points))
+    segment.median_prices = pack_array("I", (_cents(point.median_price) for point in points))
+    segment.offer_counts = pack_array("H", (min(point.offers, UINT16_MAX) for point in points))
+    segment.updated_at = datetime.utcnow()
+
+
+def series_key_for(segment: PriceHistorySegment) -> SeriesKey:
+    return SeriesKey(segment.origin, segment.destination, segment.departure_date, segment.pax, segment.cabin_class)
+
+
+def series_keys_for(watchlist: Watchlist) -> List[SeriesKey]:
+    """Series of every departure date in a watchlist's window, past dates included."""
+    flex_days = watchlist.flex_days or 0
+    return [
+        SeriesKey(
+            watchlist.origin.upper(),
+            watchlist.destination.upper(),
+            watchlist.date_from + timedelta(days=offset),
+            watchlist.pax,
+            watchlist.cabin_class.value
+        )
+        for offset in range(-flex_days, flex_days + 1)
+    ]
+
+
+def window_start(resolution: PriceResolution, since: datetime) -> datetime:
+    """Floor a range start to the hour (the day for daily reads) so repeated reads match."""
+    if resolution == PriceResolution.DAILY:
+        return bucket_start(PriceResolution.DAILY, since)
+    return bucket_start(PriceResolution.HOURLY, since)
+
+
+def epoch_seconds(at: datetime) -> int:
+    return int((at - EPOCH).total_seconds())
+
+
+class PriceHistoryStore:
+    """Per-series price history for every fetch, with hourly and daily rollups.
+    
+    Every write appends the fetch summaries to the day's raw segment and
+    rebuilds the affected hourly and daily rollup points from that segment,
+    so all three resolutions are always current. A monitoring run costs one
+    select per resolution and one write per segment touched, however long
+    the series has been tracked. ``compact`` only deletes: raw segments after
+    ``PRICE_HISTORY_RAW_DAYS``, hourly ones after ``PRICE_HISTORY_HOURLY_DAYS``
+    and daily ones after ``PRICE_HISTORY_RETENTION_DAYS``. Reads go to the
+    finest resolution that still covers the range, which bounds them to a
+    few hundred points and a few dozen rows per series.
+    """
+    
+    def __init__(
+        self,
+        raw_days: Optional[int] = None,
+        hourly_days: Optional[int] = None,
+        retention_days: Optional[int] = None
+    ):
+        self.raw_days = raw_days or settings.PRICE_HISTORY_RAW_DAYS
+        self.hourly_days = hourly_days or settings.PRICE_HISTORY_HOURLY_DAYS
+        self.retention_days = retention_days or settings.PRICE_HISTORY_RETENTION_DAYS
+    
+    async def record(self, db: AsyncSession, points: Sequence[Tuple[SeriesKey, PricePoint]]) -> None:
+        """Append fetch summaries and refresh their rollups (committed by the caller)."""
+        raw: Dict[Tuple[SeriesKey, datetime], List[PricePoint]] = defaultdict(list)
+        for key, point in points:
+            raw[(key, chunk_start(PriceResolution.RAW, point.at))].append(point)
+        if not raw:
+            return
+        
+        days = await self.merge(db, PriceResolution.RAW, raw)
+        hourly: Dict[Tuple[SeriesKey, datetime], List[PricePoint]] = {}
+        daily: Dict[Tuple[SeriesKey, datetime], List[PricePoint]] = defaultdict(list)
+        for (key, day), day_points in days.items():
+            # A raw segment holds exactly one day, so its rollups are complete
+            hourly[(key, day)] = downsample(day_points, PriceResolution.HOURLY)
+            daily[(key, chunk_start(PriceResolution.DAILY, day))].extend(downsample(day_points, PriceResolution.DAILY))
+        await self.merge(db, PriceResolution.HOURLY, hourly)
+        await self.merge(db, PriceResolution.DAILY, daily)
+    
+    async def merge(
+        self,
+        db: AsyncSession,
+        resolution: PriceResolution,
+        points: Dict[Tuple[SeriesKey, datetime], List[PricePoint]]
+    ) -> Dict[Tuple[SeriesKey, datetime], List[PricePoint]]:
+        """Merge points into segments by timestamp, creating missing segments.
+        
+        A point replaces any point of its segment at the same time. Returns
+        every touched segment's points after the merge.
+        """
+        segments = await self._load_segments(db, resolution, points.keys())
+        merged_points: Dict[Tuple[SeriesKey, datetime], List[PricePoint]] = {}
+        for (key, start), new_points in points.items():
+            segment = segments.get((key, start))
+            if segment is None:
+                segment = PriceHistorySegment(
+                    origin=key.origin,
+                    destination=key.destination,
+                    departure_date=key.departure_date,
+                    pax=key.pax,
+                    cabin_class=key.cabin_class,
+                    resolution=resolution,
+                    chunk_start=start
+                )
+                pack_points(segment, new_points)
+                try:
+                    async with db.begin_nested():
+                        db.add(segment)
+                    merged_points[(key, start)] = sorted(new_points, key=lambda point: point.at)
+                    continue
+                except IntegrityError:
+                    # Another writer created the segment first
+                    segment = (await self._load_segments(db, resolution, [(key, start)]))[(key, start)]
+            
+            merged = {point.at: point for point in segment_points(segment)}
+            merged.update((point.at, point) for point in new_points)
+            merged_points[(key, start)] = sorted(merged.values(), key=lambda point: point.at)
+            pack_points(segment, merged_points[(key, start)])
+        
+        await db.flush()
+        return merged_points
+    
+    async def _load_segments(
+        self,
+        db: AsyncSession,
+        resolution: PriceResolution,
+        keys: Iterable[Tuple[SeriesKey, datetime]]
+    ) -> Dict[Tuple[SeriesKey, datetime], PriceHistorySegment]:
+        columns = (
+            PriceHistorySegment.origin,
+            PriceHistorySegment.destination,
+            PriceHistorySegment.departure_date,
+            PriceHistorySegment.pax,
+            PriceHistorySegment.cabin_class,
+            PriceHistorySegment.chunk_start
+        )
+        statement = select(PriceHistorySegment).where(
+            PriceHistorySegment.resolution == resolution,
+            tuple_(*columns).in_([(*key, start) for key, start in keys])
+        ).with_for_update()
+        result = await db.execute(statement)
+        return {(series_key_for(segment), segment.chunk_start): segment for segment in result.scalars().all()}
+    
+    def resolution_for(self, since: datetime, now: Optional[datetime] = None) -> PriceResolution:
+        """Finest resolution still kept as far back as ``since``."""
+        now = now or datetime.utcnow()
+        if since >= chunk_start(PriceResolution.RAW, now - timedelta(days=self.raw_days)):
+            return PriceResolution.RAW
+        if since >= chunk_start(PriceResolution.HOURLY, now - timedelta(days=self.hourly_days)):
+            return PriceResolution.HOURLY
+        return PriceResolution.DAILY
+    
+    def _segments_query(
+        self,
+        columns,
+        keys: Sequence[SeriesKey],
+        resolution: PriceResolution,
+        since: datetime,
+        until: datetime
+    ):
+        series_columns = (
+            PriceHistorySegment.origin,
+            PriceHistorySegment.destination,
+            PriceHistorySegment.departure_date,
+            PriceHistorySegment.pax,
+            PriceHistorySegment.cabin_class
+        )
+        return select(*columns).where(
+            PriceHistorySegment.resolution == resolution,
+            tuple_(*series_columns).in_([tuple(key) for key in keys]),
+            PriceHistorySegment.chunk_start >= chunk_start(resolution, since),
+            PriceHistorySegment.chunk_start <= until
+        )
+    
+    async def fingerprint(
+        self,
+        db: AsyncSession,
+        keys: Sequence[SeriesKey],
+        resolution: PriceResolution,
+        since: datetime,
+        until: datetime
+    ) -> Tuple[int, int, Optional[datetime]]:
+        """Segment count, point count and last update of a history read, without loading points."""
+        statement = self._segments_query(
+            (func.count(), func.coalesce(func.sum(PriceHistorySegment.points), 0), func.max(PriceHistorySegment.updated_at)),
+            keys, resolution, since, until
+        )
+        segments, points, updated_at = (await db.execute(statement)).one()
+        return segments, points, updated_at
+    
+    async def history(
+        self,
+        db: AsyncSession,
+        keys: Sequence[SeriesKey],
+        since: datetime,
+        until: Optional[datetime] = None,
+        resolution: Optional[PriceResolution] = None
+    ) -> Dict[SeriesKey, List[PricePoint]]:
+        """Points of several series between ``since`` and ``until``, oldest first, at one resolution."""
+        until = until or datetime.utcnow()
+        resolution = resolution or self.resolution_for(since)
+        result = await db.execute(self._segments_query((PriceHistorySegment,), keys, resolution, since, until))
+        
+        history: Dict[SeriesKey, List[PricePoint]] = {key: [] for key in keys}
+        for segment in result.scalars().all():
+            history[series_key_for(segment)].extend(
+                point for point in segment_points(segment) if since <= point.at <= until
+            )
+        for points in history.values():
+            points.sort(key=lambda point: point.at)
+        return history
+    
+    async def series(
+        self,
+        db: AsyncSession,
+        key: SeriesKey,
+        since: datetime,
+        until: Optional[datetime] = None,
+        resolution: Optional[PriceResolution] = None
+    ) -> List[PricePoint]:
+        """Points of one series between ``since`` and ``until``, oldest first."""
+        return (await self.history(db, [key], since, until, resolution))[key]
+    
+    async def compact(self, db: AsyncSession, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Drop segments past each resolution's window; returns segments deleted per resolution."""
+        now = now or datetime.utcnow()
+        windows = {
+            PriceResolution.RAW: self.raw_days,
+            PriceResolution.HOURLY: self.hourly_days,
+            PriceResolution.DAILY: self.retention_days
+        }
+        stats = {}
+        for resolution, days in windows.items():
+            # Only whole segments: a daily segment runs to the end of its month
+            cutoff = chunk_start(resolution, now - timedelta(days=days))
+            result = await db.execute(
+                delete(PriceHistorySegment).where(
+                    PriceHistorySegment.resolution == resolution,
+                    PriceHistorySegment.chunk_start < cutoff
+                )
+            )
+            stats[resolution.value.lower()] = result.rowcount or 0
+        await db.commit()
+        
+        logger.info(f"Compacted price history: {stats}")
+        return stats
+    
+    async def run_forever(
+        self,
+        session_factory: Callable[[], AsyncSession] = async_session_factory,
+        interval_seconds: Optional[int] = None
+    ) -> None:
+        """Compact on a fixed interval until cancelled."""
+        interval_seconds = interval_seconds or settings.PRICE_HISTORY_COMPACT_INTERVAL_SECONDS
+        while True:
+            try:
+                async with session_factory() as db:
+                    await self.compact(db)
+            except Exception as e:
+                logger.error(f"Price history compaction failed: {str(e)}")
+            await asyncio.sleep(interval_seconds)
+
+
+price_history = PriceHistoryStore()
\ No newline at end of file
@@ -1,13 +1,24 @@
 """Price monitoring service for background price checking."""
 
 from datetime import datetime, timedelta
-from typing import List, Optional
-from sqlmodel import Session, select
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+from app.core.config import settings
+from app.models.user import User
 from app.models.watchlist import Watchlist
-from app.models.price_cache import PriceCache, PriceCacheCreate
-from app.models.alert import Alert, AlertCreate, AlertStatus
+from app.models.price_cache import PriceCache
+from app.models.alert import Alert, AlertOffer, AlertStatus
+from app.models.notification import NotificationOutbox
+from app.services.bulk_writer import BulkWriter
 from app.services.flight_service import FlightService
+from app.services.offer_matcher import match_offers
+from app.services.offers import OfferBatch, OfferRecord
+from app.services.price_rules import merge_hits
 from app.services.notification_service import NotificationService
+from app.workers.notification_dispatcher import notification_dispatcher
+from app.workers.price_cache_sweeper import PriceCacheSweeper
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,163 +27,220 @@ logger = logging.getLogger(__name__)
 class PriceMonitoringService:
     """Service for monitoring flight prices and triggering alerts."""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.flight_service = FlightService()
         self.notification_service = NotificationService()
+        self.bulk_writer = BulkWriter(db)
     
     async def monitor_watchlist(self, watchlist: Watchlist) -> bool:
         """Monitor a single watchlist for price changes."""
         try:
             # Search for current flights
-            offers = await self.flight_service.search_flights(
+            batch = await self.flight_service.search_offers(
                 origin=watchlist.origin,
                 destination=watchlist.destination,
                 departure_date=watchlist.date_from,
                 adults=watchlist.pax,
-                cabin_class=watchlist.cabin_class.value
+                cabin_class=watchlist.cabin_class.value,
+                max_price=watchlist.price_target
             )
             
-            if not offers:
+            if not batch.prices:
                 logger.warning(f"No flight offers found for watchlist {watchlist.id}")
                 return False
             
-            # Process each offer
-            alerts_sent = 0
-            for offer in offers:
-                flight_info = self.flight_service.extract_flight_info(offer)
-                
-                # Check if price meets target
-                if flight_info["price"] <= watchlist.price_target:
-                    # Save to price cache
-                    price_cache = self.save_price_cache(watchlist.id, flight_info)
-                    
-                    # Check if we already sent an alert for this offer recently
-                    if not self.recent_alert_exists(watchlist.id, flight_info["offer_id"]):
-                        # Send alert
-                        alert = self.create_alert(watchlist, price_cache, flight_info)
-                        if await self.send_alert(watchlist, alert, flight_info):
-                            alerts_sent += 1
+            alerts_sent = await self.process_offers(watchlist, batch)
             
-            logger.info(f"Processed watchlist {watchlist.id}: {len(offers)} offers, {alerts_sent} alerts sent")
+            logger.info(f"Processed watchlist {watchlist.id}: {len(batch.prices)} offers, {alerts_sent} alerts queued")
             return True
-            
+        
         except Exception as e:
             logger.error(f"Error monitoring watchlist {watchlist.id}: {str(e)}")
             return False
     
-    def save_price_cache(self, watchlist_id: int, flight_info: dict) -> PriceCache:
-        """Save flight offer to price cache."""
-        # Set expiration time (24 hours from now)
-        expires_at = datetime.utcnow() + timedelta(hours=24)
-        
-        price_cache_data = PriceCacheCreate(
-            watchlist_id=watchlist_id,
-            offer_id=flight_info["offer_id"],
-            price=flight_info["price"],
-            currency=flight_info["currency"],
-            airlines=flight_info["airlines"],
-            stops=flight_info["stops"],
-            duration=flight_info["duration"],
-            offer_data=flight_info["offer_data"],
-            expires_at=expires_at
-        )
+    async def process_offers(self, watchlist: Watchlist, batch: OfferBatch) -> int:
+        """Match already-fetched offers against a watchlist and send alerts."""
+        return await self.process_route_group([watchlist], batch)
+    
+    async def process_route_group(
+        self,
+        watchlists: List[Watchlist],
+        batch: OfferBatch,
+        hits: Optional[List[Tuple[Watchlist, OfferRecord]]] = None,
+        rule_hits: Optional[List[Tuple[Watchlist, OfferRecord]]] = None
+    ) -> int:
+        """Match one route's offers against all of its watchlists and queue digests.
+        
+        For a single route; a run over several routes collects each route's
+        ``route_group_hits`` and calls ``alert_hits`` once, so a flexible
+        watchlist gets one digest across all of its dates.
+        """
+        return await self.alert_hits(self.route_group_hits(watchlists, batch, hits, rule_hits))
+    
+    def route_group_hits(
+        self,
+        watchlists: List[Watchlist],
+        batch: OfferBatch,
+        hits: Optional[List[Tuple[Watchlist, OfferRecord]]] = None,
+        rule_hits: Optional[List[Tuple[Watchlist, OfferRecord]]] = None
+    ) -> List[Tuple[Watchlist, OfferRecord]]:
+        """Offers meeting each watchlist's target, ignoring repeated offer ids.
+        
+        ``hits`` may be passed in when the offers were already matched, e.g.
+        in the offer process pool. ``rule_hits`` from the price rule engine
+        join the target hits.
+        """
+        if hits is None:
+            hits = match_offers(watchlists, batch.offers)
+        if rule_hits:
+            hits = merge_hits(hits, rule_hits)
+        return hits
+    
+    async def alert_hits(self, hits: List[Tuple[Watchlist, OfferRecord]]) -> int:
+        """Queue one digest per watchlist for the given hits.
+        
+        Each watchlist gets at most one alert per run, covering its cheapest
+        ``ALERT_DIGEST_TOP_N`` offers that were not alerted recently. Only
+        those offers are stored. Price cache rows, alerts, digest links and
+        outbox notifications are written in a single transaction. Delivery
+        happens later in the notification dispatcher, so price checks never
+        wait on it.
+        """
+        if not hits:
+            return 0
+        
+        return await self.queue_digests(await self.fresh_digests(hits))
+    
+    async def fresh_digests(self, hits: List[Tuple[Watchlist, OfferRecord]]) -> List[Tuple[Watchlist, List[OfferRecord]]]:
+        """Drop offers alerted recently and build each watchlist's digest."""
+        watchlist_ids = list({watchlist.id for watchlist, _ in hits})
+        recent_alerts = await self.load_recent_alert_keys(watchlist_ids)
+        return self.build_digests(hits, recent_alerts)
+    
+    async def queue_digests(self, digests: List[Tuple[Watchlist, List[OfferRecord]]]) -> int:
+        """Store digest offers and alerts, queue their notifications and commit."""
+        if not digests:
+            return 0
+        
+        digest_hits = [(watchlist, flight_info) for watchlist, offers in digests for flight_info in offers]
+        price_cache_ids = iter(await self.bulk_writer.save_price_caches(digest_hits))
+        digest_ids = [[next(price_cache_ids) for _ in offers] for _, offers in digests]
+        
+        pending = [(watchlist, ids[0], offers[0]) for (watchlist, offers), ids in zip(digests, digest_ids)]
+        alerts = await self.bulk_writer.create_alerts(pending)
+        await self.bulk_writer.link_alert_offers([(alert.id, ids) for alert, ids in zip(alerts, digest_ids)])
+        
+        alerts_queued = 0
+        for (watchlist, offers), alert in zip(digests, alerts):
+            if await self.send_alert(watchlist, alert, offers):
+                alerts_queued += 1
+        
+        # Alerts and their outbox rows are committed together
+        await self.db.commit()
+        if alerts_queued:
+            notification_dispatcher.wake()
+        logger.debug(f"Bulk writer throughput: {self.bulk_writer.rows_per_second:.0f} rows/sec")
+        
+        return alerts_queued
+    
+    def build_digests(
+        self,
+        hits: List[Tuple[Watchlist, OfferRecord]],
+        recent_alerts: Set[Tuple[int, str]]
+    ) -> List[Tuple[Watchlist, List[OfferRecord]]]:
+        """Group fresh hits per watchlist, keeping the cheapest ``ALERT_DIGEST_TOP_N``."""
+        by_watchlist: Dict[int, Tuple[Watchlist, List[OfferRecord]]] = {}
+        for watchlist, flight_info in hits:
+            if (watchlist.id, flight_info.offer_id) in recent_alerts:
+                continue
+            by_watchlist.setdefault(watchlist.id, (watchlist, []))[1].append(flight_info)
+        
+        top_n = settings.ALERT_DIGEST_TOP_N
+        return [
+            (watchlist, sorted(offers, key=lambda offer: offer.price)[:top_n])
+            for watchlist, offers in by_watchlist.values()
+        ]
+    
+    async def load_recent_alert_keys(self, watchlist_ids: List[int], hours: int = 24) -> Set[Tuple[int, str]]:
+        """Load (watchlist_id, offer_id) pairs alerted recently, in one query."""
+        if not watchlist_ids:
+            return set()
         
-        price_cache = PriceCache(**price_cache_data.dict())
-        self.db.add(price_cache)
-        self.db.commit()
-        self.db.refresh(price_cache)
+        cutoff_time = datetime.utcnow() - timedelta(hours=hours)
+        
+        # Queued alerts count too, so an offer is not re-queued before delivery
+        statement = select(Alert.watchlist_id, PriceCache.offer_id).join(
+            AlertOffer, AlertOffer.alert_id == Alert.id
+        ).join(
+            PriceCache, AlertOffer.price_cache_id == PriceCache.id
+        ).where(
+            Alert.watchlist_id.in_(watchlist_ids),
+            Alert.status.in_([AlertStatus.PENDING, AlertStatus.SENT]),
+            Alert.created_at > cutoff_time
+        )
         
-        return price_cache
+        result = await self.db.execute(statement)
+        return {(watchlist_id, offer_id) for watchlist_id, offer_id in result.all()}
     
-    def recent_alert_exists(self, watchlist_id: int, offer_id: str, hours: int = 24) -> bool:
+    async def recent_alert_exists(self, watchlist_id: int, offer_id: str, hours: int = 24) -> bool:
         """Check if an alert was sent for this offer recently."""
         cutoff_time = datetime.utcnow() - timedelta(hours=hours)
         
-        statement = select(Alert).join(PriceCache).where(
+        statement = select(Alert).join(
+            AlertOffer, AlertOffer.alert_id == Alert.id
+        ).join(
+            PriceCache, AlertOffer.price_cache_id == PriceCache.id
+        ).where(
             Alert.watchlist_id == watchlist_id,
             PriceCache.offer_id == offer_id,
             Alert.created_at > cutoff_time,
-            Alert.status == AlertStatus.SENT
+            Alert.status.in_([AlertStatus.PENDING, AlertStatus.SENT])
         )
         
-        existing_alert = self.db.exec(statement).first()
+        result = await self.db.execute(statement)
+        existing_alert = result.scalars().first()
         return existing_alert is not None
     
-    def create_alert(self, watchlist: Watchlist, price_cache: PriceCache, flight_info: dict) -> Alert:
-        """Create an alert record."""
-        alert_data = AlertCreate(
-            watchlist_id=watchlist.id,
-            price_cache_id=price_cache.id,
-            price=flight_info["price"],
-            currency=flight_info["currency"],
-            channel=watchlist.channel.value
-        )
-        
-        alert = Alert(**alert_data.dict())
-        self.db.add(alert)
-        self.db.commit()
-        self.db.refresh(alert)
-        
-        return alert
-    
-    async def send_alert(self, watchlist: Watchlist, alert: Alert, flight_info: dict) -> bool:
-        """Send alert notification."""
+    async def send_alert(self, watchlist: Watchlist, alert: Alert, offers: List[OfferRecord]) -> bool:
+        """Render the alert digest and queue it in the outbox (committed by the caller)."""
         try:
+            user = await self._get_user(watchlist)
             if watchlist.channel.value == "EMAIL":
-                success = await self.notification_service.send_email_alert(
-                    user_email=watchlist.user.email,
-                    watchlist=watchlist,
-                    flight_info=flight_info
-                )
+                recipient = user.email
+                payload = self.notification_service.render_email_alert(watchlist, offers)
             elif watchlist.channel.value == "TELEGRAM":
-                success = await self.notification_service.send_telegram_alert(
-                    chat_id=watchlist.tg_chat_id or watchlist.user.tg_chat_id,
-                    watchlist=watchlist,
-                    flight_info=flight_info
-                )
+                recipient = watchlist.tg_chat_id or user.tg_chat_id
+                payload = self.notification_service.render_telegram_alert(watchlist, offers)
             else:
                 logger.error(f"Unknown alert channel: {watchlist.channel}")
-                success = False
+                recipient, payload = None, None
             
-            # Update alert status
-            if success:
-                alert.status = AlertStatus.SENT
-                alert.sent_at = datetime.utcnow()
-            else:
+            if not recipient or payload is None:
                 alert.status = AlertStatus.FAILED
-                alert.error_message = "Failed to send notification"
-            
-            self.db.add(alert)
-            self.db.commit()
-            
-            return success
+                alert.error_message = "No recipient for alert channel"
+                return False
             
+            self.db.add(NotificationOutbox(
+                alert_id=alert.id,
+                channel=watchlist.channel.value,
+                recipient=recipient,
+                payload=payload
+            ))
+            return True
+        
         except Exception as e:
             logger.error(f"Error sending alert {alert.id}: {str(e)}")
             alert.status = AlertStatus.FAILED
             alert.error_message = str(e)
-            self.db.add(alert)
-            self.db.commit()
             return False
     
-    def cleanup_expired_prices(self) -> int:
+    async def _get_user(self, watchlist: Watchlist) -> User:
+        """Return the watchlist owner without triggering a lazy load."""
+        if "user" not in inspect(watchlist).unloaded:
+            return watchlist.user
+        return await self.db.get(User, watchlist.user_id)
+    
+    async def cleanup_expired_prices(self) -> int:
         """Clean up expired price cache entries."""
-        cutoff_time = datetime.utcnow()
-        
-        # Delete expired entries
-        statement = select(PriceCache).where(
-            PriceCache.expires_at.isnot(None),
-            PriceCache.expires_at < cutoff_time
-        )
-        
-        expired_caches = self.db.exec(statement).all()
-        count = len(expired_caches)
-        
-        for cache in expired_caches:
-            self.db.delete(cache)
-        
-        self.db.commit()
-        logger.info(f"Cleaned up {count} expired price cache entries")
-        
-        return count 
\ No newline at end of file
+        return await PriceCacheSweeper().sweep(self.db)
\ No newline at end of file
@@ -0,0 +1,226 @@
+"""Drop-percentage and new-low alert rules over rolling per-route price statistics."""
+
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+from app.core.config import settings
+from app.models.price_rule import RoutePriceStats, WatchlistRuleState
+from app.models.watchlist import Watchlist
+from app.services.offers import OfferBatch, OfferRecord
+from app.services.price_history import SeriesKey, pack_array, unpack_array
+import logging
+
+logger = logging.getLogger(__name__)
+
+DROP_RULE = "DROP"
+NEW_LOW_RULE = "NEW_LOW"
+
+
+def has_rules(watchlist: Watchlist) -> bool:
+    return bool(watchlist.drop_pct or watchlist.alert_on_new_low)
+
+
+def merge_hits(
+    hits: List[Tuple[Watchlist, OfferRecord]],
+    rule_hits: List[Tuple[Watchlist, OfferRecord]]
+) -> List[Tuple[Watchlist, OfferRecord]]:
+    """Add rule hits to target hits, skipping pairs already hit."""
+    seen = {(watchlist.id, offer.offer_id) for watchlist, offer in hits}
+    return hits + [
+        (watchlist, offer) for watchlist, offer in rule_hits
+        if (watchlist.id, offer.offer_id) not in seen
+    ]
+
+
+def rolling_min(stats: RoutePriceStats, today: date, window_days: int) -> Optional[float]:
+    """Lowest daily minimum over the window ending ``today``, or None without data."""
+    if stats.window_day is None:
+        return None
+    gap = max((today - stats.window_day).days, 0)
+    day_mins = unpack_array("I", stats.day_mins)
+    if gap >= window_days or len(day_mins) != window_days:
+        return None
+    # Slots after window_day still hold days that fell out of the window
+    cents = [
+        day_mins[(stats.window_day - timedelta(days=back)).toordinal() % window_days]
+        for back in range(window_days - gap)
+    ]
+    cents = [value for value in cents if value]
+    return min(cents) / 100 if cents else None
+
+
+def update_stats(stats: RoutePriceStats, price: float, today: date, alpha: float, window_days: int) -> None:
+    """Fold one fetch's per-passenger minimum into the EWMA and the daily minimum ring."""
+    stats.ewma = price if stats.ewma is None else alpha * price + (1 - alpha) * stats.ewma
+    stats.last_price = price
+    stats.samples += 1
+    
+    day_mins = unpack_array("I", stats.day_mins)
+    if stats.window_day is None or len(day_mins) != window_days or (today - stats.window_day).days >= window_days:
+        day_mins = array("I", [0]) * window_days
+        stats.window_day = today
+    elif today > stats.window_day:
+        # Clear the slots of the days skipped since the last fetch
+        for offset in range(1, (today - stats.window_day).days + 1):
+            day_mins[(stats.window_day + timedelta(days=offset)).toordinal() % window_days] = 0
+        stats.window_day = today
+    
+    slot = today.toordinal() % window_days
+    cents = int(round(price * 100))
+    day_mins[slot] = min(day_mins[slot], cents) if day_mins[slot] else cents
+    stats.day_mins = pack_array("I", day_mins)
+    stats.updated_at = datetime.utcnow()
+
+
+class PriceRuleEngine:
+    """Evaluates watchlists' ``drop_pct`` and ``alert_on_new_low`` rules per fetch.
+    
+    Each series keeps an EWMA of its per-passenger minimum and a ring of
+    daily minimums for the rolling low, both updated in constant time from
+    the fetch being evaluated, so rules never read price history. A drop
+    rule fires when the cheapest price is ``drop_pct`` under the EWMA, a
+    new-low rule when it beats the rolling minimum of the window. Both are
+    judged against the statistics before this fetch is folded in. After an
+    alert, a watchlist only fires again on that series below its last
+    alerted price by ``PRICE_RULES_REALERT_PCT``, until the price recovers
+    above the series' EWMA.
+    State lives in ``route_price_stats`` and ``watchlist_rule_state`` and is
+    written in the caller's transaction, so restarts resume where they left
+    off.
+    """
+    
+    def __init__(
+        self,
+        alpha: Optional[float] = None,
+        window_days: Optional[int] = None,
+        min_samples: Optional[int] = None,
+        realert_pct: Optional[float] = None
+    ):
+        self.alpha = alpha or settings.PRICE_RULES_EWMA_ALPHA
+        self.window_days = window_days or settings.PRICE_RULES_WINDOW_DAYS
+        self.min_samples = settings.PRICE_RULES_MIN_SAMPLES if min_samples is None else min_samples
+        self.realert_pct = settings.PRICE_RULES_REALERT_PCT if realert_pct is None else realert_pct
+    
+    async def load_stats(self, db: AsyncSession, key: SeriesKey) -> RoutePriceStats:
+        """Load a series' statistics for update, creating them on first use."""
+        statement = select(RoutePriceStats).where(
+            RoutePriceStats.origin == key.origin,
+            RoutePriceStats.destination == key.destination,
+            RoutePriceStats.departure_date == key.departure_date,
+            RoutePriceStats.pax == key.pax,
+            RoutePriceStats.cabin_class == key.cabin_class
+        ).with_for_update()
+        stats = (await db.execute(statement)).scalars().first()
+        if stats is not None:
+            return stats
+        
+        stats = RoutePriceStats(
+            origin=key.origin,
+            destination=key.destination,
+            departure_date=key.departure_date,
+            pax=key.pax,
+            cabin_class=key.cabin_class
+        )
+        try:
+            async with db.begin_nested():
+                db.add(stats)
+            return stats
+        except IntegrityError:
+            # Another worker created the row first
+            return (await db.execute(statement)).scalars().one()
+    
+    async def load_states(
+        self,
+        db: AsyncSession,
+        stats: RoutePriceStats,
+        watchlists: Sequence[Watchlist]
+    ) -> Dict[int, WatchlistRuleState]:
+        """Load the series' rule states of the given watchlists for update, creating missing ones."""
+        watchlist_ids = [watchlist.id for watchlist in watchlists]
+        statement = select(WatchlistRuleState).where(
+            WatchlistRuleState.stats_id == stats.id,
+            WatchlistRuleState.watchlist_id.in_(watchlist_ids)
+        ).with_for_update()
+        states = {state.watchlist_id: state for state in (await db.execute(statement)).scalars().all()}
+        missing = [
+            WatchlistRuleState(watchlist_id=watchlist_id, stats_id=stats.id)
+            for watchlist_id in watchlist_ids if watchlist_id not in states
+        ]
+        if not missing:
+            return states
+        
+        try:
+            async with db.begin_nested():
+                db.add_all(missing)
+            states.update((state.watchlist_id, state) for state in missing)
+            return states
+        except IntegrityError:
+            # Another worker created some of them first; load those and create the rest
+            return await self.load_states(db, stats, watchlists)
+    
+    def fired_rule(
+        self,
+        watchlist: Watchlist,
+        state: WatchlistRuleState,
+        price: float,
+        ewma: float,
+        low: Optional[float]
+    ) -> Optional[str]:
+        """The rule a per-passenger price fires for a watchlist, if any; updates its re-arm state."""
+        if state.last_alerted_price is not None and price > ewma:
+            state.last_alerted_price = None
+        if state.last_alerted_price is not None and price >= state.last_alerted_price * (1 - self.realert_pct / 100):
+            return None
+        
+        if watchlist.drop_pct and price <= ewma * (1 - watchlist.drop_pct / 100):
+            return DROP_RULE
+        if watchlist.alert_on_new_low and low is not None and price < low:
+            return NEW_LOW_RULE
+        return None
+    
+    async def evaluate(
+        self,
+        db: AsyncSession,
+        key: SeriesKey,
+        pax: int,
+        watchlists: Sequence[Watchlist],
+        batch: OfferBatch,
+        now: Optional[datetime] = None
+    ) -> List[Tuple[Watchlist, OfferRecord]]:
+        """Update a series' statistics with one fetch and return its rule hits.
+        
+        Hits pair each firing watchlist with the cheapest offer, ready to be
+        merged with target hits. Nothing is committed.
+        """
+        if not batch.prices:
+            return []
+        now = now or datetime.utcnow()
+        price = min(batch.prices) / max(pax, 1)
+        stats = await self.load_stats(db, key)
+        
+        hits = []
+        rule_watchlists = [watchlist for watchlist in watchlists if has_rules(watchlist)]
+        if rule_watchlists and batch.offers and stats.ewma is not None and stats.samples >= self.min_samples:
+            cheapest = min(batch.offers, key=lambda offer: offer.price)
+            low = rolling_min(stats, now.date(), self.window_days)
+            states = await self.load_states(db, stats, rule_watchlists)
+            for watchlist in rule_watchlists:
+                state = states[watchlist.id]
+                rule = self.fired_rule(watchlist, state, price, stats.ewma, low)
+                if rule is None:
+                    continue
+                state.last_alerted_price = price
+                state.last_alerted_at = now
+                state.last_rule = rule
+                hits.append((watchlist, cheapest))
+                logger.info(f"Watchlist {watchlist.id} {rule} rule fired at {price:.2f} (average {stats.ewma:.2f})")
+        
+        update_stats(stats, price, now.date(), self.alpha, self.window_days)
+        await db.flush()
+        return hits
+
+
+price_rules = PriceRuleEngine()
\ No newline at end of file
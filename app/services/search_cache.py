@@ -0,0 +1,136 @@
+"""Two-tier (in-process LRU + Redis) cache for flight search results."""
+
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Optional, Tuple
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """Size-bounded in-process cache with a TTL per entry."""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class SearchCache:
+    """Caches raw flight search response bodies by normalized search parameters.
+    
+    Lookups hit the process-local LRU first and then Redis, so any
+    watchlist, endpoint or worker asking for the same query within the TTL
+    skips the provider call. The TTL depends on the route and on how close
+    departure is, since near-term fares move faster. Redis errors are logged
+    and treated as misses.
+    """
+    
+    def __init__(self, max_entries: int, redis_client=None, key_prefix: str = "search:v2"):
+        self.local = LRUCache(max_entries)
+        self.redis = redis_client
+        self.key_prefix = key_prefix
+        self.stats = {"local_hits": 0, "remote_hits": 0, "misses": 0}
+    
+    def make_key(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: date,
+        return_date: Optional[date],
+        adults: int,
+        cabin_class: str
+    ) -> str:
+        """Build a cache key from normalized search parameters."""
+        return ":".join([
+            self.key_prefix,
+            origin.strip().upper(),
+            destination.strip().upper(),
+            departure_date.isoformat(),
+            return_date.isoformat() if return_date else "-",
+            str(int(adults)),
+            cabin_class.strip().upper()
+        ])
+    
+    def ttl_for(self, origin: str, destination: str, departure_date: date) -> int:
+        """TTL in seconds for a route, shorter as departure gets closer."""
+        route_ttl = settings.SEARCH_CACHE_ROUTE_TTLS.get(f"{origin.upper()}-{destination.upper()}")
+        if route_ttl:
+            return route_ttl
+        
+        days_out = (departure_date - date.today()).days
+        if days_out <= 7:
+            return settings.SEARCH_CACHE_TTL_NEAR_SECONDS
+        if days_out <= 30:
+            return settings.SEARCH_CACHE_TTL_MID_SECONDS
+        return settings.SEARCH_CACHE_TTL_FAR_SECONDS
+    
+    async def get(self, key: str) -> Optional[bytes]:
+        value = self.local.get(key)
+        if value is not None:
+            self.stats["local_hits"] += 1
+            return value
+        
+        if self.redis is not None:
+            try:
+                pipe = self.redis.pipeline()
+                pipe.get(key)
+                pipe.pttl(key)
+                raw, pttl = await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Search cache read failed: {str(e)}")
+                raw, pttl = None, None
+            
+            if raw is not None:
+                if pttl and pttl > 0:
+                    self.local.set(key, raw, pttl / 1000)
+                self.stats["remote_hits"] += 1
+                return raw
+        
+        self.stats["misses"] += 1
+        return None
+    
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self.local.set(key, value, ttl)
+        if self.redis is not None:
+            try:
+                await self.redis.set(key, value, ex=ttl)
+            except Exception as e:
+                logger.warning(f"Search cache write failed: {str(e)}")
+
+
+_search_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> SearchCache:
+    """Return the process-wide search cache."""
+    global _search_cache
+    if _search_cache is None:
+        redis_client = None
+        if settings.SEARCH_CACHE_BACKEND == "redis":
+            import redis.asyncio as redis
+            redis_client = redis.from_url(settings.REDIS_URL)
+        _search_cache = SearchCache(max_entries=settings.SEARCH_CACHE_MAX_ENTRIES, redis_client=redis_client)
+    return _search_cache
\ No newline at end of file
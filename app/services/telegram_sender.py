@@ -0,0 +1,261 @@
+"""Rate-limited Telegram delivery with a priority queue."""
+
+import asyncio
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+from app.core.config import settings
+from app.core.http import http_clients, TELEGRAM
+from app.core.rate_limit import TokenBucket
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Message priorities, lower is sent first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+PRIORITY_NAMES = {PRIORITY_HIGH: "high", PRIORITY_NORMAL: "normal", PRIORITY_LOW: "low"}
+
+# Idle per-chat buckets are pruned once this many are tracked
+MAX_TRACKED_CHATS = 10000
+
+
+class TelegramSendError(Exception):
+    """A Telegram message could not be delivered."""
+    
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+@dataclass
+class TelegramMessage:
+    """A queued sendMessage call and the future its caller awaits."""
+    chat_id: str
+    text: str
+    priority: int
+    future: asyncio.Future
+    sequence: int = 0
+    attempts: int = 0
+    deadline: float = float("inf")
+    options: Dict[str, Any] = field(default_factory=dict)
+
+
+class TelegramSender:
+    """Sends Telegram messages under global and per-chat token buckets.
+    
+    Callers ``await send(...)``; messages wait in a priority queue and a few
+    workers post them through the shared pooled client. A message whose chat
+    is out of tokens, or paused by a 429, is put back once the chat can send
+    again, so one busy chat never holds up the others. A 429's
+    ``retry_after`` pauses that chat; waits longer than
+    ``TELEGRAM_MAX_RETRY_AFTER`` are handed back to the caller as retryable
+    errors so the outbox reschedules them instead of holding a worker.
+    
+    A message also gives up, as retryable, once it would wait past
+    ``max_wait`` seconds from ``send``. The limit is kept under
+    ``NOTIFICATION_LEASE_SECONDS`` so the dispatcher never claims a row again
+    while it is still queued here.
+    """
+    
+    def __init__(
+        self,
+        global_rate: Optional[float] = None,
+        per_chat_rate: Optional[float] = None,
+        workers: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        max_retry_after: Optional[float] = None,
+        max_wait: Optional[float] = None
+    ):
+        self.global_bucket = TokenBucket(
+            rate=global_rate or settings.TELEGRAM_GLOBAL_RATE,
+            capacity=global_rate or settings.TELEGRAM_GLOBAL_RATE
+        )
+        self.per_chat_rate = per_chat_rate or settings.TELEGRAM_PER_CHAT_RATE
+        self.workers = workers or settings.TELEGRAM_SENDER_WORKERS
+        self.max_attempts = max_attempts or settings.TELEGRAM_MAX_ATTEMPTS
+        self.max_retry_after = max_retry_after or settings.TELEGRAM_MAX_RETRY_AFTER
+        self.max_wait = min(max_wait or settings.TELEGRAM_MAX_WAIT, settings.NOTIFICATION_LEASE_SECONDS / 2)
+        self.stats = {"sent": 0, "failed": 0, "rate_limited": 0, "deferred": 0, "expired": 0}
+        self._chat_buckets: Dict[str, TokenBucket] = {}
+        self._paused_until: Dict[str, float] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+        # Messages waiting on a timer to go back in the queue, by sequence
+        self._delayed: Dict[int, Tuple[asyncio.TimerHandle, TelegramMessage]] = {}
+        self._in_flight = 0
+        self._queued_by_priority = {priority: 0 for priority in PRIORITY_NAMES}
+    
+    def start(self) -> None:
+        """Start the worker tasks on the running loop (idempotent)."""
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+    
+    async def aclose(self) -> None:
+        """Stop the workers; messages still queued fail as retryable."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for handle, message in self._delayed.values():
+            handle.cancel()
+            if not message.future.done():
+                message.future.set_exception(TelegramSendError("Telegram sender stopped"))
+        self._delayed = {}
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, _, message = self._queue.get_nowait()
+                if not message.future.done():
+                    message.future.set_exception(TelegramSendError("Telegram sender stopped"))
+            self._queue = None
+        self._queued_by_priority = {priority: 0 for priority in PRIORITY_NAMES}
+    
+    async def send(self, chat_id: str, text: str, priority: int = PRIORITY_NORMAL, **options) -> None:
+        """Queue a message and wait until it is delivered or fails."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        message = TelegramMessage(
+            chat_id=str(chat_id),
+            text=text,
+            priority=min(max(priority, PRIORITY_HIGH), PRIORITY_LOW),
+            future=loop.create_future(),
+            sequence=next(self._sequence),
+            deadline=time.monotonic() + self.max_wait,
+            options=options
+        )
+        self._put(message)
+        await message.future
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth and delivery counters.
+        
+        ``queue_depth`` counts every message still waiting, including those
+        ``delayed`` until their chat may send again; ``deferred`` is the
+        lifetime count of such delays.
+        """
+        now = time.monotonic()
+        waiting = dict(self._queued_by_priority)
+        for _, message in self._delayed.values():
+            waiting[message.priority] += 1
+        return {
+            "queue_depth": sum(waiting.values()),
+            "queue_depth_by_priority": {
+                PRIORITY_NAMES[priority]: depth for priority, depth in waiting.items()
+            },
+            "delayed": len(self._delayed),
+            "in_flight": self._in_flight,
+            "paused_chats": sum(1 for until in self._paused_until.values() if until > now),
+            **self.stats
+        }
+    
+    def _put(self, message: TelegramMessage) -> None:
+        self._queued_by_priority[message.priority] = self._queued_by_priority.get(message.priority, 0) + 1
+        # Requeued messages keep their original sequence, so each chat stays in order
+        self._queue.put_nowait((message.priority, message.sequence, message))
+    
+    def _put_later(self, message: TelegramMessage, delay: float) -> None:
+        if time.monotonic() + delay > message.deadline:
+            # Waiting any longer would outlive the outbox lease, so let the outbox retry it
+            self.stats["expired"] += 1
+            message.future.set_exception(TelegramSendError(
+                f"Telegram chat {message.chat_id} cannot send within {self.max_wait:.0f}s"
+            ))
+            return
+        
+        self.stats["deferred"] += 1
+        
+        def requeue() -> None:
+            self._delayed.pop(message.sequence, None)
+            if self._queue is not None and not message.future.done():
+                self._put(message)
+        
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._delayed[message.sequence] = (handle, message)
+    
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= MAX_TRACKED_CHATS:
+                self._prune_chats()
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate=self.per_chat_rate, capacity=1)
+        return bucket
+    
+    def _prune_chats(self) -> None:
+        now = time.monotonic()
+        for chat_id in [chat_id for chat_id, bucket in self._chat_buckets.items() if bucket.delay_for() == 0]:
+            del self._chat_buckets[chat_id]
+        for chat_id in [chat_id for chat_id, until in self._paused_until.items() if until <= now]:
+            del self._paused_until[chat_id]
+    
+    async def _worker(self) -> None:
+        while True:
+            _, _, message = await self._queue.get()
+            self._queued_by_priority[message.priority] -= 1
+            self._in_flight += 1
+            try:
+                await self._process(message)
+            except Exception as e:
+                if not message.future.done():
+                    message.future.set_exception(TelegramSendError(f"Telegram send failed: {str(e)}"))
+            finally:
+                self._in_flight -= 1
+                self._queue.task_done()
+    
+    async def _process(self, message: TelegramMessage) -> None:
+        if message.future.done():
+            return
+        
+        # Chats that are paused or out of tokens go back in line without blocking a worker
+        bucket = self._chat_bucket(message.chat_id)
+        delay = max(self._paused_until.get(message.chat_id, 0.0) - time.monotonic(), 0.0)
+        if delay or not bucket.try_acquire():
+            self._put_later(message, delay or bucket.delay_for())
+            return
+        
+        await self.global_bucket.acquire()
+        message.attempts += 1
+        
+        client = http_clients.get(TELEGRAM)
+        try:
+            response = await client.post(
+                f"/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage",
+                json={"chat_id": message.chat_id, "text": message.text, **message.options}
+            )
+        except httpx.HTTPError as e:
+            self.stats["failed"] += 1
+            message.future.set_exception(TelegramSendError(f"Telegram request failed: {str(e)}"))
+            return
+        
+        if response.status_code == 200:
+            self.stats["sent"] += 1
+            message.future.set_result(None)
+            return
+        
+        if response.status_code == 429:
+            self.stats["rate_limited"] += 1
+            try:
+                retry_after = float(response.json().get("parameters", {}).get("retry_after", 1))
+            except ValueError:
+                retry_after = 1.0
+            self._paused_until[message.chat_id] = time.monotonic() + retry_after
+            logger.warning(f"Telegram rate limited chat {message.chat_id}, retry after {retry_after:.0f}s")
+            
+            if retry_after <= self.max_retry_after and message.attempts < self.max_attempts:
+                self._put_later(message, retry_after)
+                return
+        
+        self.stats["failed"] += 1
+        message.future.set_exception(TelegramSendError(
+            f"Telegram returned {response.status_code} - {response.text}",
+            retryable=response.status_code == 429 or response.status_code >= 500
+        ))
+
+
+telegram_sender = TelegramSender()
\ No newline at end of file
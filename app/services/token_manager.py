@@ -0,0 +1,284 @@
+"""Single-flight, cross-process cache for OAuth access tokens."""
+
+import asyncio
+import hashlib
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from contextlib import closing
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fetches a new token and returns (access_token, expires_in_seconds)
+TokenFetcher = Callable[[], Awaitable[Tuple[str, int]]]
+
+
+class CachedToken(NamedTuple):
+    """Access token plus its absolute expiry as a unix timestamp."""
+    access_token: str
+    expires_at: float
+
+
+class TokenBackend(ABC):
+    """Token storage shared between processes."""
+    
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CachedToken]:
+        """Return the shared token for ``key``, if there is one."""
+    
+    @abstractmethod
+    async def set(self, key: str, token: CachedToken) -> None:
+        """Publish a token to every process using the backend."""
+    
+    @abstractmethod
+    async def acquire_lock(self, key: str, ttl: float) -> bool:
+        """Try to take the cross-process refresh lock for ``key``."""
+    
+    @abstractmethod
+    async def release_lock(self, key: str) -> None:
+        """Release the refresh lock for ``key``."""
+
+
+class MemoryTokenBackend(TokenBackend):
+    """Process-local backend, used when no shared store is configured."""
+    
+    def __init__(self):
+        self._tokens: Dict[str, CachedToken] = {}
+        self._locks: Dict[str, float] = {}
+    
+    async def get(self, key: str) -> Optional[CachedToken]:
+        return self._tokens.get(key)
+    
+    async def set(self, key: str, token: CachedToken) -> None:
+        self._tokens[key] = token
+    
+    async def acquire_lock(self, key: str, ttl: float) -> bool:
+        now = time.time()
+        if self._locks.get(key, 0) > now:
+            return False
+        self._locks[key] = now + ttl
+        return True
+    
+    async def release_lock(self, key: str) -> None:
+        self._locks.pop(key, None)
+
+
+class RedisTokenBackend(TokenBackend):
+    """Redis backend shared by every worker pointing at the same instance."""
+    
+    def __init__(self, redis_client):
+        self.redis = redis_client
+    
+    async def get(self, key: str) -> Optional[CachedToken]:
+        values = await self.redis.hmget(f"token:{key}", "access_token", "expires_at")
+        if not values or values[0] is None or values[1] is None:
+            return None
+        access_token = values[0].decode() if isinstance(values[0], bytes) else values[0]
+        return CachedToken(access_token=access_token, expires_at=float(values[1]))
+    
+    async def set(self, key: str, token: CachedToken) -> None:
+        ttl = max(int(token.expires_at - time.time()), 1)
+        pipe = self.redis.pipeline()
+        pipe.hset(f"token:{key}", mapping={"access_token": token.access_token, "expires_at": token.expires_at})
+        pipe.expire(f"token:{key}", ttl)
+        await pipe.execute()
+    
+    async def acquire_lock(self, key: str, ttl: float) -> bool:
+        return bool(await self.redis.set(f"token-lock:{key}", "1", nx=True, px=int(ttl * 1000)))
+    
+    async def release_lock(self, key: str) -> None:
+        await self.redis.delete(f"token-lock:{key}")
+
+
+class SQLiteTokenBackend(TokenBackend):
+    """File-backed backend for tests and single-host deployments without Redis."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tokens ("
+                "key TEXT PRIMARY KEY, access_token TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS token_locks (key TEXT PRIMARY KEY, locked_until REAL NOT NULL)")
+    
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode, so callers only need to close the connection
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+    
+    def _get(self, key: str) -> Optional[CachedToken]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT access_token, expires_at FROM tokens WHERE key = ?", (key,)).fetchone()
+        return CachedToken(*row) if row else None
+    
+    def _set(self, key: str, token: CachedToken) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO tokens (key, access_token, expires_at) VALUES (?, ?, ?)",
+                (key, token.access_token, token.expires_at)
+            )
+    
+    def _acquire_lock(self, key: str, ttl: float) -> bool:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM token_locks WHERE key = ? AND locked_until < ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO token_locks (key, locked_until) VALUES (?, ?)",
+                (key, now + ttl)
+            )
+            return cursor.rowcount == 1
+    
+    def _release_lock(self, key: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM token_locks WHERE key = ?", (key,))
+    
+    async def get(self, key: str) -> Optional[CachedToken]:
+        return await asyncio.to_thread(self._get, key)
+    
+    async def set(self, key: str, token: CachedToken) -> None:
+        await asyncio.to_thread(self._set, key, token)
+    
+    async def acquire_lock(self, key: str, ttl: float) -> bool:
+        return await asyncio.to_thread(self._acquire_lock, key, ttl)
+    
+    async def release_lock(self, key: str) -> None:
+        await asyncio.to_thread(self._release_lock, key)
+
+
+class TokenManager:
+    """Hands out access tokens, refreshing them at most once at a time.
+    
+    Within a process an ``asyncio.Lock`` makes concurrent callers wait for a
+    single in-flight refresh. Across processes the backend holds the token and
+    a short refresh lock, so workers pick up a token another worker fetched
+    instead of requesting their own. Tokens close to expiry are refreshed in
+    the background while callers keep using the current one.
+    """
+    
+    def __init__(
+        self,
+        key: str,
+        fetch: TokenFetcher,
+        backend: TokenBackend,
+        expiry_margin: float = 60,
+        early_refresh: float = 300,
+        lock_ttl: float = 10
+    ):
+        self.key = key
+        self.fetch = fetch
+        self.backend = backend
+        self.expiry_margin = expiry_margin
+        self.early_refresh = early_refresh
+        self.lock_ttl = lock_ttl
+        self._token: Optional[CachedToken] = None
+        self._lock = asyncio.Lock()
+        self._background_refresh: Optional[asyncio.Task] = None
+        self.stats = {
+            "hits": 0,
+            "refreshes": 0,
+            "background_refreshes": 0,
+            "avoided_refreshes": 0
+        }
+    
+    def _is_usable(self, token: Optional[CachedToken], margin: float) -> bool:
+        return token is not None and token.expires_at - time.time() > margin
+    
+    async def get_token(self) -> str:
+        """Return a valid access token, refreshing it if needed."""
+        token = self._token
+        if self._is_usable(token, self.expiry_margin):
+            self.stats["hits"] += 1
+            if not self._is_usable(token, self.early_refresh):
+                self._schedule_background_refresh()
+            return token.access_token
+        
+        async with self._lock:
+            # Another coroutine may have refreshed while we waited for the lock
+            if self._is_usable(self._token, self.expiry_margin):
+                self.stats["avoided_refreshes"] += 1
+                return self._token.access_token
+            token = await self._refresh(self.expiry_margin)
+            return token.access_token
+    
+    def _schedule_background_refresh(self) -> None:
+        if self._background_refresh and not self._background_refresh.done():
+            return
+        self._background_refresh = asyncio.create_task(self._run_background_refresh())
+    
+    async def _run_background_refresh(self) -> None:
+        try:
+            async with self._lock:
+                if self._is_usable(self._token, self.early_refresh):
+                    return
+                self.stats["background_refreshes"] += 1
+                await self._refresh(self.early_refresh)
+        except Exception as e:
+            logger.warning(f"Background token refresh failed for {self.key}: {str(e)}")
+    
+    async def _refresh(self, margin: float) -> CachedToken:
+        """Refresh the token; the caller must hold ``self._lock``."""
+        shared = await self.backend.get(self.key)
+        if self._is_usable(shared, margin):
+            self.stats["avoided_refreshes"] += 1
+            self._token = shared
+            return shared
+        
+        locked = await self.backend.acquire_lock(self.key, self.lock_ttl)
+        if not locked:
+            # Another process is refreshing; wait for it to publish the token
+            deadline = time.monotonic() + self.lock_ttl
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+                shared = await self.backend.get(self.key)
+                if self._is_usable(shared, margin):
+                    self.stats["avoided_refreshes"] += 1
+                    self._token = shared
+                    return shared
+            logger.warning(f"Timed out waiting for shared token refresh for {self.key}, fetching directly")
+        
+        try:
+            access_token, expires_in = await self.fetch()
+            token = CachedToken(access_token=access_token, expires_at=time.time() + expires_in)
+            await self.backend.set(self.key, token)
+            self.stats["refreshes"] += 1
+            self._token = token
+            return token
+        finally:
+            if locked:
+                await self.backend.release_lock(self.key)
+
+
+_backend: Optional[TokenBackend] = None
+_managers: Dict[str, TokenManager] = {}
+
+
+def get_token_backend() -> TokenBackend:
+    """Build the token backend selected by ``TOKEN_CACHE_BACKEND``."""
+    global _backend
+    if _backend is None:
+        if settings.TOKEN_CACHE_BACKEND == "redis":
+            import redis.asyncio as redis
+            _backend = RedisTokenBackend(redis.from_url(settings.REDIS_URL))
+        elif settings.TOKEN_CACHE_BACKEND == "sqlite":
+            _backend = SQLiteTokenBackend(settings.TOKEN_CACHE_SQLITE_PATH)
+        else:
+            _backend = MemoryTokenBackend()
+    return _backend
+
+
+def get_token_manager(provider: str, client_id: str, fetch: TokenFetcher) -> TokenManager:
+    """Return the process-wide token manager for a provider credential."""
+    # Hash the client id so it never shows up as a plain key in the shared store
+    key = f"{provider}:{hashlib.sha256(client_id.encode()).hexdigest()[:16]}"
+    manager = _managers.get(key)
+    if manager is None:
+        manager = _managers[key] = TokenManager(
+            key=key,
+            fetch=fetch,
+            backend=get_token_backend(),
+            early_refresh=settings.TOKEN_EARLY_REFRESH_SECONDS
+        )
+    return manager
\ No newline at end of file
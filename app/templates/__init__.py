@@ -1 +1,41 @@
-"""Message templates for emails and notifications.""" 
\ No newline at end of file
+"""Message templates for emails and notifications."""
+
+from pathlib import Path
+from typing import Dict
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template, select_autoescape
+
+TEMPLATE_DIR = Path(__file__).parent
+
+TEMPLATE_NAMES = (
+    "alert_email_subject.txt.j2",
+    "alert_email.txt.j2",
+    "alert_email.html.j2",
+    "alert_telegram.md.j2",
+    "welcome_email.html.j2",
+)
+
+# Templates never change at runtime, so skip the per-render mtime check
+environment = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html.j2"]),
+    undefined=StrictUndefined,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False,
+    keep_trailing_newline=False
+)
+
+_templates: Dict[str, Template] = {}
+
+
+def load_templates() -> None:
+    """Compile every message template once (called at startup)."""
+    for name in TEMPLATE_NAMES:
+        _templates[name] = environment.get_template(name)
+
+
+def get_template(name: str) -> Template:
+    """Return a compiled template, loading the set on first use."""
+    if not _templates:
+        load_templates()
+    return _templates[name]
\ No newline at end of file
@@ -0,0 +1,268 @@
+"""Adaptive polling scheduler that spends a daily search budget by urgency."""
+
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Hashable, List, Optional, TypeVar
+from sqlalchemy import delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.models.route_schedule import RouteSchedule
+from app.workers.monitoring_engine import MonitoringEngine, RunReport
+from app.workers.run_planner import RouteGroup, RouteKey, plan_route_groups
+import logging
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+
+K = TypeVar("K", bound=Hashable)
+
+
+def urgency(
+    last_min_price: Optional[float],
+    price_target: float,
+    days_to_departure: int,
+    volatility: float,
+    gap_scale: Optional[float] = None,
+    departure_scale_days: Optional[float] = None,
+    volatility_scale: Optional[float] = None
+) -> float:
+    """Relative search priority of a route.
+    
+    1.0 for a route priced at or under its best target, departing today,
+    with steady prices. The weight halves as the price moves
+    ``gap_scale`` above the target or departure moves
+    ``departure_scale_days`` away, and doubles for every
+    ``volatility_scale`` of average price movement between checks.
+    A route that was never priced counts as being at target.
+    """
+    gap_scale = gap_scale or settings.SCHEDULER_TARGET_GAP_SCALE
+    departure_scale_days = departure_scale_days or settings.SCHEDULER_DEPARTURE_SCALE_DAYS
+    volatility_scale = volatility_scale or settings.SCHEDULER_VOLATILITY_SCALE
+    
+    gap = 0.0
+    if last_min_price is not None:
+        gap = max(last_min_price / price_target - 1, 0.0)
+    closeness = 1 / (1 + gap / gap_scale)
+    nearness = 1 / (1 + max(days_to_departure, 0) / departure_scale_days)
+    return closeness * nearness * (1 + volatility / volatility_scale)
+
+
+def allocate_checks(weights: Dict[K, float], budget: float, min_checks: float, max_checks: float) -> Dict[K, float]:
+    """Split a daily budget of searches across routes in proportion to their weights.
+    
+    Every route gets at least ``min_checks`` a day and at most
+    ``max_checks``; what a capped route cannot use is shared out among the
+    rest. If the floor alone exceeds the budget, every route gets the floor.
+    """
+    allocation = {key: min_checks for key in weights}
+    remaining = budget - min_checks * len(weights)
+    open_keys = [key for key, weight in weights.items() if weight > 0]
+    
+    while remaining > 1e-9 and open_keys:
+        total = sum(weights[key] for key in open_keys)
+        capped = []
+        spent = 0.0
+        for key in open_keys:
+            room = max_checks - allocation[key]
+            share = min(remaining * weights[key] / total, room)
+            allocation[key] += share
+            spent += share
+            if share >= room:
+                capped.append(key)
+        remaining -= spent
+        if not capped:
+            break
+        capped_keys = set(capped)
+        open_keys = [key for key in open_keys if key not in capped_keys]
+    
+    return allocation
+
+
+def update_volatility(volatility: float, last_price: Optional[float], price: float, alpha: Optional[float] = None) -> float:
+    """EWMA of the relative price move since the previous check."""
+    if not last_price:
+        return volatility
+    alpha = settings.SCHEDULER_VOLATILITY_ALPHA if alpha is None else alpha
+    return alpha * abs(price - last_price) / last_price + (1 - alpha) * volatility
+
+
+def schedule_key(schedule: RouteSchedule) -> RouteKey:
+    return RouteKey(
+        origin=schedule.origin,
+        destination=schedule.destination,
+        departure_date=schedule.departure_date,
+        pax=schedule.pax,
+        cabin_class=schedule.cabin_class
+    )
+
+
+class AdaptiveScheduler:
+    """In-process scheduler that searches each route when it is due.
+    
+    Every route group has a ``RouteSchedule`` row with its next check time.
+    Each tick runs the due groups through the ``MonitoringEngine``, most
+    overdue first and never more than what is left of
+    ``SCHEDULER_DAILY_BUDGET`` today, then spreads the daily budget over all
+    routes by ``urgency`` and sets every route's next check from its last
+    one. Routes close to target, departing soon or with moving prices are
+    polled up to every ``SCHEDULER_MIN_INTERVAL_SECONDS``; the rest fall back
+    towards ``SCHEDULER_MAX_INTERVAL_SECONDS``. New routes are due at once.
+    """
+    
+    def __init__(
+        self,
+        engine: Optional[MonitoringEngine] = None,
+        session_factory: Callable[[], AsyncSession] = async_session_factory,
+        daily_budget: Optional[int] = None,
+        min_interval_seconds: Optional[int] = None,
+        max_interval_seconds: Optional[int] = None
+    ):
+        self.engine = engine or MonitoringEngine(session_factory=session_factory)
+        self.session_factory = session_factory
+        self.daily_budget = daily_budget or settings.SCHEDULER_DAILY_BUDGET
+        self.min_interval_seconds = min_interval_seconds or settings.SCHEDULER_MIN_INTERVAL_SECONDS
+        self.max_interval_seconds = max_interval_seconds or settings.SCHEDULER_MAX_INTERVAL_SECONDS
+        self.stats = {"ticks": 0, "checks": 0, "requests": 0, "budget_deferred": 0}
+        self._budget_warned_on: Optional[date] = None
+    
+    async def sync_routes(self, db: AsyncSession, groups: List[RouteGroup], now: datetime) -> Dict[RouteKey, RouteSchedule]:
+        """Load schedule rows for the planned groups, adding new routes and dropping stale ones.
+        
+        Stale rows checked today are kept until tomorrow so their searches
+        still count against the budget.
+        """
+        result = await db.execute(select(RouteSchedule))
+        schedules: Dict[RouteKey, RouteSchedule] = {}
+        stale_ids = []
+        planned = {group.key for group in groups}
+        
+        for schedule in result.scalars().all():
+            key = schedule_key(schedule)
+            if key in planned:
+                schedules[key] = schedule
+            elif schedule.checked_on != now.date():
+                stale_ids.append(schedule.id)
+        
+        if stale_ids:
+            await db.execute(delete(RouteSchedule).where(RouteSchedule.id.in_(stale_ids)))
+        
+        for key in planned - schedules.keys():
+            schedule = RouteSchedule(
+                origin=key.origin,
+                destination=key.destination,
+                departure_date=key.departure_date,
+                pax=key.pax,
+                cabin_class=key.cabin_class,
+                next_check_at=now
+            )
+            db.add(schedule)
+            schedules[key] = schedule
+        
+        return schedules
+    
+    async def spent_today(self, db: AsyncSession, today: date) -> int:
+        """Upstream requests already made today, including routes since dropped from the plan."""
+        result = await db.execute(
+            select(func.coalesce(func.sum(RouteSchedule.checks_today), 0)).where(RouteSchedule.checked_on == today)
+        )
+        return int(result.scalar_one())
+    
+    def record_checks(self, schedules: Dict[RouteKey, RouteSchedule], report: RunReport, now: datetime) -> None:
+        """Store the outcome of each checked route.
+        
+        Only upstream requests count against the budget, so search cache
+        hits and pruned routes are free while flight-dates lookups are not.
+        A cached result is not a new price sample and leaves the volatility
+        alone.
+        """
+        today = now.date()
+        for key, price in report.checked_routes.items():
+            schedule = schedules.get(key)
+            if schedule is None:
+                continue
+            if schedule.checked_on != today:
+                schedule.checked_on = today
+                schedule.checks_today = 0
+            schedule.checks_today += report.upstream_requests.get(key, 0)
+            schedule.last_checked_at = now
+            if price is not None:
+                if key not in report.cached_routes:
+                    schedule.volatility = update_volatility(schedule.volatility, schedule.last_min_price, price)
+                schedule.last_min_price = price
+    
+    def reschedule(self, schedules: Dict[RouteKey, RouteSchedule], groups: List[RouteGroup], now: datetime) -> None:
+        """Spread the daily budget over all routes and set their next check."""
+        today = now.date()
+        weights = {
+            group.key: urgency(
+                schedules[group.key].last_min_price,
+                max(watchlist.price_target for watchlist in group.watchlists),
+                (group.key.departure_date - today).days,
+                schedules[group.key].volatility
+            )
+            for group in groups
+        }
+        checks = allocate_checks(
+            weights,
+            self.daily_budget,
+            SECONDS_PER_DAY / self.max_interval_seconds,
+            SECONDS_PER_DAY / self.min_interval_seconds
+        )
+        
+        for key, per_day in checks.items():
+            schedule = schedules[key]
+            schedule.interval_seconds = int(SECONDS_PER_DAY / per_day)
+            if schedule.last_checked_at is not None:
+                schedule.next_check_at = schedule.last_checked_at + timedelta(seconds=schedule.interval_seconds)
+    
+    async def tick(self) -> Optional[RunReport]:
+        """Run the routes that are due within today's budget and reschedule every route."""
+        self.stats["ticks"] += 1
+        watchlists = await self.engine.load_active_watchlists()
+        groups = plan_route_groups(watchlists)
+        report = None
+        
+        async with self.session_factory() as db:
+            now = datetime.utcnow()
+            remaining = max(self.daily_budget - await self.spent_today(db, now.date()), 0)
+            schedules = await self.sync_routes(db, groups, now)
+            # Don't hold a transaction open while the engine writes alerts
+            await db.commit()
+            
+            due = sorted(
+                (group for group in groups if schedules[group.key].next_check_at <= now),
+                key=lambda group: schedules[group.key].next_check_at
+            )
+            if len(due) > remaining:
+                self.stats["budget_deferred"] += len(due) - remaining
+                if self._budget_warned_on != now.date():
+                    self._budget_warned_on = now.date()
+                    logger.warning(f"Daily search budget reached, deferring {len(due) - remaining} due routes")
+                due = due[:remaining]
+            
+            if due:
+                report = await self.engine.run(groups=due)
+                self.stats["checks"] += len(report.checked_routes)
+                self.stats["requests"] += sum(report.upstream_requests.values())
+                self.record_checks(schedules, report, datetime.utcnow())
+            
+            self.reschedule(schedules, groups, now)
+            await db.commit()
+        
+        return report
+    
+    async def run_forever(self, tick_seconds: Optional[int] = None) -> None:
+        """Tick on a fixed interval until cancelled."""
+        tick_seconds = tick_seconds or settings.SCHEDULER_TICK_SECONDS
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Scheduler tick failed: {str(e)}")
+            await asyncio.sleep(tick_seconds)
+
+
+adaptive_scheduler = AdaptiveScheduler()
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""Celery application for the distributed monitoring pipeline.
+
+Run a worker for every queue with::
+    
+    celery -A app.workers.celery_app worker -Q monitoring.plan,monitoring.notify,monitoring.route.0,...
+
+or give each node a subset of the ``monitoring.route.N`` shards.
+"""
+
+import zlib
+from typing import List, Optional
+from celery import Celery
+from kombu import Queue
+from app.core.config import settings
+
+PLAN_QUEUE = "monitoring.plan"
+NOTIFY_QUEUE = "monitoring.notify"
+ROUTE_QUEUE_PREFIX = "monitoring.route"
+
+
+def route_queues(shards: Optional[int] = None) -> List[str]:
+    """Names of every route shard queue."""
+    shards = shards or settings.CELERY_ROUTE_SHARDS
+    return [f"{ROUTE_QUEUE_PREFIX}.{shard}" for shard in range(shards)]
+
+
+def route_queue(origin: str, destination: str, shards: Optional[int] = None) -> str:
+    """Shard queue for a route's fetch, match and persist tasks.
+    
+    Partitioned by origin and destination, so every date of a route lands on
+    the same shard and keeps the search cache and date grid entries of the
+    workers consuming it warm.
+    """
+    shards = shards or settings.CELERY_ROUTE_SHARDS
+    shard = zlib.crc32(f"{origin.upper()}-{destination.upper()}".encode()) % shards
+    return f"{ROUTE_QUEUE_PREFIX}.{shard}"
+
+
+celery_app = Celery(
+    "flighthunter",
+    broker=settings.CELERY_BROKER_URL or settings.REDIS_URL,
+    backend=settings.CELERY_RESULT_BACKEND or None,
+    include=["app.workers.pipeline"]
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_ignore_result=not settings.CELERY_RESULT_BACKEND,
+    task_default_queue=PLAN_QUEUE,
+    task_queues=[Queue(PLAN_QUEUE), Queue(NOTIFY_QUEUE), *(Queue(name) for name in route_queues())],
+    # Tasks mostly wait on Amadeus and the database: reserve one message at a
+    # time so long searches don't hold others back, and ack only once a task
+    # has finished so a crashed worker's tasks are redelivered. Every stage
+    # is safe to run twice.
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    broker_transport_options={"visibility_timeout": settings.CELERY_VISIBILITY_TIMEOUT},
+    broker_connection_retry_on_startup=True
+)
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""Flexible-date grid stage that prunes route groups before full searches."""
+
+from collections import defaultdict
+from datetime import date
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.services.flight_service import FlightService
+from app.services.price_rules import has_rules
+from app.services.search_cache import LRUCache
+import logging
+
+if TYPE_CHECKING:
+    from app.workers.run_planner import RouteGroup
+
+logger = logging.getLogger(__name__)
+
+# "origin:destination:departure" -> (indicative price or None,), shared by every run in the process
+indicative_price_cache = LRUCache(settings.DATE_GRID_CACHE_MAX_ENTRIES)
+
+
+def indicative_key(origin: str, destination: str, departure_date: date) -> str:
+    return ":".join([origin, destination, departure_date.isoformat()])
+
+
+class DateGridSearch:
+    """Uses indicative per-date prices to skip full searches that cannot hit.
+    
+    Flexible watchlists fan out into one route group per date in their
+    window. Before running those searches, the cheapest-date API is queried
+    once per route for the whole date span, and a date is only searched in
+    full if its indicative price could beat a member's ``price_target``.
+    Prices are one-way, like the full searches, so a date is never pruned on
+    the price of a different trip. Indicative prices are cached per (route,
+    departure) in a size-bounded LRU with a TTL, so overlapping windows from
+    different users share them.
+    
+    Dates with no indicative price are always searched, and so is each
+    watchlist's own ``date_from``, so exact-date monitoring is unchanged.
+    """
+    
+    def __init__(
+        self,
+        flight_service: FlightService,
+        ttl_seconds: Optional[int] = None,
+        price_slack: Optional[float] = None
+    ):
+        self.flight_service = flight_service
+        self.ttl_seconds = ttl_seconds or settings.DATE_GRID_TTL_SECONDS
+        self.price_slack = settings.DATE_GRID_PRICE_SLACK if price_slack is None else price_slack
+        self.stats = {"grid_requests": 0, "cached_dates": 0, "pruned_groups": 0}
+        # Upstream requests per route, charged to the route's first group for the scheduler budget
+        self.upstream_requests: Dict[Any, int] = {}
+    
+    async def indicative_prices(
+        self,
+        origin: str,
+        destination: str,
+        dates: Iterable[date]
+    ) -> Dict[date, Optional[float]]:
+        """Return the indicative price per departure date, fetching uncached dates in one call."""
+        prices: Dict[date, Optional[float]] = {}
+        missing: Set[date] = set()
+        
+        for departure_date in dates:
+            cached = indicative_price_cache.get(indicative_key(origin, destination, departure_date))
+            if cached is not None:
+                prices[departure_date] = cached[0]
+                self.stats["cached_dates"] += 1
+            else:
+                missing.add(departure_date)
+        
+        if missing:
+            self.stats["grid_requests"] += 1
+            try:
+                fetched = await self.flight_service.search_flight_dates(
+                    origin=origin,
+                    destination=destination,
+                    date_from=min(missing),
+                    date_to=max(missing)
+                )
+            except Exception as e:
+                logger.warning(f"Date grid lookup failed for {origin}-{destination}: {str(e)}")
+                fetched = {}
+            
+            for departure_date in missing | fetched.keys():
+                price = fetched.get(departure_date)
+                # Remember "no data" too, so the window is not re-queried every run
+                key = indicative_key(origin, destination, departure_date)
+                indicative_price_cache.set(key, (price,), self.ttl_seconds)
+                if departure_date in missing:
+                    prices[departure_date] = price
+        
+        return prices
+    
+    def _could_hit(self, group: "RouteGroup", prices: Dict[date, Optional[float]]) -> bool:
+        departure_date = group.key.departure_date
+        for watchlist in group.watchlists:
+            if watchlist.date_from == departure_date:
+                return True
+            # Drop and new-low rules judge every price, not just the target
+            if has_rules(watchlist):
+                return True
+            indicative_price = prices.get(departure_date)
+            if indicative_price is None:
+                return True
+            if indicative_price * group.key.pax <= watchlist.price_target * (1 + self.price_slack):
+                return True
+        return False
+    
+    async def filter_groups(self, groups: List["RouteGroup"]) -> List["RouteGroup"]:
+        """Drop flexible-date groups whose indicative price is above every target."""
+        by_route: Dict[Tuple[str, str], List["RouteGroup"]] = defaultdict(list)
+        kept: List["RouteGroup"] = []
+        
+        for group in groups:
+            # Groups made only of exact-date members are always searched
+            if all(watchlist.date_from == group.key.departure_date for watchlist in group.watchlists):
+                kept.append(group)
+            else:
+                by_route[(group.key.origin, group.key.destination)].append(group)
+        
+        for (origin, destination), route_groups in by_route.items():
+            requests_before = self.flight_service.stats["requests"]
+            prices = await self.indicative_prices(origin, destination, [group.key.departure_date for group in route_groups])
+            requests = self.flight_service.stats["requests"] - requests_before
+            if requests:
+                self.upstream_requests[route_groups[0].key] = requests
+            
+            for group in route_groups:
+                if self._could_hit(group, prices):
+                    kept.append(group)
+                else:
+                    self.stats["pruned_groups"] += 1
+        
+        if self.stats["pruned_groups"]:
+            logger.info(f"Date grid pruned {self.stats['pruned_groups']} of {len(groups)} route searches")
+        
+        return kept
\ No newline at end of file
@@ -0,0 +1,205 @@
+"""Concurrent monitoring engine that runs every active watchlist."""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.core.loop_lag import LoopLagMonitor
+from app.core.rate_limit import QuotaExceededError
+from app.models.watchlist import Watchlist
+from app.services.flight_service import FlightService
+from app.services.offers import OfferRecord
+from app.services.price_history import PricePoint, SeriesKey, price_history
+from app.services.price_monitoring_service import PriceMonitoringService
+from app.workers.date_grid import DateGridSearch
+from app.workers.run_planner import RouteGroup, RouteKey, RunPlanner, count_watchlists, plan_route_groups
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+@dataclass
+class RunReport:
+    """Throughput and latency figures for one monitoring run."""
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    duration_seconds: float = 0.0
+    watchlists: int = 0
+    route_groups: int = 0
+    pruned_searches: int = 0
+    searches: int = 0
+    failed_searches: int = 0
+    quota_skipped: int = 0
+    alerts_sent: int = 0
+    max_loop_lag: float = 0.0
+    latencies: List[float] = field(default_factory=list)
+    # Routes whose check finished (searched, failed or pruned), with their cheapest offer
+    checked_routes: Dict[RouteKey, Optional[float]] = field(default_factory=dict)
+    # Checked routes whose offers came from the search cache, not a new search
+    cached_routes: Set[RouteKey] = field(default_factory=set)
+    # Upstream requests sent per route, flight-dates lookups included
+    upstream_requests: Dict[RouteKey, int] = field(default_factory=dict)
+    # Price history points of every searched route, written once at the end of the run
+    price_points: List[Tuple[SeriesKey, PricePoint]] = field(default_factory=list)
+    
+    @property
+    def searches_per_second(self) -> float:
+        return self.searches / self.duration_seconds if self.duration_seconds else 0.0
+    
+    @property
+    def watchlists_per_second(self) -> float:
+        return self.watchlists / self.duration_seconds if self.duration_seconds else 0.0
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": round(self.duration_seconds, 3),
+            "watchlists": self.watchlists,
+            "route_groups": self.route_groups,
+            "pruned_searches": self.pruned_searches,
+            "searches": self.searches,
+            "failed_searches": self.failed_searches,
+            "quota_skipped": self.quota_skipped,
+            "alerts_sent": self.alerts_sent,
+            "upstream_requests": sum(self.upstream_requests.values()),
+            "cached_searches": len(self.cached_routes),
+            "searches_per_second": round(self.searches_per_second, 2),
+            "watchlists_per_second": round(self.watchlists_per_second, 2),
+            "latency_p50": round(_percentile(self.latencies, 50), 3),
+            "latency_p95": round(_percentile(self.latencies, 95), 3),
+            "latency_max": round(max(self.latencies, default=0.0), 3),
+            "max_loop_lag": round(self.max_loop_lag, 3)
+        }
+
+
+class MonitoringEngine:
+    """Runs route groups concurrently under a fixed concurrency cap.
+    
+    Provider rate limits are enforced by ``FlightService`` through the shared
+    limiter in ``app.core.rate_limit``, so the cap here only bounds how many
+    route groups are in flight at once. Every group gets its own
+    ``AsyncSession`` so database I/O never blocks the loop. Groups only
+    collect their hits; alerts are queued once after every group has run, one
+    digest per watchlist across all of its dates. The report includes the
+    worst event loop lag seen during the run.
+    """
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = async_session_factory,
+        concurrency: Optional[int] = None
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency or settings.MONITORING_CONCURRENCY
+    
+    async def load_active_watchlists(self) -> List[Watchlist]:
+        """Load all active watchlists with their users for alert delivery."""
+        async with self.session_factory() as db:
+            statement = select(Watchlist).where(Watchlist.is_active == True).options(
+                selectinload(Watchlist.user)
+            )
+            result = await db.execute(statement)
+            return list(result.scalars().all())
+    
+    async def run(
+        self,
+        watchlists: Optional[List[Watchlist]] = None,
+        groups: Optional[List[RouteGroup]] = None
+    ) -> RunReport:
+        """Monitor all active watchlists, or just the given route groups, and return the run report."""
+        report = RunReport()
+        started = time.perf_counter()
+        
+        if groups is None:
+            if watchlists is None:
+                watchlists = await self.load_active_watchlists()
+            groups = plan_route_groups(watchlists)
+        report.route_groups = len(groups)
+        report.watchlists = count_watchlists(groups)
+        
+        date_grid = DateGridSearch(FlightService())
+        planned = groups
+        groups = await date_grid.filter_groups(groups)
+        report.pruned_searches = date_grid.stats["pruned_groups"]
+        report.upstream_requests.update(date_grid.upstream_requests)
+        searched = {id(group) for group in groups}
+        for group in planned:
+            if id(group) not in searched:
+                report.checked_routes[group.key] = None
+        
+        # Hits of every group, alerted together so a flexible watchlist gets one digest
+        hits: List[Tuple[Watchlist, OfferRecord]] = []
+        semaphore = asyncio.Semaphore(self.concurrency)
+        quota_exhausted = asyncio.Event()
+        
+        async def run_group(group: RouteGroup) -> None:
+            async with semaphore:
+                if quota_exhausted.is_set():
+                    report.quota_skipped += 1
+                    return
+                
+                group_started = time.perf_counter()
+                try:
+                    async with self.session_factory() as db:
+                        planner = RunPlanner(PriceMonitoringService(db))
+                        try:
+                            await planner.run_group(group)
+                            hits.extend(planner.hits)
+                        finally:
+                            report.checked_routes.update(planner.cheapest)
+                            report.cached_routes |= planner.cached_routes
+                            report.price_points.extend(planner.price_points)
+                            requests = planner.flight_service.stats["requests"]
+                            report.upstream_requests[group.key] = report.upstream_requests.get(group.key, 0) + requests
+                    report.searches += 1
+                except QuotaExceededError as e:
+                    quota_exhausted.set()
+                    report.quota_skipped += 1
+                    logger.error(f"Stopping monitoring run: {str(e)}")
+                except Exception as e:
+                    report.failed_searches += 1
+                    report.checked_routes.setdefault(group.key, None)
+                    logger.error(f"Error monitoring route {group.key.origin}-{group.key.destination}: {str(e)}")
+                finally:
+                    report.latencies.append(time.perf_counter() - group_started)
+        
+        async with LoopLagMonitor() as lag_monitor:
+            await asyncio.gather(*(run_group(group) for group in groups))
+        report.max_loop_lag = lag_monitor.max_lag
+        
+        if hits:
+            try:
+                async with self.session_factory() as db:
+                    report.alerts_sent = await PriceMonitoringService(db).alert_hits(hits)
+            except Exception as e:
+                logger.error(f"Error queueing alerts: {str(e)}")
+        
+        if report.price_points:
+            try:
+                async with self.session_factory() as db:
+                    await price_history.record(db, report.price_points)
+                    await db.commit()
+            except Exception as e:
+                logger.error(f"Error recording price history: {str(e)}")
+        
+        if report.max_loop_lag > settings.MONITORING_MAX_LOOP_LAG:
+            logger.warning(
+                f"Event loop was blocked for {report.max_loop_lag * 1000:.0f} ms during the monitoring run"
+            )
+        
+        report.duration_seconds = time.perf_counter() - started
+        logger.info(f"Monitoring run report: {report.as_dict()}")
+        return report
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""Outbox dispatcher that delivers alert notifications off the monitoring path."""
+
+import asyncio
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.models.alert import Alert, AlertStatus
+from app.models.notification import NotificationOutbox, OutboxStatus
+from app.services.notification_service import DeliveryError, NotificationService
+from app.services.telegram_sender import PRIORITY_NORMAL
+import logging
+
+logger = logging.getLogger(__name__)
+
+# SendGrid accepts at most this many personalizations per request
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+
+class NotificationDispatcher:
+    """Delivers outbox rows with a pool of async workers.
+    
+    A worker claims a batch of due rows by giving them a lease (with
+    ``FOR UPDATE SKIP LOCKED`` where the database supports it), delivers
+    them, then deletes the delivered rows and marks their alerts SENT in one
+    transaction. Emails with identical content go out as one SendGrid request
+    with a personalization per recipient, and the sync SDK runs in a thread.
+    Failures are retried with exponential backoff and jitter up to
+    ``max_attempts``. Rows left in SENDING by a crashed worker are claimed
+    again once their lease expires, so delivery is at least once.
+    """
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = async_session_factory,
+        workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        lease_seconds: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        notification_service: Optional[NotificationService] = None
+    ):
+        self.session_factory = session_factory
+        self.workers = workers or settings.NOTIFICATION_WORKERS
+        self.batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+        self.lease_seconds = lease_seconds or settings.NOTIFICATION_LEASE_SECONDS
+        self.max_attempts = max_attempts or settings.NOTIFICATION_MAX_ATTEMPTS
+        self.notification_service = notification_service or NotificationService()
+        self.stats = {"claimed": 0, "delivered": 0, "retried": 0, "failed": 0, "email_requests": 0}
+        self._claim_lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+    
+    def wake(self) -> None:
+        """Tell idle workers that new rows were queued."""
+        self._wake.set()
+    
+    def retry_delay(self, attempts: int) -> float:
+        """Backoff in seconds before the next attempt, with jitter."""
+        delay = min(
+            settings.NOTIFICATION_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+            settings.NOTIFICATION_RETRY_MAX_SECONDS
+        )
+        return random.uniform(delay / 2, delay)
+    
+    async def claim(self) -> List[NotificationOutbox]:
+        """Lease a batch of due rows, including rows whose lease has expired."""
+        now = datetime.utcnow()
+        # Workers in this process take turns; other processes are kept apart by SKIP LOCKED
+        async with self._claim_lock:
+            async with self.session_factory() as db:
+                statement = select(NotificationOutbox).where(or_(
+                    and_(
+                        NotificationOutbox.status == OutboxStatus.PENDING,
+                        NotificationOutbox.next_attempt_at <= now
+                    ),
+                    and_(
+                        NotificationOutbox.status == OutboxStatus.SENDING,
+                        NotificationOutbox.locked_until < now
+                    )
+                )).order_by(NotificationOutbox.next_attempt_at).limit(self.batch_size).with_for_update(skip_locked=True)
+                
+                result = await db.execute(statement)
+                rows = list(result.scalars().all())
+                if not rows:
+                    await db.rollback()
+                    return []
+                
+                locked_until = now + timedelta(seconds=self.lease_seconds)
+                for row in rows:
+                    row.status = OutboxStatus.SENDING
+                    row.locked_until = locked_until
+                    row.attempts += 1
+                await db.commit()
+        
+        self.stats["claimed"] += len(rows)
+        return rows
+    
+    async def deliver(self, rows: List[NotificationOutbox]) -> Dict[int, Optional[Exception]]:
+        """Send claimed rows; returns the error per row id, or None if delivered."""
+        results: Dict[int, Optional[Exception]] = {}
+        emails: Dict[tuple, List[NotificationOutbox]] = defaultdict(list)
+        telegrams: List[NotificationOutbox] = []
+        
+        for row in rows:
+            if row.channel == "EMAIL":
+                emails[(row.payload["subject"], row.payload["html"], row.payload["plain"])].append(row)
+            elif row.channel == "TELEGRAM":
+                telegrams.append(row)
+            else:
+                results[row.id] = DeliveryError(f"Unknown alert channel: {row.channel}", retryable=False)
+        
+        async def send_email_group(group: List[NotificationOutbox]) -> None:
+            error = None
+            try:
+                await self.notification_service.deliver_email(
+                    group[0].payload,
+                    [(row.recipient, row.payload.get("substitutions", {})) for row in group]
+                )
+            except Exception as e:
+                error = e
+            self.stats["email_requests"] += 1
+            for row in group:
+                results[row.id] = error
+        
+        async def send_telegram(row: NotificationOutbox) -> None:
+            try:
+                await self.notification_service.deliver_telegram(
+                    row.recipient, row.payload["text"], row.payload.get("priority", PRIORITY_NORMAL)
+                )
+                results[row.id] = None
+            except Exception as e:
+                results[row.id] = e
+        
+        email_groups = [
+            group[start:start + SENDGRID_MAX_PERSONALIZATIONS]
+            for group in emails.values()
+            for start in range(0, len(group), SENDGRID_MAX_PERSONALIZATIONS)
+        ]
+        await asyncio.gather(
+            *(send_email_group(group) for group in email_groups),
+            *(send_telegram(row) for row in telegrams)
+        )
+        return results
+    
+    async def complete(self, rows: List[NotificationOutbox], results: Dict[int, Optional[Exception]]) -> None:
+        """Record delivery results: delete delivered rows, reschedule or fail the rest."""
+        now = datetime.utcnow()
+        delivered = [row for row in rows if results.get(row.id) is None]
+        
+        async with self.session_factory() as db:
+            if delivered:
+                await db.execute(
+                    update(Alert).where(Alert.id.in_([row.alert_id for row in delivered])).values(
+                        status=AlertStatus.SENT, sent_at=now
+                    )
+                )
+                await db.execute(
+                    delete(NotificationOutbox).where(NotificationOutbox.id.in_([row.id for row in delivered]))
+                )
+                self.stats["delivered"] += len(delivered)
+            
+            for row in rows:
+                error = results.get(row.id)
+                if error is None:
+                    continue
+                
+                if getattr(error, "retryable", True) and row.attempts < self.max_attempts:
+                    await db.execute(
+                        update(NotificationOutbox).where(NotificationOutbox.id == row.id).values(
+                            status=OutboxStatus.PENDING,
+                            next_attempt_at=now + timedelta(seconds=self.retry_delay(row.attempts)),
+                            locked_until=None,
+                            last_error=str(error)
+                        )
+                    )
+                    self.stats["retried"] += 1
+                    logger.warning(f"Notification {row.id} failed (attempt {row.attempts}), will retry: {str(error)}")
+                else:
+                    await db.execute(
+                        update(NotificationOutbox).where(NotificationOutbox.id == row.id).values(
+                            status=OutboxStatus.FAILED, locked_until=None, last_error=str(error)
+                        )
+                    )
+                    await db.execute(
+                        update(Alert).where(Alert.id == row.alert_id).values(
+                            status=AlertStatus.FAILED, error_message=str(error)
+                        )
+                    )
+                    self.stats["failed"] += 1
+                    logger.error(f"Notification {row.id} failed after {row.attempts} attempts: {str(error)}")
+            
+            await db.commit()
+    
+    async def run_once(self) -> int:
+        """Claim, deliver and complete one batch; returns the number of rows handled."""
+        rows = await self.claim()
+        if not rows:
+            return 0
+        results = await self.deliver(rows)
+        await self.complete(rows, results)
+        return len(rows)
+    
+    async def drain(self) -> int:
+        """Process batches until no row is due."""
+        total = 0
+        while True:
+            processed = await self.run_once()
+            if not processed:
+                return total
+            total += processed
+    
+    async def _worker(self, poll_interval: float) -> None:
+        while True:
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Notification dispatch failed: {str(e)}")
+                processed = 0
+            
+            if not processed:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+    
+    async def run_forever(self, poll_interval: Optional[float] = None) -> None:
+        """Run the worker pool until cancelled."""
+        poll_interval = poll_interval or settings.NOTIFICATION_POLL_INTERVAL_SECONDS
+        logger.info(f"Notification dispatcher started with {self.workers} workers")
+        await asyncio.gather(*(self._worker(poll_interval) for _ in range(self.workers)))
+
+
+notification_dispatcher = NotificationDispatcher()
\ No newline at end of file
@@ -0,0 +1,314 @@
+"""Celery tasks for the monitoring pipeline: plan, fetch, match, persist and notify.
+
+``plan_monitoring_run`` plans route groups like the in-process engine and
+starts one task chain per bundle of groups on the route's shard queue::
+    
+    fetch_route -> match_route -> persist_route -> notify_alerts
+
+A bundle is the date groups of one route that share a flexible watchlist
+(usually a single group), so each watchlist gets one digest per run covering
+all of its dates. Stages pass small JSON messages (route parameters,
+watchlist ids, compact offer records), never ORM objects, and each one is
+idempotent: fetching only
+appends a price history point and updates the route's rule statistics (a
+redelivery counts one extra sample, while a retry after an upstream error
+only repeats the routes that failed), matching only reads, and ``persist_route``
+re-checks recent alerts in its own transaction, so a redelivered task does not
+alert twice.
+"""
+
+import asyncio
+import dataclasses
+import os
+import threading
+from datetime import date
+from typing import Any, Coroutine, Dict, Iterable, List, Optional, Tuple, TypeVar
+import httpx
+from celery import chain
+from celery.result import AsyncResult
+from celery.signals import worker_process_init
+from celery.utils.time import get_exponential_backoff_interval
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from app.core.config import settings
+from app.core.database import async_engine, async_session_factory
+from app.core.rate_limit import QuotaExceededError
+from app.models.watchlist import Watchlist
+from app.services.flight_service import FlightService
+from app.services.offer_matcher import match_offers
+from app.services.offers import OfferRecord
+from app.services.price_history import price_history, summarize
+from app.services.price_rules import merge_hits, price_rules
+from app.services.price_monitoring_service import PriceMonitoringService
+from app.workers.celery_app import NOTIFY_QUEUE, celery_app, route_queue
+from app.workers.date_grid import DateGridSearch
+from app.workers.monitoring_engine import MonitoringEngine
+from app.workers.notification_dispatcher import notification_dispatcher
+from app.workers.run_planner import RouteGroup, RouteKey, group_max_price, plan_route_groups, series_key_for
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRY_OPTIONS = {
+    "retry_backoff": True,
+    "retry_jitter": True,
+    "retry_backoff_max": settings.CELERY_RETRY_BACKOFF_MAX,
+    "max_retries": settings.CELERY_TASK_MAX_RETRIES
+}
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_loop_lock = threading.Lock()
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine on this process's event loop thread and wait for it.
+    
+    One long-lived loop per worker process keeps pooled database connections,
+    HTTP clients and rate limiters valid across tasks. With a threads pool
+    every task thread shares it, so their I/O overlaps.
+    """
+    global _loop, _loop_pid
+    with _loop_lock:
+        if _loop is None or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name="pipeline-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _loop).result()
+
+
+@worker_process_init.connect
+def reset_connections(**kwargs) -> None:
+    """Drop database connections inherited from the parent process."""
+    async_engine.sync_engine.dispose(close=False)
+
+
+def route_message(group: RouteGroup) -> Dict[str, Any]:
+    """JSON message describing one route group."""
+    key = group.key
+    return {
+        "origin": key.origin,
+        "destination": key.destination,
+        "departure_date": key.departure_date.isoformat(),
+        "pax": key.pax,
+        "cabin_class": key.cabin_class,
+        "watchlist_ids": [watchlist.id for watchlist in group.watchlists],
+        "max_price": group_max_price(group.watchlists)
+    }
+
+
+def bundle_groups(groups: Iterable[RouteGroup]) -> List[List[RouteGroup]]:
+    """Join route groups that share a watchlist, so it is matched and alerted in one chain."""
+    bundles: List[List[RouteGroup]] = []
+    owner: Dict[int, int] = {}  # watchlist id -> bundle index
+    for group in groups:
+        joined = sorted({owner[watchlist.id] for watchlist in group.watchlists if watchlist.id in owner})
+        if joined:
+            index = joined[0]
+            for other in joined[1:]:
+                bundles[index].extend(bundles[other])
+                bundles[other] = []
+        else:
+            index = len(bundles)
+            bundles.append([])
+        bundles[index].append(group)
+        for bundled in bundles[index]:
+            for watchlist in bundled.watchlists:
+                owner[watchlist.id] = index
+    return [bundle for bundle in bundles if bundle]
+
+
+def offer_message(offer: OfferRecord) -> Dict[str, Any]:
+    return dataclasses.asdict(offer)
+
+
+async def load_watchlists(watchlist_ids: Iterable[int]) -> List[Watchlist]:
+    """Load active watchlists with their users."""
+    async with async_session_factory() as db:
+        statement = select(Watchlist).where(
+            Watchlist.id.in_(list(watchlist_ids)),
+            Watchlist.is_active == True
+        ).options(selectinload(Watchlist.user))
+        result = await db.execute(statement)
+        return list(result.scalars().all())
+
+
+async def plan_groups(route_keys: Optional[List[List[Any]]] = None) -> List[RouteGroup]:
+    """Plan route groups for all active watchlists and prune them with the date grid."""
+    groups = plan_route_groups(await MonitoringEngine().load_active_watchlists())
+    if route_keys is not None:
+        wanted = {
+            RouteKey(origin, destination, date.fromisoformat(departure_date), pax, cabin_class)
+            for origin, destination, departure_date, pax, cabin_class in route_keys
+        }
+        groups = [group for group in groups if group.key in wanted]
+    return await DateGridSearch(FlightService()).filter_groups(groups)
+
+
+def dispatch_routes(groups: List[RouteGroup]) -> AsyncResult:
+    """Start the fetch, match, persist and notify chain for a bundle of route groups."""
+    queue = route_queue(groups[0].key.origin, groups[0].key.destination)
+    return chain(
+        fetch_route.si({"routes": [route_message(group) for group in groups]}).set(queue=queue),
+        match_route.s().set(queue=queue),
+        persist_route.s().set(queue=queue),
+        notify_alerts.s().set(queue=NOTIFY_QUEUE)
+    ).apply_async()
+
+
+@celery_app.task(name="monitoring.plan")
+def plan_monitoring_run(route_keys: Optional[List[List[Any]]] = None) -> int:
+    """Plan a run, optionally limited to some route keys, and dispatch every route group."""
+    groups = run_async(plan_groups(route_keys))
+    bundles = bundle_groups(groups)
+    for bundle in bundles:
+        dispatch_routes(bundle)
+    logger.info(f"Dispatched {len(groups)} route groups in {len(bundles)} chains")
+    return len(groups)
+
+
+async def fetch_offers(route: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        batch = await FlightService().search_offers(
+            origin=route["origin"],
+            destination=route["destination"],
+            departure_date=date.fromisoformat(route["departure_date"]),
+            adults=route["pax"],
+            cabin_class=route["cabin_class"],
+            max_price=route["max_price"]
+        )
+    except QuotaExceededError as e:
+        logger.error(f"Skipping route {route['origin']}-{route['destination']}: {str(e)}")
+        return {**route, "cheapest": None, "offers": [], "rule_hits": []}
+    
+    point = summarize(batch.prices, route["pax"])
+    rule_hits = []
+    # A cached response was recorded and evaluated when it was fetched
+    if point is not None and not batch.cached:
+        key = series_key_for(RouteKey(
+            route["origin"], route["destination"], date.fromisoformat(route["departure_date"]),
+            route["pax"], route["cabin_class"]
+        ))
+        watchlists = await load_watchlists(route["watchlist_ids"])
+        offer_index = {id(offer): index for index, offer in enumerate(batch.offers)}
+        async with async_session_factory() as db:
+            await price_history.record(db, [(key, point)])
+            hits = await price_rules.evaluate(db, key, route["pax"], watchlists, batch)
+            await db.commit()
+        rule_hits = [[watchlist.id, offer_index[id(offer)]] for watchlist, offer in hits]
+    return {
+        **route,
+        "cheapest": min(batch.prices) if batch.prices else None,
+        "offers": [offer_message(offer) for offer in batch.offers],
+        "rule_hits": rule_hits
+    }
+
+
+async def fetch(bundle: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[httpx.HTTPError]]:
+    """Fetch the bundle's routes that have no offers yet.
+    
+    Returns the bundle with every fetched route and the first upstream error;
+    failed routes keep their request message, so a retry only repeats them.
+    """
+    routes = list(bundle["routes"])
+    pending = [index for index, route in enumerate(routes) if "offers" not in route]
+    results = await asyncio.gather(*(fetch_offers(routes[index]) for index in pending), return_exceptions=True)
+    error = None
+    for index, result in zip(pending, results):
+        if isinstance(result, httpx.HTTPError):
+            error = error or result
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            routes[index] = result
+    return {**bundle, "routes": routes}, error
+
+
+@celery_app.task(bind=True, name="monitoring.fetch", **RETRY_OPTIONS)
+def fetch_route(self, bundle: Dict[str, Any]) -> Dict[str, Any]:
+    """Search a bundle's routes and keep the offers at or under each one's highest target.
+    
+    An upstream error retries only the routes that failed, so the others do
+    not record a second history point or rule sample.
+    """
+    fetched, error = run_async(fetch(bundle))
+    if error is not None:
+        countdown = get_exponential_backoff_interval(
+            factor=1, retries=self.request.retries, maximum=settings.CELERY_RETRY_BACKOFF_MAX, full_jitter=True
+        )
+        raise self.retry(args=(fetched,), exc=error, countdown=countdown)
+    return fetched
+
+
+async def match(fetched: Dict[str, Any]) -> Dict[str, Any]:
+    watchlists = await load_watchlists({
+        watchlist_id for route in fetched["routes"] for watchlist_id in route["watchlist_ids"]
+    })
+    by_id = {watchlist.id: watchlist for watchlist in watchlists}
+    hits = []
+    for route in fetched["routes"]:
+        offers = [OfferRecord(**offer) for offer in route["offers"]]
+        route_watchlists = [by_id[watchlist_id] for watchlist_id in route["watchlist_ids"] if watchlist_id in by_id]
+        hits.extend(merge_hits(match_offers(route_watchlists, offers), [
+            (by_id[watchlist_id], offers[index])
+            for watchlist_id, index in route.get("rule_hits", []) if watchlist_id in by_id
+        ]))
+    routes = [{**route, "offers": []} for route in fetched["routes"]]
+    if not hits:
+        return {**fetched, "routes": routes, "digests": []}
+    
+    # One digest per watchlist across all of the bundle's dates
+    async with async_session_factory() as db:
+        digests = await PriceMonitoringService(db).fresh_digests(hits)
+    return {
+        **fetched,
+        "routes": routes,
+        "digests": [
+            [watchlist.id, [offer_message(offer) for offer in digest_offers]]
+            for watchlist, digest_offers in digests
+        ]
+    }
+
+
+@celery_app.task(name="monitoring.match", autoretry_for=(OperationalError,), **RETRY_OPTIONS)
+def match_route(fetched: Dict[str, Any]) -> Dict[str, Any]:
+    """Match fetched offers against the routes' watchlists and build fresh digests."""
+    if not any(route["offers"] for route in fetched["routes"]):
+        return {**fetched, "digests": []}
+    return run_async(match(fetched))
+
+
+async def persist(matched: Dict[str, Any]) -> int:
+    watchlists = {
+        watchlist.id: watchlist
+        for watchlist in await load_watchlists(watchlist_id for watchlist_id, _ in matched["digests"])
+    }
+    hits = [
+        (watchlists[watchlist_id], OfferRecord(**offer))
+        for watchlist_id, offers in matched["digests"] if watchlist_id in watchlists
+        for offer in offers
+    ]
+    
+    async with async_session_factory() as db:
+        monitoring_service = PriceMonitoringService(db)
+        # Re-check in this transaction, so a redelivered task finds its own alerts
+        return await monitoring_service.queue_digests(await monitoring_service.fresh_digests(hits))
+
+
+@celery_app.task(name="monitoring.persist", autoretry_for=(OperationalError,), **RETRY_OPTIONS)
+def persist_route(matched: Dict[str, Any]) -> int:
+    """Store digests and alerts and queue their notifications; returns the alerts queued."""
+    if not matched["digests"]:
+        return 0
+    return run_async(persist(matched))
+
+
+@celery_app.task(name="monitoring.notify")
+def notify_alerts(alerts_queued: int) -> int:
+    """Deliver due outbox notifications; returns the rows handled."""
+    if not alerts_queued:
+        return 0
+    return run_async(notification_dispatcher.drain())
\ No newline at end of file
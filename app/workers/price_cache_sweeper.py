@@ -0,0 +1,87 @@
+"""Chunked sweeper for expired price cache rows."""
+
+import asyncio
+from datetime import datetime
+from typing import Callable, Optional
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.models.alert import Alert, AlertOffer
+from app.models.price_cache import PriceCache, PriceCacheOffer
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PriceCacheSweeper:
+    """Deletes expired price cache rows in bounded, set-based chunks.
+    
+    Each chunk selects only primary keys through the ``expires_at`` index,
+    detaches referencing alerts and digest links, deletes the rows and their
+    offer payloads with one statement per table, then commits. Transactions
+    stay short and the payload blobs are never loaded.
+    """
+    
+    def __init__(self, chunk_size: Optional[int] = None, pause_seconds: float = 0.0):
+        self.chunk_size = chunk_size or settings.PRICE_CACHE_SWEEP_CHUNK_SIZE
+        self.pause_seconds = pause_seconds
+    
+    async def sweep_chunk(self, db: AsyncSession, cutoff_time: datetime) -> int:
+        """Delete up to ``chunk_size`` expired rows and commit."""
+        statement = select(PriceCache.id).where(
+            PriceCache.expires_at < cutoff_time
+        ).order_by(PriceCache.expires_at).limit(self.chunk_size).with_for_update(skip_locked=True)
+        
+        result = await db.execute(statement)
+        expired_ids = list(result.scalars().all())
+        if not expired_ids:
+            await db.rollback()
+            return 0
+        
+        # Keep alert history, just drop the links to the expired offers
+        await db.execute(
+            update(Alert).where(Alert.price_cache_id.in_(expired_ids)).values(price_cache_id=None)
+        )
+        await db.execute(delete(AlertOffer).where(AlertOffer.price_cache_id.in_(expired_ids)))
+        await db.execute(delete(PriceCacheOffer).where(PriceCacheOffer.price_cache_id.in_(expired_ids)))
+        await db.execute(delete(PriceCache).where(PriceCache.id.in_(expired_ids)))
+        await db.commit()
+        
+        return len(expired_ids)
+    
+    async def sweep(self, db: AsyncSession, max_chunks: Optional[int] = None) -> int:
+        """Delete all rows that were expired when the sweep started."""
+        cutoff_time = datetime.utcnow()
+        total = 0
+        chunks = 0
+        
+        while max_chunks is None or chunks < max_chunks:
+            deleted = await self.sweep_chunk(db, cutoff_time)
+            total += deleted
+            chunks += 1
+            if deleted < self.chunk_size:
+                break
+            if self.pause_seconds:
+                await asyncio.sleep(self.pause_seconds)
+        
+        logger.info(f"Cleaned up {total} expired price cache entries in {chunks} chunks")
+        return total
+    
+    async def run_forever(
+        self,
+        session_factory: Callable[[], AsyncSession] = async_session_factory,
+        interval_seconds: Optional[int] = None
+    ) -> None:
+        """Sweep on a fixed interval until cancelled."""
+        interval_seconds = interval_seconds or settings.PRICE_CACHE_SWEEP_INTERVAL_SECONDS
+        while True:
+            try:
+                async with session_factory() as db:
+                    await self.sweep(db)
+            except Exception as e:
+                logger.error(f"Price cache sweep failed: {str(e)}")
+            await asyncio.sleep(interval_seconds)
+
+
+price_cache_sweeper = PriceCacheSweeper()
\ No newline at end of file
@@ -0,0 +1,233 @@
+"""Route-level run planner for the price monitoring job."""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from app.models.watchlist import Watchlist
+from app.services.offer_pool import PriceTarget, offer_pool
+from app.services.offers import OfferBatch, OfferRecord
+from app.services.price_history import PricePoint, SeriesKey, price_history, summarize
+from app.services.price_monitoring_service import PriceMonitoringService
+from app.services.price_rules import has_rules, price_rules
+from app.workers.date_grid import DateGridSearch
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RouteKey(NamedTuple):
+    """Search parameters shared by every watchlist in a route group."""
+    origin: str
+    destination: str
+    departure_date: date
+    pax: int
+    cabin_class: str
+
+
+@dataclass
+class RouteGroup:
+    """Watchlists that can be served by a single flight search."""
+    key: RouteKey
+    watchlists: List[Watchlist] = field(default_factory=list)
+
+
+def route_key_for(watchlist: Watchlist, departure_date: Optional[date] = None) -> RouteKey:
+    """Build the route key used to group a watchlist."""
+    return RouteKey(
+        origin=watchlist.origin.upper(),
+        destination=watchlist.destination.upper(),
+        departure_date=departure_date or watchlist.date_from,
+        pax=watchlist.pax,
+        cabin_class=watchlist.cabin_class.value
+    )
+
+
+def departure_dates_for(watchlist: Watchlist, today: Optional[date] = None) -> List[date]:
+    """Departure dates covered by a watchlist: ``date_from`` +/- ``flex_days``.
+    
+    Dates already in the past are dropped.
+    """
+    today = today or datetime.utcnow().date()
+    flex_days = watchlist.flex_days or 0
+    candidates = [watchlist.date_from + timedelta(days=offset) for offset in range(-flex_days, flex_days + 1)]
+    return [candidate for candidate in candidates if candidate >= today]
+
+
+def route_keys_for(watchlist: Watchlist, today: Optional[date] = None) -> List[RouteKey]:
+    """Route keys for every departure date in a watchlist's flexible window."""
+    return [route_key_for(watchlist, departure_date) for departure_date in departure_dates_for(watchlist, today)]
+
+
+def plan_route_groups(watchlists: Iterable[Watchlist]) -> List[RouteGroup]:
+    """Group active watchlists by route so each route is searched once.
+    
+    A watchlist with ``flex_days`` joins one group per date in its window.
+    """
+    groups: Dict[RouteKey, RouteGroup] = {}
+    today = datetime.utcnow().date()
+    
+    for watchlist in watchlists:
+        if not watchlist.is_active:
+            continue
+        
+        for key in route_keys_for(watchlist, today):
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = RouteGroup(key=key)
+            group.watchlists.append(watchlist)
+    
+    return list(groups.values())
+
+
+def series_key_for(key: RouteKey) -> SeriesKey:
+    """Price history series of a route (prices are kept per passenger)."""
+    return SeriesKey(key.origin, key.destination, key.departure_date, key.pax, key.cabin_class)
+
+
+def group_max_price(watchlists: Iterable[Watchlist]) -> Optional[float]:
+    """Highest price worth keeping for a group; None keeps every offer for the price rules."""
+    watchlists = list(watchlists)
+    if any(has_rules(watchlist) for watchlist in watchlists):
+        return None
+    return max(watchlist.price_target for watchlist in watchlists)
+
+
+def count_watchlists(groups: Iterable[RouteGroup]) -> int:
+    """Count distinct watchlists across groups (flexible ones span several)."""
+    return len({id(watchlist) for group in groups for watchlist in group.watchlists})
+
+
+class RunPlanner:
+    """Runs one monitoring pass with a single search per route group.
+    
+    Groups only collect their hits; ``queue_alerts`` turns the hits of every
+    group into one digest per watchlist, so a flexible watchlist spread over
+    several date groups is alerted once.
+    """
+    
+    def __init__(self, monitoring_service: PriceMonitoringService):
+        self.monitoring_service = monitoring_service
+        self.flight_service = monitoring_service.flight_service
+        self.cheapest: Dict[RouteKey, Optional[float]] = {}
+        self.price_points: List[Tuple[SeriesKey, PricePoint]] = []
+        self.hits: List[Tuple[Watchlist, OfferRecord]] = []
+        # Routes answered from the search cache instead of a new upstream request
+        self.cached_routes: Set[RouteKey] = set()
+    
+    def record_prices(self, key: RouteKey, batch: OfferBatch) -> None:
+        """Keep a route's cheapest price and, for a new response, its price history point."""
+        self.cheapest[key] = min(batch.prices) if batch.prices else None
+        if batch.cached:
+            # Already recorded when it was fetched
+            self.cached_routes.add(key)
+            return
+        point = summarize(batch.prices, key.pax)
+        if point is not None:
+            self.price_points.append((series_key_for(key), point))
+    
+    async def run_group(self, group: RouteGroup) -> int:
+        """Search a route once and match the offers against its watchlists; returns the hits found."""
+        key = group.key
+        max_price = group_max_price(group.watchlists)
+        
+        if offer_pool.enabled:
+            return await self.run_group_in_pool(group, max_price)
+        
+        batch = await self.flight_service.search_offers(
+            origin=key.origin,
+            destination=key.destination,
+            departure_date=key.departure_date,
+            adults=key.pax,
+            cabin_class=key.cabin_class,
+            max_price=max_price
+        )
+        self.record_prices(key, batch)
+        
+        if not batch.prices:
+            logger.warning(f"No flight offers found for route {key.origin}-{key.destination} on {key.departure_date}")
+            return 0
+        
+        rule_hits = await self.evaluate_rules(group, batch)
+        watchlists = group.watchlists
+        if batch.offers:
+            # Only members whose target the cheapest offer reaches can hit
+            cheapest = min(offer.price for offer in batch.offers)
+            watchlists = [watchlist for watchlist in watchlists if watchlist.price_target >= cheapest]
+        
+        hits = self.monitoring_service.route_group_hits(watchlists, batch, rule_hits=rule_hits)
+        self.hits.extend(hits)
+        # Rule statistics are kept even when nothing is alerted
+        await self.monitoring_service.db.commit()
+        return len(hits)
+    
+    async def evaluate_rules(self, group: RouteGroup, batch: OfferBatch) -> List[Tuple[Watchlist, OfferRecord]]:
+        """Update the route's rule statistics and return its drop and new-low hits."""
+        if batch.cached:
+            # Already evaluated when it was fetched
+            return []
+        key = group.key
+        return await price_rules.evaluate(
+            self.monitoring_service.db, series_key_for(key), key.pax, group.watchlists, batch
+        )
+    
+    async def run_group_in_pool(self, group: RouteGroup, max_price: Optional[float]) -> int:
+        """Fetch a route and parse and match its offers in the offer process pool."""
+        key = group.key
+        raw, cached = await self.flight_service.fetch_offers(
+            key.origin, key.destination, key.departure_date, adults=key.pax, cabin_class=key.cabin_class
+        )
+        processed = await offer_pool.process(
+            raw, max_price, [PriceTarget(watchlist.id, watchlist.price_target) for watchlist in group.watchlists]
+        )
+        batch = processed.batch
+        batch.cached = cached
+        self.record_prices(key, batch)
+        
+        if not batch.prices:
+            logger.warning(f"No flight offers found for route {key.origin}-{key.destination} on {key.departure_date}")
+            return 0
+        
+        hits = [(group.watchlists[target], batch.offers[offer]) for target, offer in processed.hits]
+        rule_hits = await self.evaluate_rules(group, batch)
+        hits = self.monitoring_service.route_group_hits(group.watchlists, batch, hits, rule_hits)
+        self.hits.extend(hits)
+        await self.monitoring_service.db.commit()
+        return len(hits)
+    
+    async def queue_alerts(self) -> int:
+        """Queue one digest per watchlist for the hits collected so far."""
+        hits, self.hits = self.hits, []
+        return await self.monitoring_service.alert_hits(hits)
+    
+    async def run(self, watchlists: Iterable[Watchlist]) -> Dict[str, int]:
+        """Plan and execute a monitoring run over the given watchlists."""
+        groups = plan_route_groups(watchlists)
+        watchlist_count = count_watchlists(groups)
+        groups = await DateGridSearch(self.flight_service).filter_groups(groups)
+        
+        failed_groups = 0
+        for group in groups:
+            try:
+                await self.run_group(group)
+            except Exception as e:
+                failed_groups += 1
+                logger.error(f"Error monitoring route {group.key.origin}-{group.key.destination}: {str(e)}")
+        
+        alerts_sent = await self.queue_alerts()
+        
+        if self.price_points:
+            db = self.monitoring_service.db
+            await price_history.record(db, self.price_points)
+            await db.commit()
+        
+        logger.info(
+            f"Monitoring run finished: {watchlist_count} watchlists in {len(groups)} route groups, "
+            f"{alerts_sent} alerts sent"
+        )
+        
+        return {
+            "watchlists": watchlist_count,
+            "searches": len(groups),
+            "failed_searches": failed_groups,
+            "alerts_sent": alerts_sent
+        }
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""Benchmark the vectorized offer matcher against the per-offer loop.
+
+Usage: python -m benchmarks.match_offers [--offers 50] [--watchlists 1 10 100 1000]
+"""
+
+import argparse
+import random
+import timeit
+from types import SimpleNamespace
+from app.services.offer_matcher import match_offers_loop, match_offers_numpy
+from app.services.offers import OfferRecord
+
+
+def make_offers(count: int, rng: random.Random):
+    return [
+        OfferRecord(
+            offer_id=str(index),
+            price=round(rng.uniform(300, 3000), 2),
+            currency="BRL",
+            airlines="LA",
+            stops=rng.randint(0, 2),
+            duration="PT5H"
+        )
+        for index in range(count)
+    ]
+
+
+def make_watchlists(count: int, rng: random.Random):
+    return [SimpleNamespace(id=index, price_target=rng.uniform(500, 2500)) for index in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--offers", type=int, default=50)
+    parser.add_argument("--watchlists", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    offers = make_offers(args.offers, rng)
+    
+    print(f"{'watchlists':>10} {'pairs':>10} {'loop ms':>10} {'numpy ms':>10} {'speedup':>8}")
+    for watchlist_count in args.watchlists:
+        watchlists = make_watchlists(watchlist_count, rng)
+        assert match_offers_loop(watchlists, offers) == match_offers_numpy(watchlists, offers)
+        
+        number = max(1, 20000 // watchlist_count)
+        loop = min(timeit.repeat(lambda: match_offers_loop(watchlists, offers), number=number, repeat=5)) / number
+        vectorized = min(timeit.repeat(lambda: match_offers_numpy(watchlists, offers), number=number, repeat=5)) / number
+        print(
+            f"{watchlist_count:>10} {watchlist_count * len(offers):>10} "
+            f"{loop * 1000:>10.3f} {vectorized * 1000:>10.3f} {loop / vectorized:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark offer parsing and matching on the event loop against the process pool.
+
+Usage: python -m benchmarks.offer_pool [--responses 400] [--offers 50] [--watchlists 100] [--workers 1 2 4] [--batch-size 8]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from app.services.offer_pool import OfferProcessPool, PriceTarget
+from app.services.offers import dumps
+
+
+def make_offer(index: int, rng: random.Random):
+    """A flight offer shaped like an Amadeus flight-offers entry."""
+    price = round(rng.uniform(1500, 4000), 2)
+    segments = [
+        {
+            "departure": {"iataCode": "GRU", "terminal": "3", "at": "2026-11-10T22:10:00"},
+            "arrival": {"iataCode": "JFK", "terminal": "1", "at": "2026-11-11T07:40:00"},
+            "carrierCode": "LA",
+            "number": str(8000 + index),
+            "aircraft": {"code": "789"},
+            "operating": {"carrierCode": "LA"},
+            "duration": "PT10H30M",
+            "id": str(segment),
+            "numberOfStops": 0,
+            "blacklistedInEU": False
+        }
+        for segment in range(rng.randint(1, 3))
+    ]
+    return {
+        "type": "flight-offer",
+        "id": str(index),
+        "source": "GDS",
+        "oneWay": False,
+        "lastTicketingDate": "2026-11-01",
+        "numberOfBookableSeats": 9,
+        "itineraries": [{"duration": "PT10H30M", "segments": segments}],
+        "price": {"currency": "BRL", "total": f"{price:.2f}", "base": f"{price * 0.8:.2f}", "grandTotal": f"{price:.2f}"},
+        "pricingOptions": {"fareType": ["PUBLISHED"], "includedCheckedBagsOnly": False},
+        "validatingAirlineCodes": ["LA"],
+        "travelerPricings": [
+            {
+                "travelerId": "1",
+                "fareOption": "STANDARD",
+                "travelerType": "ADULT",
+                "price": {"currency": "BRL", "total": f"{price:.2f}", "base": f"{price * 0.8:.2f}"},
+                "fareDetailsBySegment": [
+                    {"segmentId": segment["id"], "cabin": "ECONOMY", "fareBasis": "SLBR0LS", "class": "S"}
+                    for segment in segments
+                ]
+            }
+        ]
+    }
+
+
+def make_jobs(responses: int, offers: int, watchlists: int, rng: random.Random):
+    targets = [PriceTarget(index, rng.uniform(2000, 3500)) for index in range(watchlists)]
+    max_price = max(target.price_target for target in targets)
+    return [
+        (dumps({"data": [make_offer(index, rng) for index in range(offers)]}), max_price, targets)
+        for _ in range(responses)
+    ]
+
+
+async def run(pool: OfferProcessPool, jobs) -> float:
+    """Process every response concurrently and return responses per second."""
+    started = time.perf_counter()
+    await asyncio.gather(*(pool.process(*job) for job in jobs))
+    return len(jobs) / (time.perf_counter() - started)
+
+
+async def benchmark(args) -> None:
+    jobs = make_jobs(args.responses, args.offers, args.watchlists, random.Random(args.seed))
+    print(f"{args.responses} responses x {args.offers} offers x {args.watchlists} watchlists, {os.cpu_count()} cores")
+    
+    inline = await run(OfferProcessPool(workers=0), jobs)
+    print(f"event loop: {inline:>8,.0f} responses/sec")
+    
+    for workers in args.workers:
+        pool = OfferProcessPool(workers=workers, batch_size=args.batch_size)
+        # Spawn the workers before timing
+        await run(pool, jobs[:workers * args.batch_size])
+        throughput = await run(pool, jobs)
+        pool.shutdown()
+        print(f"{workers:>3} workers: {throughput:>8,.0f} responses/sec ({throughput / inline:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--responses", type=int, default=400)
+    parser.add_argument("--offers", type=int, default=50)
+    parser.add_argument("--watchlists", type=int, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    args.workers = sorted(set(args.workers))
+    
+    asyncio.run(benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark price history writes per monitoring run and 90-day series reads.
+
+Fills a scratch SQLite database with a history of every route fetched every
+30 minutes, compacts it, then times a run's worth of appends and the
+"last 90 days for this route" query.
+
+Usage: python -m benchmarks.price_history [--routes 200] [--days 120] [--runs 10] [--reads 200]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "flighthunter_price_history_benchmark.db")
+os.environ.update({"DATABASE_URL": f"sqlite+aiosqlite:///{DB_PATH}", "DEBUG": "false"})
+
+from sqlmodel import SQLModel
+from app.core.database import async_engine, async_session_factory
+from app.services.price_history import PriceHistoryStore, SeriesKey, summarize
+
+AIRPORTS = ["GRU", "GIG", "BSB", "CNF", "POA", "REC", "SSA", "FOR"]
+FETCH_INTERVAL = timedelta(minutes=30)
+
+
+def make_keys(routes: int):
+    pairs = [(origin, destination) for origin in AIRPORTS for destination in AIRPORTS if origin != destination]
+    return [
+        SeriesKey(*pairs[index % len(pairs)], date(2027, 1, 1) + timedelta(days=index // len(pairs)), 1, "ECONOMY")
+        for index in range(routes)
+    ]
+
+
+def run_points(keys, at: datetime, rng: random.Random):
+    """One monitoring run: a summary per route."""
+    return [(key, summarize([rng.uniform(800, 3000) for _ in range(25)], 1, at=at)) for key in keys]
+
+
+async def fill(store: PriceHistoryStore, keys, start: datetime, end: datetime, rng: random.Random) -> None:
+    """Write the whole history a day at a time, compacting as it goes."""
+    day = start
+    while day < end:
+        points = []
+        at = day
+        while at < day + timedelta(days=1):
+            points.extend(run_points(keys, at, rng))
+            at += FETCH_INTERVAL
+        async with async_session_factory() as db:
+            await store.record(db, points)
+            await db.commit()
+            await store.compact(db, now=day)
+        day += timedelta(days=1)
+
+
+async def benchmark(args) -> None:
+    async with async_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.drop_all)
+        await conn.run_sync(SQLModel.metadata.create_all)
+    
+    rng = random.Random(args.seed)
+    store = PriceHistoryStore()
+    keys = make_keys(args.routes)
+    end = datetime(2026, 10, 1)
+    await fill(store, keys, end - timedelta(days=args.days), end, rng)
+    
+    write_times = []
+    for run in range(args.runs):
+        async with async_session_factory() as db:
+            started = time.perf_counter()
+            await store.record(db, run_points(keys, end + run * FETCH_INTERVAL, rng))
+            await db.commit()
+            write_times.append(time.perf_counter() - started)
+    
+    read_times = []
+    points = 0
+    async with async_session_factory() as db:
+        for _ in range(args.reads):
+            started = time.perf_counter()
+            series = await store.series(db, rng.choice(keys), end - timedelta(days=90), end)
+            read_times.append(time.perf_counter() - started)
+            points += len(series)
+    
+    write_ms = statistics.median(write_times) * 1000
+    print(f"{args.routes} routes, {args.days} days fetched every {FETCH_INTERVAL.seconds // 60} min, {os.path.getsize(DB_PATH) / 1e6:.1f} MB")
+    print(f"run write:  {write_ms:>7.1f} ms median ({write_ms / args.routes:.2f} ms per route)")
+    print(f"90-day read: {statistics.median(read_times) * 1000:>6.2f} ms median, p95 {sorted(read_times)[int(len(read_times) * 0.95)] * 1000:.2f} ms, {points // args.reads} points")
+    
+    os.remove(DB_PATH)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routes", type=int, default=200)
+    parser.add_argument("--days", type=int, default=120)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    asyncio.run(benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark alert rendering with and without offer fragment memoization.
+
+Usage: python -m benchmarks.render_alerts [--offers 20] [--recipients 50]
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+from app.services import alert_renderer
+from app.services.offers import OfferRecord
+from app.templates import load_templates
+
+
+def make_offers(count: int, rng: random.Random):
+    return [
+        OfferRecord(
+            offer_id=str(index),
+            price=round(rng.uniform(1500, 2500), 2),
+            currency="BRL",
+            airlines=rng.choice(["LA", "G3", "AD", "LA,DL"]),
+            stops=rng.randint(0, 2),
+            duration="PT10H30M"
+        )
+        for index in range(count)
+    ]
+
+
+def make_watchlist(rng: random.Random):
+    return SimpleNamespace(
+        origin="GRU",
+        destination="JFK",
+        date_from=date(2026, 11, 10),
+        date_to=date(2026, 11, 10) + timedelta(days=14),
+        pax=1,
+        price_target=float(rng.choice([2500, 2600, 2800, 3000]))
+    )
+
+
+def render_all(offers, watchlists) -> int:
+    renders = 0
+    for offer in offers:
+        for watchlist in watchlists:
+            alert_renderer.render_email_alert(watchlist, [offer])
+            alert_renderer.render_telegram_alert(watchlist, [offer])
+            renders += 2
+    return renders
+
+
+def clear_caches() -> None:
+    alert_renderer.offer_fragment.cache_clear()
+    alert_renderer.email_bodies.cache_clear()
+    alert_renderer.telegram_text.cache_clear()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--offers", type=int, default=20)
+    parser.add_argument("--recipients", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    offers = make_offers(args.offers, rng)
+    watchlists = [make_watchlist(rng) for _ in range(args.recipients)]
+    load_templates()
+    
+    # Uncached: every recipient renders its own copy of every template
+    started = time.perf_counter()
+    renders = 0
+    for offer in offers:
+        for watchlist in watchlists:
+            clear_caches()
+            renders += render_all([offer], [watchlist])
+    uncached = time.perf_counter() - started
+    
+    clear_caches()
+    started = time.perf_counter()
+    render_all(offers, watchlists)
+    memoized = time.perf_counter() - started
+    
+    print(f"{renders} messages ({args.offers} offers x {args.recipients} recipients x 2 channels)")
+    print(f"uncached: {renders / uncached:>10,.0f} renders/sec")
+    print(f"memoized: {renders / memoized:>10,.0f} renders/sec ({uncached / memoized:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Shared fixtures: a throwaway SQLite database and watchlist factories."""
+
+# ruff: noqa: E402 - the environment has to be set before app modules are imported
+import asyncio
+import os
+import time
+
+# Point the app's global engine at SQLite before any app module builds it
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite://"
+os.environ["AMADEUS_CLIENT_ID"] = ""
+os.environ["AMADEUS_CLIENT_SECRET"] = ""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Optional
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+import app.models  # noqa: F401 - registers every table
+from app.models.user import User
+from app.models.watchlist import AlertChannel, Watchlist
+from app.services import price_monitoring_service
+from app.services.fake_offers import flight_offers
+from app.services.offers import OfferBatch, dumps, parse_offers
+from app.workers import monitoring_engine
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """Session factory for a fresh file-backed SQLite database.
+    
+    A file (not ``:memory:``) so concurrent sessions get their own
+    connections, like they do against Postgres.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db(session_factory):
+    async with session_factory() as session:
+        yield session
+
+
+def departure_in(days: int) -> date:
+    return date.today() + timedelta(days=days)
+
+
+async def create_user(db: AsyncSession, email: str = "traveler@example.com") -> User:
+    user = User(email=email)
+    db.add(user)
+    await db.commit()
+    return user
+
+
+async def create_watchlist(db: AsyncSession, user: User, **fields: Any) -> Watchlist:
+    """Add a watchlist with sensible defaults, overridden by ``fields``."""
+    date_from = fields.pop("date_from", departure_in(40))
+    watchlist = Watchlist(
+        user_id=user.id,
+        origin=fields.pop("origin", "GRU"),
+        destination=fields.pop("destination", "JFK"),
+        date_from=date_from,
+        date_to=fields.pop("date_to", date_from + timedelta(days=10)),
+        price_target=fields.pop("price_target", 5000.0),
+        channel=fields.pop("channel", AlertChannel.EMAIL),
+        **fields
+    )
+    db.add(watchlist)
+    await db.commit()
+    watchlist.user = user
+    return watchlist
+
+
+class StubFlightService:
+    """Seeded offers after a short non-blocking wait; ``block_seconds`` holds the loop instead."""
+    
+    latency_seconds = 0.005
+    block_seconds = 0.0
+    
+    def __init__(self):
+        self.stats = {"requests": 0, "cache_hits": 0}
+    
+    async def search_offers(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: date,
+        return_date: Optional[date] = None,
+        adults: int = 1,
+        cabin_class: str = "ECONOMY",
+        max_price: Optional[float] = None
+    ) -> OfferBatch:
+        self.stats["requests"] += 1
+        await asyncio.sleep(self.latency_seconds)
+        if self.block_seconds:
+            time.sleep(self.block_seconds)
+        raw = dumps(flight_offers(0, origin, destination, departure_date, adults, cabin_class, count=20))
+        return parse_offers(raw, max_price)
+    
+    async def search_flight_dates(
+        self,
+        origin: str,
+        destination: str,
+        date_from: date,
+        date_to: date
+    ) -> Dict[date, float]:
+        return {}
+
+
+@pytest.fixture
+def stub_flights(monkeypatch):
+    """Replace the FlightService used by monitoring with ``StubFlightService``."""
+    monkeypatch.setattr(price_monitoring_service, "FlightService", StubFlightService)
+    monkeypatch.setattr(monitoring_engine, "FlightService", StubFlightService)
+    return StubFlightService
@@ -0,0 +1,57 @@
+"""Adaptive scheduler budget accounting."""
+
+from datetime import datetime
+
+import pytest
+
+from app.models.route_schedule import RouteSchedule
+from app.workers.adaptive_scheduler import AdaptiveScheduler
+from app.workers.monitoring_engine import MonitoringEngine, RunReport
+from app.workers.run_planner import RouteKey
+
+from tests.conftest import create_user, create_watchlist, departure_in
+
+
+def schedule_for(key: RouteKey) -> RouteSchedule:
+    return RouteSchedule(
+        origin=key.origin,
+        destination=key.destination,
+        departure_date=key.departure_date,
+        pax=key.pax,
+        cabin_class=key.cabin_class,
+        last_min_price=1000.0,
+        volatility=0.1
+    )
+
+
+def test_record_checks_counts_upstream_requests_only(session_factory):
+    searched, cached, pruned = (RouteKey("GRU", "JFK", departure_in(days), 1, "ECONOMY") for days in (40, 41, 42))
+    schedules = {key: schedule_for(key) for key in (searched, cached, pruned)}
+    report = RunReport(
+        checked_routes={searched: 1300.0, cached: 1000.0, pruned: None},
+        cached_routes={cached},
+        # The flight-dates lookup is charged to the first group of the route
+        upstream_requests={searched: 1, pruned: 1}
+    )
+    
+    AdaptiveScheduler(engine=object(), session_factory=session_factory).record_checks(schedules, report, datetime.utcnow())
+    
+    assert [schedules[key].checks_today for key in (searched, cached, pruned)] == [1, 0, 1]
+    assert schedules[searched].volatility > 0.1
+    # A cache hit is not a new sample, so the volatility does not decay
+    assert schedules[cached].volatility == pytest.approx(0.1)
+    assert schedules[searched].last_min_price == 1300.0
+
+
+@pytest.mark.asyncio
+async def test_run_report_counts_searches_made(session_factory, stub_flights):
+    async with session_factory() as db:
+        user = await create_user(db)
+        watchlists = [
+            await create_watchlist(db, user, destination=destination) for destination in ("JFK", "LIS", "MIA")
+        ]
+    
+    report = await MonitoringEngine(session_factory=session_factory).run(watchlists)
+    
+    assert sum(report.upstream_requests.values()) == 3
+    assert report.cached_routes == set()
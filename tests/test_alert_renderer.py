@@ -0,0 +1,65 @@
+"""Alert digest rendering."""
+
+from datetime import date
+from types import SimpleNamespace
+
+from app.services.alert_renderer import render_email_alert, render_telegram_alert
+from app.services.fake_offers import flight_offers
+from app.services.offers import OfferRecord, offer_record
+
+
+def flexible_watchlist() -> SimpleNamespace:
+    return SimpleNamespace(
+        origin="GRU",
+        destination="JFK",
+        date_from=date(2027, 3, 10),
+        date_to=date(2027, 3, 20),
+        flex_days=3,
+        pax=1,
+        price_target=3000.0
+    )
+
+
+def offer_on(departure_date: date, price: float = 2500.0) -> OfferRecord:
+    return OfferRecord(
+        offer_id="1",
+        price=price,
+        currency="BRL",
+        airlines="LA",
+        stops=0,
+        duration="PT10H0M",
+        departure_date=departure_date
+    )
+
+
+def test_offer_record_keeps_the_departure_date():
+    offer = flight_offers(0, "GRU", "JFK", date(2027, 3, 12), 1, "ECONOMY", count=1)["data"][0]
+    
+    assert offer_record(offer).departure_date == date(2027, 3, 12)
+
+
+def test_flexible_offer_renders_its_own_date_and_link():
+    text = render_telegram_alert(flexible_watchlist(), [offer_on(date(2027, 3, 12))])
+    
+    assert "Partida: 12 Mar 2027" in text
+    # Offers are one-way, so no return date is shown
+    assert "22 Mar 2027" not in text
+    assert "GRU%20to%20JFK%202027-03-12" in text
+    assert "2027-03-10" not in text
+
+
+def test_offers_from_different_dates_render_differently():
+    watchlist = flexible_watchlist()
+    early = render_email_alert(watchlist, [offer_on(date(2027, 3, 8))])
+    exact = render_email_alert(watchlist, [offer_on(date(2027, 3, 10))])
+    
+    assert "GRU%20to%20JFK%202027-03-08" in early["html"]
+    assert "GRU%20to%20JFK%202027-03-10" in exact["html"]
+    assert early["html"] != exact["html"]
+
+
+def test_offer_without_departure_date_falls_back_to_watchlist_date():
+    text = render_telegram_alert(flexible_watchlist(), [offer_on(None)])
+    
+    assert "Partida: 10 Mar 2027" in text
+    assert "20 Mar 2027" not in text
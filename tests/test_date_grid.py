@@ -0,0 +1,100 @@
+"""Flexible-date grid pruning and its indicative price cache."""
+
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+import pytest
+
+from app.models.watchlist import AlertChannel, Watchlist
+from app.services import search_cache
+from app.services.search_cache import LRUCache
+from app.workers import date_grid
+from app.workers.date_grid import DateGridSearch
+from app.workers.run_planner import plan_route_groups
+
+from tests.conftest import departure_in
+
+
+class StubDates:
+    """Flight-dates API returning ``price_for(departure)`` and recording calls."""
+    
+    def __init__(self, price_for):
+        self.price_for = price_for
+        self.calls: List[Tuple[date, date]] = []
+        self.stats = {"requests": 0, "cache_hits": 0}
+    
+    async def search_flight_dates(
+        self,
+        origin: str,
+        destination: str,
+        date_from: date,
+        date_to: date
+    ) -> Dict[date, float]:
+        self.calls.append((date_from, date_to))
+        self.stats["requests"] += 1
+        days = (date_to - date_from).days + 1
+        return {date_from + timedelta(days=offset): self.price_for(date_from + timedelta(days=offset)) for offset in range(days)}
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    cache = LRUCache(1000)
+    monkeypatch.setattr(date_grid, "indicative_price_cache", cache)
+    return cache
+
+
+def flexible_watchlist(watchlist_id: int, trip_days: int, price_target: float, flex_days: int = 2) -> Watchlist:
+    date_from = departure_in(40)
+    return Watchlist(
+        id=watchlist_id,
+        user_id=1,
+        origin="GRU",
+        destination="JFK",
+        date_from=date_from,
+        date_to=date_from + timedelta(days=trip_days),
+        flex_days=flex_days,
+        price_target=price_target,
+        channel=AlertChannel.EMAIL
+    )
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded(monkeypatch):
+    cache = LRUCache(4)
+    monkeypatch.setattr(date_grid, "indicative_price_cache", cache)
+    grid = DateGridSearch(StubDates(lambda departure: 100.0))
+    
+    await grid.indicative_prices("GRU", "JFK", [departure_in(offset) for offset in range(30, 40)])
+    
+    assert len(cache) == 4
+
+
+@pytest.mark.asyncio
+async def test_cached_prices_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(search_cache.time, "monotonic", lambda: now[0])
+    flights = StubDates(lambda departure: 100.0)
+    grid = DateGridSearch(flights, ttl_seconds=60)
+    dates = [departure_in(30), departure_in(31)]
+    
+    await grid.indicative_prices("GRU", "JFK", dates)
+    await grid.indicative_prices("GRU", "JFK", dates)
+    assert len(flights.calls) == 1
+    
+    now[0] += 61
+    await grid.indicative_prices("GRU", "JFK", dates)
+    assert len(flights.calls) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("one_way_price, kept_dates", [(500.0, 5), (5000.0, 1)])
+async def test_dates_are_judged_on_one_way_prices(one_way_price, kept_dates):
+    # Full searches are one-way, so a ten-day window is still priced one-way
+    flights = StubDates(lambda departure: one_way_price)
+    watchlist = flexible_watchlist(1, trip_days=10, price_target=1000.0)
+    
+    kept = await DateGridSearch(flights).filter_groups(plan_route_groups([watchlist]))
+    
+    assert flights.calls == [(watchlist.date_from - timedelta(days=2), watchlist.date_from + timedelta(days=2))]
+    assert len(kept) == kept_dates
+    assert watchlist.date_from in [group.key.departure_date for group in kept]
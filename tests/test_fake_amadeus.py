@@ -0,0 +1,170 @@
+"""Fake Amadeus API: tokens, deterministic bodies, injected faults and FlightService against it."""
+
+from datetime import timedelta
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+
+from app.core.config import settings
+from app.core.http import AMADEUS, http_clients
+from app.core.rate_limit import ProviderRateLimiter
+from app.fake_amadeus import FakeAmadeusConfig, create_app
+from app.services.fake_offers import offer_prices
+from app.services.flight_service import FlightService
+from app.services.search_cache import SearchCache
+
+from tests.conftest import departure_in
+
+CREDENTIALS = {"grant_type": "client_credentials", "client_id": "id", "client_secret": "secret"}
+
+
+def offer_params(**params):
+    return {
+        "originLocationCode": "GRU",
+        "destinationLocationCode": "JFK",
+        "departureDate": departure_in(40).isoformat(),
+        **params
+    }
+
+
+def fake_client(app: FastAPI) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://fake-amadeus")
+
+
+async def authorize(client: httpx.AsyncClient) -> None:
+    response = await client.post("/v1/security/oauth2/token", data=CREDENTIALS)
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+
+@pytest.mark.asyncio
+async def test_searches_need_a_valid_token():
+    async with fake_client(create_app(FakeAmadeusConfig())) as client:
+        rejected = await client.post("/v1/security/oauth2/token", data={**CREDENTIALS, "client_secret": ""})
+        assert rejected.status_code == 401
+        assert (await client.get("/v2/shopping/flight-offers", params=offer_params())).status_code == 401
+        
+        token = (await client.post("/v1/security/oauth2/token", data=CREDENTIALS)).json()
+        assert token["token_type"] == "Bearer"
+        assert token["expires_in"] == 1799
+        response = await client.get(
+            "/v2/shopping/flight-offers",
+            params=offer_params(),
+            headers={"Authorization": f"Bearer {token['access_token']}"}
+        )
+        assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_offers_are_deterministic_per_seed():
+    async with fake_client(create_app(FakeAmadeusConfig(seed=7))) as client, \
+            fake_client(create_app(FakeAmadeusConfig(seed=8))) as other:
+        await authorize(client)
+        await authorize(other)
+        
+        first = await client.get("/v2/shopping/flight-offers", params=offer_params(adults=2, max=10))
+        again = await client.get("/v2/shopping/flight-offers", params=offer_params(adults=2, max=10))
+        reseeded = await other.get("/v2/shopping/flight-offers", params=offer_params(adults=2, max=10))
+    
+    assert first.content == again.content
+    assert first.content != reseeded.content
+    offers = first.json()["data"]
+    assert len(offers) == 10
+    assert all(len(offer["travelerPricings"]) == 2 for offer in offers)
+    prices = offer_prices(7, "GRU", "JFK", departure_in(40), 2, "ECONOMY", 50, 0)
+    assert [float(offer["price"]["total"]) for offer in offers] == prices[:10]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("config, status_codes", [
+    (FakeAmadeusConfig(error_rate_429=1.0), {429}),
+    (FakeAmadeusConfig(error_rate_5xx=1.0), {500, 502, 503}),
+])
+async def test_injected_errors(config, status_codes):
+    app = create_app(config)
+    async with fake_client(app) as client:
+        await authorize(client)
+        responses = [await client.get("/v2/shopping/flight-offers", params=offer_params()) for _ in range(5)]
+    
+    assert {response.status_code for response in responses} <= status_codes
+    assert all(response.json()["errors"] for response in responses)
+    assert app.state.fake.stats["served"] == 0
+    assert app.state.fake.stats["throttled"] + app.state.fake.stats["server_errors"] == 5
+
+
+@pytest.mark.asyncio
+async def test_quota_exhaustion_rejects_every_later_search():
+    app = create_app(FakeAmadeusConfig(quota=2))
+    async with fake_client(app) as client:
+        await authorize(client)
+        codes = [(await client.get("/v2/shopping/flight-offers", params=offer_params())).status_code for _ in range(4)]
+        stats = (await client.get("/fake/stats")).json()
+    
+    assert codes == [200, 200, 429, 429]
+    assert stats["served"] == 2
+    assert stats["quota_exceeded"] == 2
+
+
+@pytest.mark.asyncio
+async def test_flight_dates_match_cheapest_offers():
+    departure = departure_in(40)
+    async with fake_client(create_app(FakeAmadeusConfig(seed=3))) as client:
+        await authorize(client)
+        params = {"origin": "GRU", "destination": "JFK", "departureDate": f"{departure},{departure + timedelta(days=2)}"}
+        one_way = (await client.get("/v1/shopping/flight-dates", params={**params, "oneWay": "true"})).json()["data"]
+        round_trip = (await client.get("/v1/shopping/flight-dates", params={**params, "oneWay": "false", "duration": "7"})).json()["data"]
+    
+    assert [item["departureDate"] for item in one_way] == [(departure + timedelta(days=day)).isoformat() for day in range(3)]
+    assert float(one_way[0]["price"]["total"]) == offer_prices(3, "GRU", "JFK", departure, 1, "ECONOMY", 50, 0)[0]
+    assert round_trip[0]["returnDate"] == (departure + timedelta(days=7)).isoformat()
+    inbound = offer_prices(3, "JFK", "GRU", departure + timedelta(days=7), 1, "ECONOMY", 50, 0)[0]
+    assert float(round_trip[0]["price"]["total"]) == pytest.approx(float(one_way[0]["price"]["total"]) + inbound)
+
+
+@pytest_asyncio.fixture
+async def fake_upstream(monkeypatch, request):
+    """Point FlightService's Amadeus client at a fake app configured by the test's parameter."""
+    app = create_app(getattr(request, "param", FakeAmadeusConfig()))
+    # A client id of its own, so no token issued by another fake is reused
+    monkeypatch.setattr(settings, "AMADEUS_CLIENT_ID", f"fake-{id(app)}")
+    monkeypatch.setattr(settings, "AMADEUS_CLIENT_SECRET", "secret")
+    async with fake_client(app) as client:
+        monkeypatch.setitem(http_clients._clients, AMADEUS, client)
+        yield app
+
+
+def flight_service() -> FlightService:
+    service = FlightService()
+    service.rate_limiter = ProviderRateLimiter("amadeus", tps=1000.0, burst=10)
+    service.search_cache = SearchCache(max_entries=16)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_flight_service_counts_upstream_requests(fake_upstream):
+    service = flight_service()
+    departure = departure_in(40)
+    
+    batch = await service.search_offers("GRU", "JFK", departure, adults=2)
+    cached = await service.search_offers("GRU", "JFK", departure, adults=2)
+    prices = await service.search_flight_dates("GRU", "JFK", departure, departure + timedelta(days=2))
+    
+    assert not batch.cached and cached.cached
+    assert cached.prices == batch.prices == offer_prices(0, "GRU", "JFK", departure, 2, "ECONOMY", 50, 0)
+    assert list(prices) == [departure + timedelta(days=day) for day in range(3)]
+    assert service.stats == {"requests": 2, "cache_hits": 1}
+    assert fake_upstream.state.fake.stats["tokens"] == 1
+    assert fake_upstream.state.fake.stats["searches"] == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fake_upstream", [FakeAmadeusConfig(error_rate_5xx=1.0)], indirect=True)
+async def test_flight_service_raises_upstream_errors(fake_upstream):
+    service = flight_service()
+    
+    with pytest.raises(httpx.HTTPStatusError):
+        await service.search_offers("GRU", "JFK", departure_in(40))
+    # Flight-dates prices are optional, so their failures degrade to no prices
+    assert await service.search_flight_dates("GRU", "JFK", departure_in(40), departure_in(42)) == {}
+    assert service.stats == {"requests": 2, "cache_hits": 0}
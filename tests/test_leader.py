@@ -0,0 +1,115 @@
+"""Leader lock around the background jobs."""
+
+import asyncio
+from typing import List
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.leader import LeaderLock
+
+
+class FakeConnection:
+    def __init__(self, healthy_checks: int):
+        self.healthy_checks = healthy_checks
+        self.released = False
+    
+    async def invalidate(self) -> None:
+        self.released = True
+    
+    async def close(self) -> None:
+        pass
+
+
+class FakeLeaderLock(LeaderLock):
+    """Postgres lock calls replaced: ``grants`` says whether each try succeeds."""
+    
+    def __init__(self, grants: List[bool], healthy_checks: int = 1):
+        super().__init__(create_async_engine("sqlite+aiosqlite://"), retry_seconds=0.01)
+        self.grants = list(grants)
+        self.healthy_checks = healthy_checks
+        self.connections: List[FakeConnection] = []
+    
+    @property
+    def supported(self) -> bool:
+        return True
+    
+    async def acquire(self):
+        if not self.grants or not self.grants.pop(0):
+            return None
+        self.connections.append(FakeConnection(self.healthy_checks))
+        return self.connections[-1]
+    
+    async def alive(self, conn: FakeConnection) -> bool:
+        conn.healthy_checks -= 1
+        return conn.healthy_checks >= 0
+
+
+class JobCounter:
+    def __init__(self):
+        self.started = 0
+        self.cancelled = 0
+    
+    async def job(self) -> None:
+        self.started += 1
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+    
+    def jobs(self):
+        return [self.job(), self.job()]
+
+
+async def run_for(lock: LeaderLock, counter: JobCounter, seconds: float) -> None:
+    task = asyncio.create_task(lock.run_forever(counter.jobs))
+    await asyncio.sleep(seconds)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_jobs_wait_for_the_lock():
+    lock = FakeLeaderLock([False, False, True], healthy_checks=100)
+    counter = JobCounter()
+    
+    task = asyncio.create_task(lock.run_forever(counter.jobs))
+    await asyncio.sleep(0.015)
+    assert counter.started == 0
+    assert not lock.is_leader
+    
+    await asyncio.sleep(0.05)
+    assert counter.started == 2
+    assert lock.is_leader
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    
+    assert counter.cancelled == 2
+    assert not lock.is_leader
+    assert lock.connections[0].released
+
+
+@pytest.mark.asyncio
+async def test_jobs_stop_when_the_lock_connection_is_lost():
+    lock = FakeLeaderLock([True, False], healthy_checks=1)
+    counter = JobCounter()
+    
+    await run_for(lock, counter, 0.1)
+    
+    # Started once, stopped when the connection died, never restarted without the lock
+    assert counter.started == 2
+    assert counter.cancelled == 2
+    assert lock.connections[0].released
+    assert not lock.is_leader
+
+
+@pytest.mark.asyncio
+async def test_single_process_databases_always_lead():
+    lock = LeaderLock(create_async_engine("sqlite+aiosqlite://"))
+    counter = JobCounter()
+    
+    await run_for(lock, counter, 0.01)
+    
+    assert counter.started == 2
+    assert counter.cancelled == 2
@@ -0,0 +1,73 @@
+"""Monitoring engine run under the event loop lag probe."""
+
+import pytest
+from sqlmodel import select
+
+from app.core.config import settings
+from app.models.alert import Alert
+from app.models.notification import NotificationOutbox
+from app.templates import load_templates
+from app.workers.monitoring_engine import MonitoringEngine, RunReport
+
+from tests.conftest import create_user, create_watchlist
+
+
+def assert_loop_not_blocked(report: RunReport) -> None:
+    threshold = settings.MONITORING_MAX_LOOP_LAG
+    assert report.max_loop_lag < threshold, (
+        f"event loop blocked for {report.max_loop_lag * 1000:.0f} ms (limit {threshold * 1000:.0f} ms)"
+    )
+
+
+async def monitored_run(session_factory) -> RunReport:
+    async with session_factory() as db:
+        user = await create_user(db)
+        watchlists = [
+            await create_watchlist(db, user, origin=origin, destination=destination, price_target=target)
+            for origin, destination, target in [
+                ("GRU", "JFK", 100000.0),
+                ("GRU", "LIS", 1.0),
+                ("GIG", "MIA", 100000.0),
+                ("BSB", "MAD", 1.0)
+            ]
+        ]
+    # Compile templates up front, as the app lifespan does
+    load_templates()
+    return await MonitoringEngine(session_factory=session_factory, concurrency=4).run(watchlists)
+
+
+@pytest.mark.asyncio
+async def test_engine_run_does_not_block_event_loop(session_factory, stub_flights):
+    report = await monitored_run(session_factory)
+    
+    assert report.searches == 4
+    assert report.failed_searches == 0
+    assert report.alerts_sent == 2
+    assert_loop_not_blocked(report)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_fails_loop_lag_check(session_factory, stub_flights, monkeypatch):
+    monkeypatch.setattr(stub_flights, "block_seconds", settings.MONITORING_MAX_LOOP_LAG * 1.5)
+    
+    report = await monitored_run(session_factory)
+    
+    assert report.searches == 4
+    with pytest.raises(AssertionError, match="event loop blocked"):
+        assert_loop_not_blocked(report)
+
+
+@pytest.mark.asyncio
+async def test_flexible_watchlist_gets_one_digest_per_run(session_factory, stub_flights):
+    async with session_factory() as db:
+        watchlist = await create_watchlist(db, await create_user(db), flex_days=2, price_target=100000.0)
+    load_templates()
+    
+    report = await MonitoringEngine(session_factory=session_factory, concurrency=5).run([watchlist])
+    
+    # Five date groups searched concurrently, one alert for the watchlist
+    assert report.searches == 5
+    assert report.alerts_sent == 1
+    async with session_factory() as db:
+        assert len((await db.execute(select(Alert))).scalars().all()) == 1
+        assert len((await db.execute(select(NotificationOutbox))).scalars().all()) == 1
@@ -0,0 +1,155 @@
+"""Outbox delivery: batching, retries and redelivery after a lost lease."""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytest
+import pytest_asyncio
+from sqlmodel import select
+
+from app.models.alert import Alert, AlertStatus
+from app.models.notification import NotificationOutbox, OutboxStatus
+from app.services.notification_service import DeliveryError
+from app.workers.notification_dispatcher import NotificationDispatcher
+
+from tests.conftest import create_user, create_watchlist
+
+
+class RecordingNotificationService:
+    """Records deliveries; ``failures`` are raised by the next calls in order."""
+    
+    def __init__(self, failures: Optional[List[Exception]] = None):
+        self.failures = list(failures or [])
+        self.emails: List[Tuple[Dict[str, Any], List[Tuple[str, Dict[str, str]]]]] = []
+        self.telegrams: List[Tuple[str, str]] = []
+    
+    def _maybe_fail(self) -> None:
+        if self.failures:
+            raise self.failures.pop(0)
+    
+    async def deliver_email(self, content: Dict[str, Any], recipients: List[Tuple[str, Dict[str, str]]]) -> None:
+        self._maybe_fail()
+        self.emails.append((content, recipients))
+    
+    async def deliver_telegram(self, chat_id: str, text: str, priority: int = 0) -> None:
+        self._maybe_fail()
+        self.telegrams.append((chat_id, text))
+
+
+async def queue_notification(db, watchlist, channel: str = "EMAIL", recipient: str = "traveler@example.com", **payload) -> NotificationOutbox:
+    alert = Alert(watchlist_id=watchlist.id, price=1000.0, channel=channel)
+    db.add(alert)
+    await db.flush()
+    if channel == "EMAIL":
+        payload = {"subject": "Price drop", "html": "<p>R$ 1000</p>", "plain": "R$ 1000", **payload}
+    else:
+        payload = {"text": "R$ 1000", **payload}
+    row = NotificationOutbox(alert_id=alert.id, channel=channel, recipient=recipient, payload=payload)
+    db.add(row)
+    await db.commit()
+    return row
+
+
+async def outbox_rows(session_factory) -> List[NotificationOutbox]:
+    async with session_factory() as db:
+        return list((await db.execute(select(NotificationOutbox))).scalars().all())
+
+
+async def alert_statuses(session_factory) -> List[AlertStatus]:
+    async with session_factory() as db:
+        return [alert.status for alert in (await db.execute(select(Alert).order_by(Alert.id))).scalars().all()]
+
+
+@pytest_asyncio.fixture
+async def watchlist(session_factory):
+    async with session_factory() as db:
+        return await create_watchlist(db, await create_user(db))
+
+
+def dispatcher_for(session_factory, service: RecordingNotificationService, **options) -> NotificationDispatcher:
+    return NotificationDispatcher(session_factory=session_factory, notification_service=service, **options)
+
+
+@pytest.mark.asyncio
+async def test_delivered_rows_are_removed_and_alerts_sent(session_factory, watchlist):
+    async with session_factory() as db:
+        await queue_notification(db, watchlist, recipient="a@example.com")
+        await queue_notification(db, watchlist, recipient="b@example.com")
+        await queue_notification(db, watchlist, channel="TELEGRAM", recipient="42")
+    service = RecordingNotificationService()
+    
+    handled = await dispatcher_for(session_factory, service).drain()
+    
+    assert handled == 3
+    # Identical emails share one SendGrid request
+    assert len(service.emails) == 1
+    assert sorted(recipient for recipient, _ in service.emails[0][1]) == ["a@example.com", "b@example.com"]
+    assert service.telegrams == [("42", "R$ 1000")]
+    assert await outbox_rows(session_factory) == []
+    assert await alert_statuses(session_factory) == [AlertStatus.SENT] * 3
+
+
+@pytest.mark.asyncio
+async def test_retryable_failure_is_rescheduled_then_failed(session_factory, watchlist):
+    async with session_factory() as db:
+        await queue_notification(db, watchlist)
+    service = RecordingNotificationService([DeliveryError("timeout"), DeliveryError("timeout")])
+    dispatcher = dispatcher_for(session_factory, service, max_attempts=2)
+    
+    assert await dispatcher.run_once() == 1
+    [row] = await outbox_rows(session_factory)
+    assert row.status == OutboxStatus.PENDING
+    assert row.attempts == 1
+    assert row.next_attempt_at > datetime.utcnow()
+    assert row.last_error == "timeout"
+    # Not due yet
+    assert await dispatcher.run_once() == 0
+    
+    async with session_factory() as db:
+        row = await db.get(NotificationOutbox, row.id)
+        row.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        await db.commit()
+    assert await dispatcher.run_once() == 1
+    
+    [row] = await outbox_rows(session_factory)
+    assert row.status == OutboxStatus.FAILED
+    assert await alert_statuses(session_factory) == [AlertStatus.FAILED]
+    assert dispatcher.stats["retried"] == 1
+    assert dispatcher.stats["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_permanent_failure_is_not_retried(session_factory, watchlist):
+    async with session_factory() as db:
+        await queue_notification(db, watchlist)
+    service = RecordingNotificationService([DeliveryError("SendGrid not configured", retryable=False)])
+    
+    await dispatcher_for(session_factory, service).run_once()
+    
+    [row] = await outbox_rows(session_factory)
+    assert row.status == OutboxStatus.FAILED
+    assert row.attempts == 1
+
+
+@pytest.mark.asyncio
+async def test_rows_of_a_crashed_worker_are_redelivered(session_factory, watchlist):
+    async with session_factory() as db:
+        await queue_notification(db, watchlist)
+    service = RecordingNotificationService()
+    crashed = dispatcher_for(session_factory, service)
+    survivor = dispatcher_for(session_factory, service)
+    
+    # The first worker claims the row and dies before completing it
+    [claimed] = await crashed.claim()
+    assert claimed.status == OutboxStatus.SENDING
+    assert await survivor.claim() == []
+    
+    async with session_factory() as db:
+        row = await db.get(NotificationOutbox, claimed.id)
+        row.locked_until = datetime.utcnow() - timedelta(seconds=1)
+        await db.commit()
+    
+    assert await survivor.drain() == 1
+    assert len(service.emails) == 1
+    assert await outbox_rows(session_factory) == []
+    assert await alert_statuses(session_factory) == [AlertStatus.SENT]
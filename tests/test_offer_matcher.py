@@ -0,0 +1,70 @@
+"""Vectorised and scalar offer matchers must agree."""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import offer_matcher
+from app.services.offer_matcher import match_offers, match_offers_loop, match_offers_numpy
+from app.services.offers import OfferRecord
+
+pytest.importorskip("numpy")
+
+
+def make_offers(rng: random.Random, count: int, id_pool: int) -> list:
+    # Drawing ids from a small pool repeats offer ids, as multi-fare responses do
+    return [
+        OfferRecord(
+            offer_id=str(rng.randrange(id_pool)),
+            price=round(rng.uniform(500, 3000), 2),
+            currency="BRL",
+            airlines="LA",
+            stops=0,
+            duration="PT10H0M"
+        )
+        for _ in range(count)
+    ]
+
+
+def make_watchlists(rng: random.Random, count: int) -> list:
+    return [SimpleNamespace(id=index, price_target=float(rng.randrange(400, 3200, 50))) for index in range(count)]
+
+
+def as_ids(hits) -> list:
+    return [(id(watchlist), id(offer)) for watchlist, offer in hits]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_numpy_matcher_matches_loop(seed):
+    rng = random.Random(seed)
+    watchlists = make_watchlists(rng, rng.randint(1, 60))
+    offers = make_offers(rng, rng.randint(1, 120), id_pool=rng.choice([5, 40, 1000]))
+    
+    assert as_ids(match_offers_numpy(watchlists, offers)) == as_ids(match_offers_loop(watchlists, offers))
+
+
+def test_boundary_prices_and_duplicate_ids():
+    watchlists = [SimpleNamespace(id=1, price_target=1000.0), SimpleNamespace(id=2, price_target=999.99)]
+    offers = [
+        OfferRecord("a", 1000.0, "BRL", "LA", 0, "PT1H"),
+        OfferRecord("a", 900.0, "BRL", "LA", 0, "PT1H"),
+        OfferRecord("b", 999.99, "BRL", "LA", 0, "PT1H")
+    ]
+    
+    expected = [(watchlists[0], offers[0]), (watchlists[0], offers[2]), (watchlists[1], offers[1]), (watchlists[1], offers[2])]
+    assert as_ids(match_offers_numpy(watchlists, offers)) == as_ids(expected)
+    assert as_ids(match_offers_loop(watchlists, offers)) == as_ids(expected)
+
+
+def test_large_groups_take_the_numpy_path(monkeypatch):
+    rng = random.Random(1)
+    watchlists = make_watchlists(rng, 20)
+    offers = make_offers(rng, offer_matcher.VECTORIZE_MIN_PAIRS, id_pool=1000)
+    calls = []
+    monkeypatch.setattr(offer_matcher, "match_offers_numpy", lambda *args: calls.append(args) or [])
+    
+    match_offers(watchlists, offers)
+    match_offers(watchlists[:1], offers[:10])
+    
+    assert len(calls) == 1
@@ -0,0 +1,62 @@
+"""Offer process pool batching and shutdown."""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import offer_pool as offer_pool_module
+from app.services.fake_offers import flight_offers
+from app.services.offer_pool import OfferProcessPool, PriceTarget
+from app.services.offers import dumps
+
+from tests.conftest import departure_in
+
+
+def response_body() -> bytes:
+    return dumps(flight_offers(0, "GRU", "JFK", departure_in(40), count=10))
+
+
+@pytest.mark.asyncio
+async def test_pool_matches_like_inline_processing():
+    targets = [PriceTarget(1, 100000.0), PriceTarget(2, 1.0)]
+    inline = await OfferProcessPool(workers=0).process(response_body(), None, targets)
+    pool = OfferProcessPool(workers=1, batch_size=2)
+    # A thread stands in for the spawned worker; the batching and delivery are the same
+    pool._executor = ThreadPoolExecutor(1)
+    try:
+        pooled = await asyncio.gather(*(pool.process(response_body(), None, targets) for _ in range(2)))
+    finally:
+        pool.shutdown()
+    
+    assert pool.stats["batches"] == 1
+    for processed in pooled:
+        assert processed.hits == inline.hits
+        assert processed.batch.prices == inline.batch.prices
+
+
+@pytest.mark.asyncio
+async def test_shutdown_cancels_queued_batches(monkeypatch):
+    release = threading.Event()
+    process_responses = offer_pool_module.process_responses
+    
+    def blocking_process_responses(jobs):
+        release.wait(5)
+        return process_responses(jobs)
+    
+    monkeypatch.setattr(offer_pool_module, "process_responses", blocking_process_responses)
+    pool = OfferProcessPool(workers=1, batch_size=1)
+    pool._executor = ThreadPoolExecutor(1)
+    targets = [PriceTarget(1, 100000.0)]
+    # The first batch holds the only worker, so the second one is still queued at shutdown
+    running = asyncio.ensure_future(pool.process(response_body(), None, targets))
+    queued = asyncio.ensure_future(pool.process(response_body(), None, targets))
+    await asyncio.sleep(0.05)
+    
+    pool.shutdown()
+    release.set()
+    
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(queued, timeout=2)
+    assert (await asyncio.wait_for(running, timeout=2)).batch.prices
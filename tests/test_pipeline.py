@@ -0,0 +1,67 @@
+"""Planning of the Celery monitoring pipeline."""
+
+from datetime import timedelta
+
+import httpx
+
+from app.models.watchlist import Watchlist
+from app.workers import pipeline
+from app.workers.pipeline import bundle_groups, fetch_route, route_message
+from app.workers.run_planner import plan_route_groups
+
+from tests.conftest import departure_in
+
+
+def watchlist(watchlist_id: int, days: int, flex_days: int = 0, destination: str = "JFK") -> Watchlist:
+    date_from = departure_in(days)
+    return Watchlist(
+        id=watchlist_id,
+        user_id=1,
+        origin="GRU",
+        destination=destination,
+        date_from=date_from,
+        date_to=date_from + timedelta(days=10),
+        flex_days=flex_days,
+        price_target=5000.0
+    )
+
+
+def test_groups_sharing_a_flexible_watchlist_are_bundled():
+    groups = plan_route_groups([
+        watchlist(1, 40, flex_days=1),  # 39, 40, 41
+        watchlist(2, 42, flex_days=1),  # 41, 42, 43 - joined through day 41
+        watchlist(3, 60),
+        watchlist(4, 40, destination="LIS")
+    ])
+    
+    bundles = bundle_groups(groups)
+    
+    assert sorted(len(bundle) for bundle in bundles) == [1, 1, 5]
+    assert sum(len(bundle) for bundle in bundles) == len(groups)
+    for bundle in bundles:
+        assert len({(group.key.origin, group.key.destination) for group in bundle}) == 1
+
+
+def test_bundles_merge_when_a_group_joins_two():
+    # 1 and 2 only meet through 3, which is planned last
+    groups = plan_route_groups([watchlist(1, 40), watchlist(2, 44), watchlist(3, 42, flex_days=2)])
+    
+    assert [len(bundle) for bundle in bundle_groups(groups)] == [5]
+
+
+def test_fetch_retries_only_the_routes_that_failed(monkeypatch):
+    groups = plan_route_groups([watchlist(1, 40, flex_days=1)])
+    failing = groups[1].key.departure_date.isoformat()
+    calls = []
+    
+    async def fetch_offers(route):
+        calls.append(route["departure_date"])
+        if route["departure_date"] == failing and calls.count(failing) == 1:
+            raise httpx.ConnectError("upstream down")
+        return {**route, "cheapest": 1000.0, "offers": [], "rule_hits": []}
+    
+    monkeypatch.setattr(pipeline, "fetch_offers", fetch_offers)
+    fetch_route.apply(args=({"routes": [route_message(group) for group in groups]},))
+    
+    # Routes fetched before the error are not searched, recorded or evaluated again
+    assert sorted(calls) == sorted([group.key.departure_date.isoformat() for group in groups] + [failing])
@@ -0,0 +1,108 @@
+"""Chunked price cache sweeps."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func
+from sqlmodel import select
+
+from app.main import background_jobs
+from app.models.alert import Alert, AlertOffer
+from app.models.price_cache import PriceCache, PriceCacheOffer
+from app.workers.price_cache_sweeper import PriceCacheSweeper, price_cache_sweeper
+
+from tests.conftest import create_user, create_watchlist
+
+
+async def add_cached_offer(db, watchlist, expires_in: timedelta) -> PriceCache:
+    row = PriceCache(
+        watchlist_id=watchlist.id,
+        offer_id="1",
+        price=1000.0,
+        airlines="LA",
+        duration="10h",
+        expires_at=datetime.utcnow() + expires_in
+    )
+    db.add(row)
+    await db.flush()
+    db.add(PriceCacheOffer(price_cache_id=row.id, payload=b"offer"))
+    return row
+
+
+async def count(db, model) -> int:
+    return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_sweep_deletes_expired_rows_in_chunks(db):
+    watchlist = await create_watchlist(db, await create_user(db))
+    expired = [await add_cached_offer(db, watchlist, timedelta(hours=-1)) for _ in range(5)]
+    fresh = await add_cached_offer(db, watchlist, timedelta(hours=1))
+    alert = Alert(watchlist_id=watchlist.id, price_cache_id=expired[0].id, price=1000.0, channel="EMAIL")
+    db.add(alert)
+    await db.flush()
+    db.add(AlertOffer(alert_id=alert.id, price_cache_id=expired[0].id))
+    db.add(AlertOffer(alert_id=alert.id, price_cache_id=fresh.id, rank=1))
+    await db.commit()
+    
+    deleted = await PriceCacheSweeper(chunk_size=2).sweep(db)
+    
+    assert deleted == 5
+    remaining = (await db.execute(select(PriceCache.id))).scalars().all()
+    assert remaining == [fresh.id]
+    assert await count(db, PriceCacheOffer) == 1
+    # The alert survives without its expired offer
+    await db.refresh(alert)
+    assert alert.price_cache_id is None
+    links = (await db.execute(select(AlertOffer.price_cache_id))).scalars().all()
+    assert links == [fresh.id]
+
+
+@pytest.mark.asyncio
+async def test_sweep_stops_after_max_chunks(db):
+    watchlist = await create_watchlist(db, await create_user(db))
+    for _ in range(5):
+        await add_cached_offer(db, watchlist, timedelta(hours=-1))
+    await db.commit()
+    sweeper = PriceCacheSweeper(chunk_size=2)
+    
+    assert await sweeper.sweep(db, max_chunks=1) == 2
+    assert await count(db, PriceCache) == 3
+    assert await sweeper.sweep(db) == 3
+    assert await count(db, PriceCache) == 0
+
+
+
+def test_sweeper_is_a_background_job():
+    jobs = background_jobs()
+    names = [job.__qualname__ for job in jobs]
+    for job in jobs:
+        job.close()
+    
+    assert "PriceCacheSweeper.run_forever" in names
+
+
+@pytest.mark.asyncio
+async def test_run_forever_sweeps_on_its_interval(session_factory):
+    async with session_factory() as db:
+        watchlist = await create_watchlist(db, await create_user(db))
+    
+    task = asyncio.create_task(price_cache_sweeper.run_forever(session_factory, interval_seconds=0.01))
+    try:
+        # Rows that expire while it runs go on a later sweep
+        for _ in range(2):
+            async with session_factory() as db:
+                await add_cached_offer(db, watchlist, timedelta(hours=-1))
+                await db.commit()
+            for _ in range(100):
+                async with session_factory() as db:
+                    if not await count(db, PriceCache):
+                        break
+                await asyncio.sleep(0.01)
+            async with session_factory() as db:
+                assert await count(db, PriceCache) == 0
+                assert await count(db, PriceCacheOffer) == 0
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,59 @@
+"""Price history series and the points recorded by a run."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.offers import OfferBatch
+from app.services.price_history import PriceHistoryStore, PricePoint, SeriesKey, summarize
+from app.services.price_monitoring_service import PriceMonitoringService
+from app.workers.run_planner import RouteKey, RunPlanner
+
+from tests.conftest import departure_in
+
+
+def route(pax: int) -> RouteKey:
+    return RouteKey("GRU", "JFK", departure_in(40), pax, "ECONOMY")
+
+
+@pytest.mark.asyncio
+async def test_party_sizes_keep_separate_series(db):
+    store = PriceHistoryStore()
+    at = datetime.utcnow().replace(microsecond=0)
+    single = SeriesKey("GRU", "JFK", departure_in(40), 1, "ECONOMY")
+    couple = single._replace(pax=2)
+    
+    # Both searches of the route land in the same second of one run
+    await store.record(db, [(single, summarize([1000.0], 1, at=at)), (couple, summarize([2400.0], 2, at=at))])
+    await db.commit()
+    
+    history = await store.history(db, [single, couple], at - timedelta(hours=1))
+    assert history[single] == [PricePoint(at, 1000.0, 1000.0, 1)]
+    assert history[couple] == [PricePoint(at, 1200.0, 1200.0, 1)]
+
+
+@pytest.mark.asyncio
+async def test_points_at_the_same_time_replace_each_other(db):
+    store = PriceHistoryStore()
+    at = datetime.utcnow().replace(microsecond=0)
+    key = SeriesKey("GRU", "JFK", departure_in(40), 1, "ECONOMY")
+    
+    await store.record(db, [(key, summarize([1000.0], at=at))])
+    await store.record(db, [(key, summarize([900.0], at=at)), (key, summarize([950.0], at=at - timedelta(minutes=30)))])
+    await db.commit()
+    
+    points = await store.series(db, key, at - timedelta(hours=1))
+    assert [point.min_price for point in points] == [950.0, 900.0]
+
+
+@pytest.mark.asyncio
+async def test_cached_responses_add_no_history_points(db):
+    planner = RunPlanner(PriceMonitoringService(db))
+    
+    planner.record_prices(route(1), OfferBatch(prices=[1000.0, 1200.0]))
+    planner.record_prices(route(2), OfferBatch(prices=[2000.0], cached=True))
+    
+    assert [key.pax for key, _ in planner.price_points] == [1]
+    # The cheapest price still feeds the scheduler
+    assert planner.cheapest[route(2)] == 2000.0
+    assert planner.cached_routes == {route(2)}
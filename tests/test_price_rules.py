@@ -0,0 +1,131 @@
+"""Drop-percentage and new-low rules and the statistics they are judged on."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import select
+
+from app.models.price_rule import RoutePriceStats, WatchlistRuleState
+from app.services.offers import OfferBatch, OfferRecord
+from app.services.price_history import SeriesKey
+from app.services.price_monitoring_service import PriceMonitoringService
+from app.services.price_rules import DROP_RULE, NEW_LOW_RULE, PriceRuleEngine, price_rules, rolling_min, update_stats
+from app.templates import load_templates
+from app.workers.monitoring_engine import MonitoringEngine
+from app.workers.run_planner import RouteGroup, RunPlanner, route_key_for
+
+from tests.conftest import create_user, create_watchlist, departure_in
+
+KEY = SeriesKey("GRU", "JFK", departure_in(40), 1, "ECONOMY")
+
+
+def batch(price: float, cached: bool = False) -> OfferBatch:
+    offer = OfferRecord(f"offer-{price}", price, "BRL", "LA", 0, "PT10H")
+    return OfferBatch(offers=[offer], prices=[price], cached=cached)
+
+
+def engine() -> PriceRuleEngine:
+    return PriceRuleEngine(alpha=0.5, window_days=3, min_samples=2, realert_pct=5.0)
+
+
+async def feed(db, rules: PriceRuleEngine, watchlist, prices, start: datetime, key: SeriesKey = KEY):
+    """Evaluate one fetch per price, a day apart; returns each fetch's fired rule."""
+    fired = []
+    for day, price in enumerate(prices):
+        hits = await rules.evaluate(db, key, key.pax, [watchlist], batch(price), now=start + timedelta(days=day))
+        state = await db.get(WatchlistRuleState, (watchlist.id, (await rules.load_stats(db, key)).id))
+        fired.append(state.last_rule if hits else None)
+    return fired
+
+
+def test_rolling_min_covers_the_window():
+    stats = RoutePriceStats(origin="GRU", destination="JFK", departure_date=KEY.departure_date, cabin_class="ECONOMY")
+    day0 = departure_in(0)
+    for days, price in ((0, 500.0), (1, 900.0), (3, 800.0)):
+        update_stats(stats, price, day0 + timedelta(days=days), alpha=0.5, window_days=3)
+    
+    assert rolling_min(stats, day0 + timedelta(days=3), 3) == 800.0
+    assert rolling_min(stats, day0 + timedelta(days=5), 3) == 800.0
+    assert rolling_min(stats, day0 + timedelta(days=6), 3) is None
+
+
+@pytest.mark.asyncio
+async def test_drop_rule_fires_once_until_price_recovers(db):
+    user = await create_user(db)
+    watchlist = await create_watchlist(db, user, drop_pct=10.0)
+    
+    # Averages 1000 before the first drop, then 882.5 after it and 941.25 after the recovery
+    fired = await feed(db, engine(), watchlist, [1000.0, 1000.0, 850.0, 840.0, 1000.0, 840.0], datetime.utcnow())
+    
+    assert fired == [None, None, DROP_RULE, None, None, DROP_RULE]
+
+
+@pytest.mark.asyncio
+async def test_new_low_rule_fires_below_rolling_minimum(db):
+    user = await create_user(db)
+    watchlist = await create_watchlist(db, user, alert_on_new_low=True)
+    
+    fired = await feed(db, engine(), watchlist, [1000.0, 900.0, 950.0, 880.0], datetime.utcnow())
+    
+    assert fired == [None, None, None, NEW_LOW_RULE]
+
+
+@pytest.mark.asyncio
+async def test_alerts_on_one_departure_date_do_not_block_another(db):
+    user = await create_user(db)
+    watchlist = await create_watchlist(db, user, drop_pct=10.0, flex_days=1)
+    rules = engine()
+    start = datetime.utcnow()
+    
+    next_day = KEY._replace(departure_date=KEY.departure_date + timedelta(days=1))
+    first = await feed(db, rules, watchlist, [1000.0, 1000.0, 850.0], start)
+    second = await feed(db, rules, watchlist, [1000.0, 1000.0, 850.0], start, key=next_day)
+    
+    assert first == second == [None, None, DROP_RULE]
+
+
+@pytest.mark.asyncio
+async def test_flexible_watchlist_rules_across_concurrent_date_groups(session_factory, stub_flights, monkeypatch):
+    monkeypatch.setattr(price_rules, "min_samples", 1)
+    async with session_factory() as db:
+        watchlist = await create_watchlist(db, await create_user(db), flex_days=2, drop_pct=10.0)
+    load_templates()
+    
+    # The second run evaluates the rules of all five date groups at once, each creating its state
+    for _ in range(2):
+        report = await MonitoringEngine(session_factory=session_factory, concurrency=5).run([watchlist])
+        assert report.searches == 5
+        assert report.failed_searches == 0
+    
+    async with session_factory() as db:
+        stats = (await db.execute(select(RoutePriceStats))).scalars().all()
+        states = (await db.execute(select(WatchlistRuleState))).scalars().all()
+    assert [row.samples for row in stats] == [2] * 5
+    assert sorted(state.stats_id for state in states) == sorted(row.id for row in stats)
+
+
+@pytest.mark.asyncio
+async def test_party_sizes_keep_separate_statistics(db):
+    user = await create_user(db)
+    watchlist = await create_watchlist(db, user, drop_pct=10.0)
+    rules = engine()
+    
+    await feed(db, rules, watchlist, [1000.0], datetime.utcnow())
+    await feed(db, rules, watchlist, [2400.0], datetime.utcnow(), key=KEY._replace(pax=2))
+    
+    stats = (await db.execute(select(RoutePriceStats).order_by(RoutePriceStats.pax))).scalars().all()
+    assert [(row.pax, row.samples, row.last_price) for row in stats] == [(1, 1, 1000.0), (2, 1, 1200.0)]
+
+
+@pytest.mark.asyncio
+async def test_cached_responses_skip_rules(db):
+    user = await create_user(db)
+    watchlist = await create_watchlist(db, user, drop_pct=10.0)
+    planner = RunPlanner(PriceMonitoringService(db))
+    group = RouteGroup(key=route_key_for(watchlist), watchlists=[watchlist])
+    
+    assert await planner.evaluate_rules(group, batch(1000.0, cached=True)) == []
+    assert (await db.execute(select(RoutePriceStats))).scalars().first() is None
+    
+    await planner.evaluate_rules(group, batch(1000.0))
+    assert (await db.execute(select(RoutePriceStats))).scalars().one().samples == 1
@@ -0,0 +1,65 @@
+"""Provider rate limits shared across processes through Redis."""
+
+import asyncio
+import time
+
+import fakeredis.aioredis
+import pytest
+
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.rate_limit import QuotaExceededError, RedisRateLimiter, get_rate_limiter
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.aioredis.FakeRedis()
+
+
+def limiter(redis_client, **limits) -> RedisRateLimiter:
+    return RedisRateLimiter(redis_client, "amadeus", **{"tps": 1000.0, **limits})
+
+
+@pytest.mark.asyncio
+async def test_processes_share_the_monthly_quota(redis_client):
+    # Two limiters on one Redis, as in two worker processes
+    first, second = limiter(redis_client, monthly_quota=3), limiter(redis_client, monthly_quota=3)
+    
+    await first.acquire()
+    await second.acquire()
+    await first.acquire()
+    
+    with pytest.raises(QuotaExceededError):
+        await second.acquire()
+    assert await first.remaining_quota() == 0
+    # A restarted process sees the month's usage
+    with pytest.raises(QuotaExceededError):
+        await limiter(redis_client, monthly_quota=3).acquire()
+
+
+@pytest.mark.asyncio
+async def test_processes_share_the_request_rate(redis_client):
+    processes = [limiter(redis_client, tps=20.0), limiter(redis_client, tps=20.0)]
+    started = time.monotonic()
+    
+    await asyncio.gather(*(processes[index % 2].acquire() for index in range(4)))
+    
+    # Four requests at 20 TPS need three intervals of 50 ms, whichever process sends them
+    assert time.monotonic() - started >= 0.14
+
+
+@pytest.mark.asyncio
+async def test_burst_requests_go_at_once(redis_client):
+    shared = limiter(redis_client, tps=5.0, burst=3)
+    started = time.monotonic()
+    
+    await asyncio.gather(*(shared.acquire() for _ in range(3)))
+    
+    assert time.monotonic() - started < 0.1
+
+
+def test_backend_is_selected_by_setting(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_limiters", {})
+    monkeypatch.setattr(settings, "RATE_LIMIT_BACKEND", "redis")
+    
+    assert isinstance(get_rate_limiter("amadeus"), RedisRateLimiter)
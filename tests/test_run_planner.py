@@ -0,0 +1,23 @@
+"""Route group runs of the monitoring planner."""
+
+import pytest
+
+from app.services.price_monitoring_service import PriceMonitoringService
+from app.templates import load_templates
+from app.workers.run_planner import RouteGroup, RunPlanner, route_key_for
+
+from tests.conftest import create_user, create_watchlist
+
+
+@pytest.mark.asyncio
+async def test_run_group_alerts_members_whose_target_is_reached(db, stub_flights):
+    user = await create_user(db)
+    reached = await create_watchlist(db, user, price_target=100000.0)
+    missed = await create_watchlist(db, user, price_target=1.0)
+    load_templates()
+    planner = RunPlanner(PriceMonitoringService(db))
+    
+    assert await planner.run_group(RouteGroup(key=route_key_for(reached), watchlists=[reached, missed]))
+    
+    assert {watchlist.id for watchlist, _ in planner.hits} == {reached.id}
+    assert await planner.queue_alerts() == 1
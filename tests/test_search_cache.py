@@ -0,0 +1,97 @@
+"""Two-tier search cache against a fake Redis."""
+
+import time
+from datetime import date
+
+import fakeredis.aioredis
+import pytest
+
+from app.services.search_cache import SearchCache
+
+
+class BrokenRedis:
+    """Redis client whose every call fails."""
+    
+    def pipeline(self):
+        raise ConnectionError("redis is down")
+    
+    async def set(self, *args, **kwargs):
+        raise ConnectionError("redis is down")
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.aioredis.FakeRedis()
+
+
+def search_key(cache: SearchCache) -> str:
+    return cache.make_key(" gru", "jfk ", date(2027, 1, 10), None, 2, "economy")
+
+
+@pytest.mark.asyncio
+async def test_local_hit_skips_redis(redis_client):
+    cache = SearchCache(max_entries=10, redis_client=redis_client)
+    key = search_key(cache)
+    
+    await cache.set(key, b"offers", ttl=600)
+    await redis_client.flushall()
+    
+    assert await cache.get(key) == b"offers"
+    assert cache.stats == {"local_hits": 1, "remote_hits": 0, "misses": 0}
+
+
+@pytest.mark.asyncio
+async def test_other_workers_read_through_redis(redis_client):
+    writer = SearchCache(max_entries=10, redis_client=redis_client)
+    reader = SearchCache(max_entries=10, redis_client=redis_client)
+    key = search_key(writer)
+    
+    await writer.set(key, b"offers", ttl=600)
+    
+    assert await reader.get(key) == b"offers"
+    assert await reader.get(key) == b"offers"
+    assert reader.stats == {"local_hits": 1, "remote_hits": 1, "misses": 0}
+    # The local copy expires with the Redis key
+    expires_at, _ = reader.local._entries[key]
+    assert expires_at - time.monotonic() <= 600
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_in_redis(redis_client):
+    cache = SearchCache(max_entries=10, redis_client=redis_client)
+    key = search_key(cache)
+    
+    await cache.set(key, b"offers", ttl=600)
+    
+    assert 0 < await redis_client.ttl(key) <= 600
+
+
+@pytest.mark.asyncio
+async def test_keys_are_normalized(redis_client):
+    cache = SearchCache(max_entries=10, redis_client=redis_client)
+    
+    assert search_key(cache) == cache.make_key("GRU", "JFK", date(2027, 1, 10), None, 2, "ECONOMY")
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_are_misses():
+    cache = SearchCache(max_entries=10, redis_client=BrokenRedis())
+    key = search_key(cache)
+    
+    await cache.set(key, b"offers", ttl=600)
+    cache.local._entries.clear()
+    
+    assert await cache.get(key) is None
+    assert cache.stats["misses"] == 1
+
+
+def test_lru_evicts_least_recently_used():
+    cache = SearchCache(max_entries=2)
+    cache.local.set("a", b"1", 60)
+    cache.local.set("b", b"2", 60)
+    cache.local.get("a")
+    cache.local.set("c", b"3", 60)
+    
+    assert cache.local.get("b") is None
+    assert cache.local.get("a") == b"1"
+    assert len(cache.local) == 2
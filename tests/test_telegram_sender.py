@@ -0,0 +1,177 @@
+"""Telegram delivery: per-chat spacing, global throttling, 429s and priorities."""
+
+import asyncio
+import json
+import time
+from typing import Callable, List, Optional, Tuple
+
+import httpx
+import pytest
+
+from app.services import telegram_sender as telegram_sender_module
+from app.services.telegram_sender import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    TelegramSendError,
+    TelegramSender,
+)
+
+
+class FakeTelegram:
+    """Records sendMessage calls; ``respond`` picks the response per call."""
+    
+    def __init__(self, respond: Optional[Callable[[str, int], httpx.Response]] = None):
+        self.respond = respond or (lambda chat_id, call: httpx.Response(200, json={"ok": True}))
+        self.calls: List[Tuple[float, str, str]] = []
+        self.release = asyncio.Event()
+        self.release.set()
+    
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.calls.append((time.monotonic(), body["chat_id"], body["text"]))
+        await self.release.wait()
+        return self.respond(body["chat_id"], len(self.calls))
+    
+    def times_for(self, chat_id: str) -> List[float]:
+        return [at for at, chat, _ in self.calls if chat == chat_id]
+
+
+@pytest.fixture
+def fake_telegram(monkeypatch):
+    fake = FakeTelegram()
+    client = httpx.AsyncClient(base_url="https://telegram.test", transport=httpx.MockTransport(fake.handler))
+    monkeypatch.setattr(telegram_sender_module.http_clients, "get", lambda name: client)
+    return fake
+
+
+def rate_limited(retry_after: float) -> httpx.Response:
+    return httpx.Response(429, json={"ok": False, "parameters": {"retry_after": retry_after}})
+
+
+@pytest.mark.asyncio
+async def test_messages_to_one_chat_are_spaced_without_holding_up_others(fake_telegram):
+    sender = TelegramSender(global_rate=1000, per_chat_rate=10, workers=2)
+    try:
+        await asyncio.gather(*(sender.send("busy", f"alert {n}") for n in range(3)), sender.send("quiet", "alert"))
+    finally:
+        await sender.aclose()
+    
+    busy = fake_telegram.times_for("busy")
+    assert len(busy) == 3
+    assert all(later - earlier >= 0.09 for earlier, later in zip(busy, busy[1:]))
+    # The quiet chat went out right away rather than after the busy chat's backlog
+    assert fake_telegram.times_for("quiet")[0] - busy[0] < 0.05
+    assert [text for _, chat, text in fake_telegram.calls if chat == "busy"] == ["alert 0", "alert 1", "alert 2"]
+    assert sender.stats["sent"] == 4
+    assert sender.stats["deferred"] >= 2
+
+
+@pytest.mark.asyncio
+async def test_global_rate_throttles_across_chats(fake_telegram):
+    sender = TelegramSender(global_rate=20, per_chat_rate=1000, workers=4)
+    started = time.monotonic()
+    try:
+        await asyncio.gather(*(sender.send(f"chat-{n}", "alert") for n in range(25)))
+    finally:
+        await sender.aclose()
+    
+    # 20 go out in the initial burst, the other 5 at 20 per second
+    assert time.monotonic() - started >= 0.2
+    assert len(fake_telegram.calls) == 25
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_the_chat_and_retries(fake_telegram):
+    fake_telegram.respond = lambda chat_id, call: rate_limited(0.2) if call == 1 else httpx.Response(200, json={"ok": True})
+    sender = TelegramSender(global_rate=1000, per_chat_rate=1000, max_retry_after=1)
+    try:
+        await sender.send("chat", "alert")
+    finally:
+        await sender.aclose()
+    
+    first, second = fake_telegram.times_for("chat")
+    assert second - first >= 0.2
+    assert sender.stats["rate_limited"] == 1
+    assert sender.stats["sent"] == 1
+
+
+@pytest.mark.asyncio
+async def test_long_retry_after_goes_back_to_the_outbox(fake_telegram):
+    fake_telegram.respond = lambda chat_id, call: rate_limited(30)
+    sender = TelegramSender(global_rate=1000, per_chat_rate=1000, max_retry_after=5)
+    try:
+        with pytest.raises(TelegramSendError) as error:
+            await sender.send("chat", "alert")
+    finally:
+        await sender.aclose()
+    
+    assert error.value.retryable
+    assert len(fake_telegram.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_waits_past_max_wait_go_back_to_the_outbox(fake_telegram):
+    fake_telegram.respond = lambda chat_id, call: rate_limited(0.5)
+    sender = TelegramSender(global_rate=1000, per_chat_rate=1000, max_retry_after=5, max_wait=0.2)
+    try:
+        with pytest.raises(TelegramSendError) as error:
+            await sender.send("chat", "alert")
+    finally:
+        await sender.aclose()
+    
+    assert error.value.retryable
+    assert sender.stats["expired"] == 1
+    assert len(fake_telegram.calls) == 1
+
+
+def test_max_wait_stays_under_the_outbox_lease(monkeypatch):
+    monkeypatch.setattr(telegram_sender_module.settings, "NOTIFICATION_LEASE_SECONDS", 120)
+    
+    assert TelegramSender(max_wait=600).max_wait == 60
+    # The defaults leave the dispatcher time to record the result before the lease runs out
+    assert TelegramSender().max_wait < 120
+
+
+@pytest.mark.asyncio
+async def test_higher_priority_messages_are_sent_first(fake_telegram):
+    sender = TelegramSender(global_rate=1000, per_chat_rate=1000, workers=1)
+    fake_telegram.release.clear()
+    try:
+        # Keep the only worker busy while the rest queue up
+        blocker = asyncio.create_task(sender.send("blocker", "first"))
+        while not fake_telegram.calls:
+            await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(sender.send("chat", text, priority=priority))
+            for text, priority in [("low", PRIORITY_LOW), ("normal", PRIORITY_NORMAL), ("high", PRIORITY_HIGH)]
+        ]
+        await asyncio.sleep(0)
+        fake_telegram.release.set()
+        await asyncio.gather(blocker, *queued)
+    finally:
+        await sender.aclose()
+    
+    assert [text for _, _, text in fake_telegram.calls] == ["first", "high", "normal", "low"]
+
+
+@pytest.mark.asyncio
+async def test_metrics_count_delayed_messages_in_the_queue(fake_telegram):
+    sender = TelegramSender(global_rate=1000, per_chat_rate=0.1)
+    first = asyncio.create_task(sender.send("chat", "first"))
+    second = asyncio.create_task(sender.send("chat", "second"))
+    await first
+    while not sender.stats["deferred"]:
+        await asyncio.sleep(0.01)
+    
+    metrics = sender.metrics()
+    assert metrics["queue_depth"] == 1
+    assert metrics["queue_depth_by_priority"]["normal"] == 1
+    assert metrics["delayed"] == 1
+    assert metrics["deferred"] == 1
+    
+    # Stopping fails the delayed message instead of leaving its caller waiting
+    await sender.aclose()
+    with pytest.raises(TelegramSendError):
+        await second
+    assert sender.metrics()["queue_depth"] == 0
@@ -0,0 +1,138 @@
+"""Token refresh: single flight within a process and across processes."""
+
+import asyncio
+import itertools
+import time
+from typing import List, Tuple
+
+import pytest
+
+from app.services.token_manager import CachedToken, SQLiteTokenBackend, TokenManager
+
+
+class CountingFetcher:
+    """Token endpoint stand-in that counts calls and hands out numbered tokens."""
+    
+    def __init__(self, expires_in: int = 1800, delay: float = 0.05, fail: bool = False):
+        self.expires_in = expires_in
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self._numbers = itertools.count(1)
+    
+    async def __call__(self) -> Tuple[str, int]:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("token endpoint unavailable")
+        return f"token-{next(self._numbers)}", self.expires_in
+
+
+@pytest.fixture
+def token_db(tmp_path) -> str:
+    return str(tmp_path / "tokens.db")
+
+
+def manager_for(token_db: str, fetch: CountingFetcher, **options) -> TokenManager:
+    # Each manager gets its own backend on the same file, as separate processes would
+    return TokenManager(key="amadeus:test", fetch=fetch, backend=SQLiteTokenBackend(token_db), **options)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_on_two_managers_fetch_once(token_db):
+    fetch = CountingFetcher(delay=0.2)
+    managers = [manager_for(token_db, fetch), manager_for(token_db, fetch)]
+    
+    tokens: List[str] = await asyncio.gather(*(managers[n % 2].get_token() for n in range(40)))
+    
+    assert fetch.calls == 1
+    assert set(tokens) == {"token-1"}
+    assert sum(manager.stats["refreshes"] for manager in managers) == 1
+
+
+@pytest.mark.asyncio
+async def test_token_is_shared_through_the_backend(token_db):
+    fetch = CountingFetcher()
+    assert await manager_for(token_db, fetch).get_token() == "token-1"
+    
+    # A manager started later, e.g. in a new worker, reuses the stored token
+    later = manager_for(token_db, fetch)
+    assert await later.get_token() == "token-1"
+    assert fetch.calls == 1
+    assert later.stats["avoided_refreshes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_lock_is_exclusive_until_released_or_expired(token_db):
+    first, second = SQLiteTokenBackend(token_db), SQLiteTokenBackend(token_db)
+    
+    assert await first.acquire_lock("amadeus:test", ttl=10)
+    assert not await second.acquire_lock("amadeus:test", ttl=10)
+    await first.release_lock("amadeus:test")
+    assert await second.acquire_lock("amadeus:test", ttl=0.05)
+    
+    # A holder that died without releasing stops blocking once its lock expires
+    await asyncio.sleep(0.1)
+    assert await first.acquire_lock("amadeus:test", ttl=10)
+
+
+@pytest.mark.asyncio
+async def test_waits_for_the_process_holding_the_lock(token_db):
+    other_process = SQLiteTokenBackend(token_db)
+    await other_process.acquire_lock("amadeus:test", ttl=10)
+    fetch = CountingFetcher()
+    manager = manager_for(token_db, fetch)
+    
+    async def publish() -> None:
+        await asyncio.sleep(0.2)
+        await other_process.set("amadeus:test", CachedToken("token-from-peer", time.time() + 1800))
+        await other_process.release_lock("amadeus:test")
+    
+    token, _ = await asyncio.gather(manager.get_token(), publish())
+    
+    assert token == "token-from-peer"
+    assert fetch.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_fetches_directly_when_the_lock_holder_never_publishes(token_db):
+    await SQLiteTokenBackend(token_db).acquire_lock("amadeus:test", ttl=10)
+    fetch = CountingFetcher()
+    manager = manager_for(token_db, fetch, lock_ttl=0.3)
+    
+    assert await manager.get_token() == "token-1"
+    assert fetch.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_tokens_near_expiry_are_refreshed_in_the_background(token_db):
+    fetch = CountingFetcher(delay=0.1)
+    manager = manager_for(token_db, fetch, expiry_margin=60, early_refresh=300)
+    await manager.backend.set("amadeus:test", CachedToken("token-old", time.time() + 200))
+    manager._token = CachedToken("token-old", time.time() + 200)
+    
+    # Callers keep getting the current token while the new one is fetched
+    assert await manager.get_token() == "token-old"
+    assert await manager.get_token() == "token-old"
+    await manager._background_refresh
+    
+    assert await manager.get_token() == "token-1"
+    assert fetch.calls == 1
+    assert manager.stats["background_refreshes"] == 1
+    assert (await SQLiteTokenBackend(token_db).get("amadeus:test")).access_token == "token-1"
+
+
+@pytest.mark.asyncio
+async def test_failed_background_refresh_keeps_the_current_token(token_db):
+    fetch = CountingFetcher(fail=True)
+    manager = manager_for(token_db, fetch, expiry_margin=60, early_refresh=300)
+    manager._token = CachedToken("token-old", time.time() + 200)
+    
+    assert await manager.get_token() == "token-old"
+    await manager._background_refresh
+    
+    # The next call tries again, as the lock was released after the failure
+    assert await manager.get_token() == "token-old"
+    await manager._background_refresh
+    assert fetch.calls == 2
+    assert await SQLiteTokenBackend(token_db).acquire_lock("amadeus:test", ttl=10)
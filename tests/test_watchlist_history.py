@@ -0,0 +1,92 @@
+"""Watchlist price history endpoint and its conditional GETs."""
+
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+
+from app.api.v1.endpoints import watchlist as watchlist_endpoints
+from app.api.v1.endpoints.auth import get_current_user
+from app.core.database import get_async_session
+from app.services.price_history import epoch_seconds, price_history, series_keys_for, summarize
+
+from tests.conftest import create_user, create_watchlist
+
+
+@pytest_asyncio.fixture
+async def api(session_factory):
+    """The watchlist router over the test database; set ``api.user`` to act as someone."""
+    app = FastAPI()
+    app.include_router(watchlist_endpoints.router, prefix="/watchlist")
+    
+    async def session():
+        async with session_factory() as db:
+            yield db
+    
+    app.dependency_overrides[get_async_session] = session
+    app.dependency_overrides[get_current_user] = lambda: client.user
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def record_point(db, watchlist, price: float, at: datetime) -> None:
+    await price_history.record(db, [(series_keys_for(watchlist)[0], summarize([price], watchlist.pax, at=at))])
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_history_is_served_until_new_points_land(api, db):
+    api.user = await create_user(db)
+    watchlist = await create_watchlist(db, api.user, pax=2)
+    at = datetime.utcnow().replace(microsecond=0) - timedelta(hours=1)
+    await record_point(db, watchlist, 2000.0, at)
+    url = f"/watchlist/{watchlist.id}/history?days=1"
+    
+    response = await api.get(url)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    body = response.json()
+    assert body["resolution"] == "RAW"
+    assert body["series"] == [
+        {"departure_date": watchlist.date_from.isoformat(), "points": [[epoch_seconds(at), 1000.0, 1000.0, 1]]}
+    ]
+    
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        not_modified = await api.get(url, headers={"If-None-Match": if_none_match})
+        assert not_modified.status_code == 304
+        assert not_modified.headers["ETag"] == etag
+        assert not_modified.content == b""
+    
+    await record_point(db, watchlist, 1800.0, at + timedelta(minutes=30))
+    modified = await api.get(url, headers={"If-None-Match": etag})
+    assert modified.status_code == 200
+    assert modified.headers["ETag"] != etag
+    assert len(modified.json()["series"][0]["points"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_etag_depends_on_the_window(api, db):
+    api.user = await create_user(db)
+    watchlist = await create_watchlist(db, api.user)
+    url = f"/watchlist/{watchlist.id}/history"
+    
+    raw = await api.get(url, params={"days": 1})
+    daily = await api.get(url, params={"days": 1, "resolution": "DAILY"}, headers={"If-None-Match": raw.headers["ETag"]})
+    
+    assert daily.status_code == 200
+    assert daily.json()["resolution"] == "DAILY"
+    assert daily.headers["ETag"] != raw.headers["ETag"]
+
+
+@pytest.mark.asyncio
+async def test_history_of_another_users_watchlist_is_forbidden(api, db):
+    owner = await create_user(db)
+    watchlist = await create_watchlist(db, owner)
+    api.user = await create_user(db, email="someone@example.com")
+    
+    response = await api.get(f"/watchlist/{watchlist.id}/history")
+    
+    assert response.status_code == 403
+    assert "ETag" not in response.headers